@@ -0,0 +1,211 @@
+import math
+import time
+import logging
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from config import app_config
+
+logger = logging.getLogger(__name__)
+
+# Client whose request is running in this context; None for background work
+# (precompute, CLI), which is never limited
+client_var = contextvars.ContextVar("admission_client", default=None)
+# Set while a cold computation holds a slot, so nested cold paths don't take another
+_admitted_var = contextvars.ContextVar("admission_admitted", default=False)
+
+class AdmissionRejected(Exception):
+    """A cold computation was refused; the client should retry after retry_after seconds"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Too many requests ({reason}), retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """Refills rate tokens per second up to burst"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self):
+        """
+        Take one token if available
+
+        Returns:
+            float: 0 if a token was taken, else seconds until one is available
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+class AdmissionController:
+    """
+    Bounds cold-path computations (recipe fetch, classification, ingredient
+    matching) per worker process
+
+    Each client spends one token from its bucket per cold computation. At
+    most max_concurrent run at once; up to queue_size more wait in FIFO
+    order for at most queue_timeout seconds. Anything beyond is rejected
+    with a Retry-After estimate instead of piling onto the workers.
+    """
+
+    def __init__(self, max_concurrent, queue_size, queue_timeout, rate, burst, max_clients=10000):
+        self.max_concurrent = max_concurrent
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # client -> TokenBucket, least recently used first
+        self._waiters = deque()
+        self._running = 0
+        # Moving average of cold computation seconds, for Retry-After estimates
+        self._avg_duration = 5.0
+        self._stats = {"admitted": 0, "queued": 0, "rejected_rate_limit": 0,
+                       "rejected_queue_full": 0, "rejected_queue_timeout": 0, "queue_wait_ms": 0.0}
+
+    def _take_token(self, client):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            bucket = self._buckets.pop(client, None) or TokenBucket(self.rate, self.burst)
+            self._buckets[client] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            wait = bucket.take()
+            if wait:
+                self._stats["rejected_rate_limit"] += 1
+                raise AdmissionRejected("rate limit", math.ceil(wait))
+
+    def _refund_token(self, client):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket:
+                bucket.refund()
+
+    def _queue_retry_after(self):
+        """Seconds until the queue has likely drained; call with _lock held"""
+        batches = (len(self._waiters) + 1) / max(1, self.max_concurrent)
+        return max(1, math.ceil(batches * self._avg_duration))
+
+    def _acquire(self):
+        with self._lock:
+            if self._running < self.max_concurrent and not self._waiters:
+                self._running += 1
+                self._stats["admitted"] += 1
+                return
+            if len(self._waiters) >= self.queue_size:
+                self._stats["rejected_queue_full"] += 1
+                raise AdmissionRejected("queue full", self._queue_retry_after())
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+            self._stats["queued"] += 1
+
+        started = time.monotonic()
+        waiter.wait(self.queue_timeout)
+        with self._lock:
+            self._stats["queue_wait_ms"] += (time.monotonic() - started) * 1000
+            # _release may have handed us the slot just after the wait timed out
+            if waiter.is_set():
+                self._stats["admitted"] += 1
+                return
+            self._waiters.remove(waiter)
+            self._stats["rejected_queue_timeout"] += 1
+            raise AdmissionRejected("queue timeout", self._queue_retry_after())
+
+    def _release(self, duration):
+        with self._lock:
+            self._avg_duration += 0.1 * (duration - self._avg_duration)
+            if self._waiters:
+                # Hand the slot straight to the oldest waiter
+                self._waiters.popleft().set()
+            else:
+                self._running -= 1
+
+    @contextmanager
+    def admit(self, client):
+        """
+        Hold a cold-path slot for client, waiting in the queue if needed
+
+        Raises:
+            AdmissionRejected: If the client is over its rate or the queue
+                is full or took too long
+        """
+        self._take_token(client)
+        try:
+            self._acquire()
+        except AdmissionRejected:
+            # Only computations that ran count against the client's rate
+            self._refund_token(client)
+            raise
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    def stats(self):
+        """Counters since start, plus current running and queued computations"""
+        with self._lock:
+            return {**self._stats, "running": self._running, "waiting": len(self._waiters),
+                    "clients": len(self._buckets), "avg_duration_ms": round(self._avg_duration * 1000, 1)}
+
+_controller = None
+_controller_lock = threading.Lock()
+
+def get_admission_controller():
+    """
+    Return this process's admission controller, created on first use
+
+    Returns:
+        AdmissionController: The controller, or None if admission control is disabled
+    """
+    global _controller
+    if not app_config.ADMISSION_ENABLED:
+        return None
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController(
+                    app_config.ADMISSION_MAX_CONCURRENT, app_config.ADMISSION_QUEUE_SIZE,
+                    app_config.ADMISSION_QUEUE_TIMEOUT, app_config.ADMISSION_CLIENT_RATE,
+                    app_config.ADMISSION_CLIENT_BURST)
+    return _controller
+
+@contextmanager
+def cold_path():
+    """
+    Wrap an expensive computation done on behalf of the current client
+
+    A no-op for background work and for computations nested in one that
+    was already admitted.
+
+    Raises:
+        AdmissionRejected: If the computation may not run now
+    """
+    client = client_var.get()
+    controller = get_admission_controller()
+    if client is None or controller is None or _admitted_var.get():
+        yield
+        return
+    with controller.admit(client):
+        token = _admitted_var.set(True)
+        try:
+            yield
+        finally:
+            _admitted_var.reset(token)
@@ -0,0 +1,296 @@
+import os
+import re
+import time
+import logging
+import argparse
+from datetime import datetime, timezone
+import numpy as np
+from config import app_config
+from serializer import dump_file, load_file
+from nutrition_records import NUTRIENT_KEYS
+from result_cache import iter_cached_results, get_breakdown
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, the analytics export is disabled without it
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# Layout under ANALYTICS_EXPORT_DIR:
+#   dishes/date=YYYY-MM-DD/part-*.parquet       one row per computed result
+#   ingredients/date=YYYY-MM-DD/part-*.parquet  one row per ingredient of a result
+#   export_state.json                           computed_at of the newest exported result
+# Files are only ever added, so readers never see a partially rewritten table.
+# A dish computed again (after a refresh or data version change) gets a new
+# row; result_id ties ingredient rows to their dish row.
+STATE_FILE = "export_state.json"
+
+# Results computed in the last few seconds may still be in flight to disk;
+# leave them for the next export so the watermark never skips one
+EXPORT_SETTLE_SECONDS = 5
+
+# "200ml_katori" -> 200, "ml"; "1_piece" -> 1, "piece"; "serving" -> 1, "serving"
+_SERVING = re.compile(r"^(\d+(?:\.\d+)?)?([a-z]*)(?:_([a-z]+))?$")
+
+def is_available():
+    return pa is not None
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("The analytics export needs pyarrow (pip install pyarrow)")
+
+def _dish_schema():
+    return pa.schema([
+        ("result_id", pa.string()),
+        ("dish_name", pa.string()),
+        ("dish_type", pa.string()),
+        ("serving_size", pa.float64()),
+        ("serving_unit", pa.string()),
+        ("serving_label", pa.string()),
+        ("servings", pa.float64()),
+        ("estimated", pa.bool_()),
+        ("ingredient_count", pa.int32()),
+        ("computed_at", pa.timestamp("ms", tz="UTC")),
+        ("data_version", pa.string()),
+    ] + [(key, pa.float64()) for key in NUTRIENT_KEYS])
+
+def _ingredient_schema():
+    return pa.schema([
+        ("result_id", pa.string()),
+        ("dish_name", pa.string()),
+        ("position", pa.int32()),
+        ("ingredient", pa.string()),
+        ("quantity", pa.string()),
+        ("matched_to", pa.string()),
+        ("weight_grams", pa.float64()),
+        ("computed_at", pa.timestamp("ms", tz="UTC")),
+    ] + [(key, pa.float64()) for key in NUTRIENT_KEYS])
+
+def parse_serving(label):
+    """
+    Split the serving part of an "estimated_nutrition_per_..." key
+
+    Args:
+        label (str): e.g. "200ml_katori", "1_piece" or "serving"
+
+    Returns:
+        tuple: (size, unit), e.g. (200.0, "ml") or (1.0, "piece")
+    """
+    match = _SERVING.match(label)
+    if not match:
+        return None, label
+    size, unit, container = match.groups()
+    return float(size) if size else 1.0, unit or container or label
+
+def _rows_for_result(entry, result):
+    """Flatten one cached result into a dish row and its ingredient rows"""
+    serving_key = next((key for key in result if key.startswith("estimated_nutrition_per_")), None)
+    if serving_key is None:
+        return None, []
+    label = serving_key[len("estimated_nutrition_per_"):]
+    size, unit = parse_serving(label)
+    nutrition = result[serving_key]
+    computed_at = datetime.fromtimestamp(entry["computed_at"], tz=timezone.utc)
+    result_id = f"{entry['dish_name']}@{entry['computed_at']:.3f}"
+    ingredients = result.get("ingredients_used", [])
+
+    dish_row = {
+        "result_id": result_id,
+        "dish_name": entry["dish_name"],
+        "dish_type": result.get("dish_type"),
+        "serving_size": size,
+        "serving_unit": unit,
+        "serving_label": label,
+        "servings": result.get("servings"),
+        "estimated": bool(result.get("estimated", False)),
+        "ingredient_count": len(ingredients),
+        "computed_at": computed_at,
+        "data_version": entry.get("data_version"),
+        **{key: nutrition.get(key) for key in NUTRIENT_KEYS},
+    }
+
+    # The breakdown holds each ingredient's weight and nutrient contribution,
+    # in the same order as ingredients_used
+    breakdown = get_breakdown(entry["dish_name"])
+    if breakdown and len(breakdown["matches"]) != len(ingredients):
+        breakdown = None
+    ingredient_rows = []
+    for position, used in enumerate(ingredients):
+        row = {
+            "result_id": result_id,
+            "dish_name": entry["dish_name"],
+            "position": position,
+            "ingredient": used.get("ingredient"),
+            "quantity": used.get("quantity"),
+            "matched_to": used.get("matched_to"),
+            "weight_grams": None,
+            "computed_at": computed_at,
+            **dict.fromkeys(NUTRIENT_KEYS),
+        }
+        if breakdown:
+            row["weight_grams"] = breakdown["ingredients"][position][2]
+            values = breakdown["matches"][position][3]
+            if values is not None:
+                row.update(zip(NUTRIENT_KEYS, values))
+        ingredient_rows.append(row)
+    return dish_row, ingredient_rows
+
+def _write_partitions(table_name, rows, schema, stamp):
+    """Append rows as one new Parquet file per date partition"""
+    by_date = {}
+    for row in rows:
+        by_date.setdefault(row["computed_at"].strftime("%Y-%m-%d"), []).append(row)
+    for date, date_rows in by_date.items():
+        directory = os.path.join(app_config.ANALYTICS_EXPORT_DIR, table_name, f"date={date}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{stamp}.parquet")
+        # Written under a temporary name so readers never open a partial file
+        tmp_path = os.path.join(directory, f".part-{stamp}.parquet.tmp")
+        pq.write_table(pa.Table.from_pylist(date_rows, schema=schema), tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+
+def export_results():
+    """
+    Append results computed since the last export to the columnar store
+
+    Reads the result cache, not the request path, so it can run from the
+    precompute worker or a cron job at any frequency.
+
+    Returns:
+        int: Number of dish rows written
+    """
+    _require_pyarrow()
+    state_path = os.path.join(app_config.ANALYTICS_EXPORT_DIR, STATE_FILE)
+    state = load_file(state_path) if os.path.exists(state_path) else {}
+    since = state.get("exported_through", 0.0)
+    until = time.time() - EXPORT_SETTLE_SECONDS
+
+    dish_rows, ingredient_rows = [], []
+    newest = since
+    for entry, result in iter_cached_results(since, until):
+        dish_row, rows = _rows_for_result(entry, result)
+        if dish_row is None:
+            continue
+        dish_rows.append(dish_row)
+        ingredient_rows.extend(rows)
+        newest = max(newest, entry["computed_at"])
+
+    if dish_rows:
+        stamp = f"{int(time.time() * 1000)}-{os.getpid()}"
+        _write_partitions("ingredients", ingredient_rows, _ingredient_schema(), stamp)
+        # Dish rows last, so a dish row never points at missing ingredient rows
+        _write_partitions("dishes", dish_rows, _dish_schema(), stamp)
+        dump_file({"exported_through": newest, "exported_at": time.time()}, state_path)
+        logger.info("Exported %d results (%d ingredient rows) for analytics", len(dish_rows), len(ingredient_rows))
+    return len(dish_rows)
+
+def read_table(table="dishes", start=None, end=None, columns=None, where=None):
+    """
+    Load exported rows as an Arrow table
+
+    Only the date partitions in range are opened and only the requested
+    columns are read, so scans over months of results stay cheap.
+
+    Args:
+        table (str): "dishes" or "ingredients"
+        start (str, optional): First date to include, "YYYY-MM-DD"
+        end (str, optional): Last date to include, "YYYY-MM-DD"
+        columns (list, optional): Columns to read (default: all)
+        where (pyarrow.compute.Expression, optional): Extra row filter,
+            e.g. pc.field("dish_type") == "Dal"
+
+    Returns:
+        pyarrow.Table: Matching rows, with the partition "date" column
+    """
+    _require_pyarrow()
+    if table not in ("dishes", "ingredients"):
+        raise ValueError(f"Unknown table {table!r}, expected 'dishes' or 'ingredients'")
+    schema = _dish_schema() if table == "dishes" else _ingredient_schema()
+    directory = os.path.join(app_config.ANALYTICS_EXPORT_DIR, table)
+    if not os.path.isdir(directory):
+        return schema.empty_table()
+
+    dataset = ds.dataset(directory, format="parquet", schema=schema.append(pa.field("date", pa.string())),
+                         partitioning=ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive"),
+                         exclude_invalid_files=True, ignore_prefixes=["."])
+    expression = None
+    for condition in (ds.field("date") >= start if start else None,
+                      ds.field("date") <= end if end else None,
+                      where):
+        if condition is not None:
+            expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=columns, filter=expression)
+
+def latest_per_dish(table):
+    """Keep only the most recent row of each dish in a dishes table"""
+    _require_pyarrow()
+    if table.num_rows == 0:
+        return table
+    order = pc.sort_indices(table, sort_keys=[("dish_name", "ascending"), ("computed_at", "descending")])
+    table = table.take(order)
+    names = table.column("dish_name").to_numpy(zero_copy_only=False)
+    first = np.ones(len(names), dtype=bool)
+    first[1:] = names[1:] != names[:-1]
+    return table.filter(pa.array(first))
+
+def nutrient_matrix(table, nutrients=NUTRIENT_KEYS):
+    """
+    Nutrient columns of a table as one float matrix for vectorized analysis
+
+    Args:
+        table (pyarrow.Table): Rows from read_table
+        nutrients (tuple): Nutrient columns, in output column order
+
+    Returns:
+        numpy.ndarray: Shape (rows, len(nutrients)), NaN where a value is missing
+    """
+    return np.column_stack([pc.fill_null(table.column(key).combine_chunks(), np.nan).to_numpy()
+                            for key in nutrients]) if table.num_rows else np.empty((0, len(nutrients)))
+
+def summarize_by_dish_type(start=None, end=None, latest=True):
+    """
+    Mean nutrients per serving for each dish type
+
+    Args:
+        start (str, optional): First date, "YYYY-MM-DD"
+        end (str, optional): Last date, "YYYY-MM-DD"
+        latest (bool): Count each dish once, using its most recent result
+
+    Returns:
+        pyarrow.Table: dish_type, dishes and one mean column per nutrient
+    """
+    table = read_table("dishes", start, end, columns=["dish_name", "dish_type", "computed_at", *NUTRIENT_KEYS])
+    if latest:
+        table = latest_per_dish(table)
+    aggregations = [("dish_name", "count")] + [(key, "mean") for key in NUTRIENT_KEYS]
+    summary = table.group_by("dish_type").aggregate(aggregations)
+    return summary.rename_columns(["dishes" if name == "dish_name_count" else name[:-len("_mean")]
+                                   if name.endswith("_mean") else name for name in summary.column_names]).sort_by("dish_type")
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar analytics export of computed dish results")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("export", help="append results computed since the last export")
+    summary_parser = subparsers.add_parser("summary", help="mean nutrients per dish type")
+    summary_parser.add_argument("--start", help="first date, YYYY-MM-DD")
+    summary_parser.add_argument("--end", help="last date, YYYY-MM-DD")
+    summary_parser.add_argument("--all-rows", action="store_true",
+                                help="count every exported result, not just the latest per dish")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        print(f"Exported {export_results()} results to {app_config.ANALYTICS_EXPORT_DIR}")
+        return
+
+    summary = summarize_by_dish_type(args.start, args.end, latest=not args.all_rows)
+    print(f"{'dish type':<16}{'dishes':>7}" + "".join(f"{key:>10}" for key in NUTRIENT_KEYS))
+    for row in summary.to_pylist():
+        print(f"{row['dish_type'] or '-':<16}{row['dishes']:>7}"
+              + "".join(f"{row[key]:>10.1f}" if row[key] is not None else f"{'-':>10}" for key in NUTRIENT_KEYS))
+
+if __name__ == "__main__":
+    main()
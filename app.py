@@ -1,18 +1,42 @@
-from flask import Flask, request, jsonify
-from nutrition_calculator import calculate_nutrition_for_dish
+from flask import Flask, Response, g, request, jsonify
+from nutrition_calculator import (get_nutrition_entry_for_dish, calculate_nutrition_with_overrides,
+                                  calculate_nutrition_for_recipe, select_result_nutrients, SERVING_SIZES)
+from nutrition_records import NUTRIENT_SCHEMA, parse_nutrient_subset
+from result_cache import get_entry_etag
+from shared_cache import get_shared_cache
+from dish_search import suggest_dishes
+from admission import AdmissionRejected, client_var, get_admission_controller
+from meal_planner import calculate_meal, calculate_day_plan, evaluate_plans_bulk
+from serializer import FastJSONProvider, dumps, loads
+from logging_config import setup_logging, new_request_id, request_id_var
 import os
+import gzip
+import queue
+import threading
+import contextvars
 from dotenv import load_dotenv
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import logging
+from config import app_config
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
+setup_logging()
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+if app_config.TRUSTED_PROXY_COUNT:
+    # remote_addr becomes the address seen by the outermost trusted proxy
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app_config.TRUSTED_PROXY_COUNT)
 
 # Enable CORS for all routes with proper configuration
 CORS(app, resources={r"/*": {"origins": [
@@ -57,6 +81,251 @@ def index():
     </html>
     """
 
+@app.route("/api/health")
+def health():
+    """Readiness check used by run.py and load balancers"""
+    return jsonify({"status": "ok", "version": app_config.APP_VERSION})
+
+@app.route("/api/admission/stats")
+def admission_stats():
+    """Admitted, queued and rejected cold-path computations of this worker process"""
+    controller = get_admission_controller()
+    if controller is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **controller.stats()})
+
+@app.route("/api/nutrients")
+def nutrients():
+    """Nutrients of the registry, in the order of vectors and bulk totals"""
+    response = jsonify({"nutrients": [{"key": key, "unit": spec["unit"], "label": spec["label"]}
+                                      for key, spec in NUTRIENT_SCHEMA.items()]})
+    response.headers["Cache-Control"] = "public, max-age=3600"
+    return response
+
+@app.route("/api/cache/stats")
+def cache_stats():
+    """Hit/miss counters of the shared memory cache, summed over all workers on this host"""
+    shared = get_shared_cache()
+    if shared is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **shared.stats()})
+
+def _negotiate_encoding():
+    """Pick the best compression the client accepts, preferring brotli"""
+    offered = ["br", "gzip"] if brotli else ["gzip"]
+    return request.accept_encodings.best_match(offered)
+
+def _matching_etag(etag):
+    """
+    Return the If-None-Match tag that matches etag, if any
+    
+    Compressed responses carry the encoding as an ETag suffix, so a client
+    may send back either the plain or the suffixed form.
+    """
+    if request.if_none_match.star_tag:
+        return etag
+    for candidate in request.if_none_match.as_set():
+        if candidate in (etag, f"{etag}-br", f"{etag}-gzip"):
+            return candidate
+    return None
+
+def _select_nutrients(result, nutrients):
+    """Limit a dish result (dict or cached bytes) to the requested nutrients"""
+    if not nutrients:
+        return result
+    # Cached bytes are only decoded when a subset has to be cut out of them
+    return select_result_nutrients(loads(result) if isinstance(result, bytes) else result, nutrients)
+
+def _json_response(result):
+    """Build a JSON response from a result dict or pre-serialized JSON bytes"""
+    if isinstance(result, bytes):
+        return app.response_class(result, mimetype="application/json")
+    return jsonify(result)
+
+def _dish_response(result):
+    """JSON response for a dish result, limited to the request's nutrients"""
+    return _json_response(_select_nutrients(result, g.nutrients))
+
+def _is_ingredient_list(items):
+    """Check for a list of {"name": ..., "quantity": ...} objects with non-empty string values"""
+    return isinstance(items, list) and all(
+        isinstance(item, dict) and all(isinstance(item.get(field), str) and item[field].strip()
+                                       for field in ("name", "quantity"))
+        for item in items)
+
+@app.before_request
+def assign_request_id():
+    """Tag every log record of this request with a request id"""
+    new_request_id(request.headers.get("X-Request-ID"))
+
+@app.before_request
+def assign_admission_client():
+    """Identify the client whose token bucket pays for cold-path computations"""
+    # Never the leftmost X-Forwarded-For entry: clients set it freely and
+    # would get a fresh token bucket per request (see TRUSTED_PROXY_COUNT)
+    client_var.set(request.remote_addr or "unknown")
+
+@app.before_request
+def read_requested_nutrients():
+    """
+    Read the optional nutrient subset of a request
+    
+    Given as ?nutrients=calories,sodium, or as "nutrients" (string or list)
+    in a JSON or form body; g.nutrients is None when all were requested.
+    """
+    value = request.args.get("nutrients")
+    if value is None and request.method == "POST":
+        data = request.get_json(silent=True)
+        value = data.get("nutrients") if isinstance(data, dict) else request.form.get("nutrients")
+    try:
+        g.nutrients = parse_nutrient_subset(value)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+def _rejected_response(e, **fields):
+    """429 for a cold computation refused by admission control"""
+    response = jsonify({"error": "Too many requests for uncached dishes, please retry later",
+                        "reason": e.reason, "retry_after": e.retry_after, **fields})
+    response.headers["Retry-After"] = str(e.retry_after)
+    response.headers["Cache-Control"] = "no-store"
+    return response, 429
+
+@app.after_request
+def add_request_id_header(response):
+    response.headers["X-Request-ID"] = request_id_var.get()
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Compress JSON responses with brotli or gzip when the client supports it"""
+    if (response.status_code != 200 or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.mimetype != "application/json"):
+        return response
+    
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    encoding = _negotiate_encoding()
+    if not encoding or len(data) < app_config.COMPRESS_MIN_SIZE:
+        return response
+    
+    if encoding == "br":
+        response.set_data(brotli.compress(data, quality=5))
+    else:
+        response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers["Content-Encoding"] = encoding
+    
+    # A strong ETag must differ between representations
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+    return response
+
+@app.route("/api/dishes/suggest", methods=["GET"])
+def dish_suggest():
+    """
+    Type-ahead dish names for ?q=, dishes with warm results first
+    
+    Optional ?limit= caps the number of suggestions.
+    """
+    query = request.args.get("q", "")
+    limit = request.args.get("limit", type=int)
+    response = jsonify({"query": query, "suggestions": suggest_dishes(query, limit)})
+    # Suggestions change only when the index is rebuilt
+    response.headers["Cache-Control"] = "public, max-age=60"
+    return response
+
+@app.route("/api/dishes/<dish_name>/nutrition", methods=["GET"])
+def dish_nutrition(dish_name):
+    """
+    Cacheable GET endpoint for dish results
+    
+    Responses carry a strong ETag and Cache-Control so browsers, CDNs and
+    reverse proxies can serve repeats; If-None-Match returns 304.
+    """
+    try:
+        result, entry = get_nutrition_entry_for_dish(dish_name, raw=True)
+    except AdmissionRejected as e:
+        return _rejected_response(e, dish_name=dish_name)
+    except Exception as e:
+        logger.error("Error calculating nutrition via GET: %s", e)
+        response = jsonify({"error": str(e), "dish_name": dish_name})
+        response.headers["Cache-Control"] = "no-store"
+        return response, 500
+    
+    if entry is None:
+        # Errors and uncacheable results must not be stored by intermediaries
+        response = _dish_response(result)
+        response.headers["Cache-Control"] = "no-store"
+        return response, 500 if "error" in result else 200
+    
+    etag = get_entry_etag(entry, g.nutrients)
+    cache_control = (f"public, max-age={app_config.HTTP_CACHE_MAX_AGE}, "
+                     f"stale-while-revalidate={app_config.HTTP_CACHE_STALE_WHILE_REVALIDATE}")
+    
+    matched = _matching_etag(etag)
+    if matched:
+        response = app.response_class(status=304)
+        response.set_etag(matched)
+        response.headers["Cache-Control"] = cache_control
+        response.vary.add("Accept-Encoding")
+        return response
+    
+    response = _dish_response(result)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+@app.route("/api/dishes/<dish_name>/nutrition/stream", methods=["GET"])
+def dish_nutrition_stream(dish_name):
+    """
+    Dish result as an NDJSON stream of real pipeline stages
+    
+    Emits {"stage": ..., "message": ...} as each stage starts, then a final
+    {"stage": "done", "result": ...} or {"stage": "error", "error": ...}.
+    Cache hits produce only the final line, immediately.
+    """
+    events = queue.SimpleQueue()
+    nutrients = g.nutrients
+    
+    def progress(stage, message):
+        events.put(dumps({"stage": stage, "message": message}) + b"\n")
+    
+    def run():
+        try:
+            result, _ = get_nutrition_entry_for_dish(dish_name, raw=True, progress=progress)
+            result = _select_nutrients(result, nutrients)
+            if isinstance(result, bytes):
+                # Splice the cached bytes in rather than decoding and re-encoding them
+                events.put(b'{"stage":"done","result":' + result + b"}\n")
+            elif "error" in result:
+                events.put(dumps({"stage": "error", "error": result["error"], "dish_name": dish_name}) + b"\n")
+            else:
+                events.put(dumps({"stage": "done", "result": result}) + b"\n")
+        except AdmissionRejected as e:
+            events.put(dumps({"stage": "error", "error": str(e), "retry_after": e.retry_after,
+                              "dish_name": dish_name}) + b"\n")
+        except Exception as e:
+            logger.error("Error streaming nutrition for %s: %s", dish_name, e)
+            events.put(dumps({"stage": "error", "error": str(e), "dish_name": dish_name}) + b"\n")
+        events.put(None)
+    
+    # Run the pipeline beside the response so stages are sent as they happen
+    threading.Thread(target=contextvars.copy_context().run, args=(run,), daemon=True).start()
+    
+    def generate():
+        while True:
+            line = events.get()
+            if line is None:
+                return
+            yield line
+    
+    response = Response(generate(), mimetype="application/x-ndjson")
+    response.headers["Cache-Control"] = "no-store"
+    # Stop nginx and similar proxies from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
 @app.route("/calculate", methods=["POST"])
 def calculate():
     dish_name = request.form.get("dish_name", "")
@@ -64,10 +333,12 @@ def calculate():
         return jsonify({"error": "No dish name provided"}), 400
     
     try:
-        result = calculate_nutrition_for_dish(dish_name)
-        return jsonify(result)
+        result, _ = get_nutrition_entry_for_dish(dish_name, raw=True)
+        return _dish_response(result)
+    except AdmissionRejected as e:
+        return _rejected_response(e, dish_name=dish_name)
     except Exception as e:
-        logger.error(f"Error calculating nutrition: {str(e)}")
+        logger.error("Error calculating nutrition: %s", e)
         return jsonify({"error": str(e), "dish_name": dish_name}), 500
 
 @app.route("/api/calculate", methods=["POST"])
@@ -77,12 +348,97 @@ def api_calculate():
         return jsonify({"error": "No dish name provided"}), 400
     
     try:
-        result = calculate_nutrition_for_dish(data["dish_name"])
-        return jsonify(result)
+        result, _ = get_nutrition_entry_for_dish(data["dish_name"], raw=True)
+        return _dish_response(result)
+    except AdmissionRejected as e:
+        return _rejected_response(e, dish_name=data["dish_name"])
     except Exception as e:
-        logger.error(f"Error calculating nutrition via API: {str(e)}")
+        logger.error("Error calculating nutrition via API: %s", e)
         return jsonify({"error": str(e), "dish_name": data["dish_name"]}), 500
 
+@app.route("/api/calculate/edit", methods=["POST"])
+def api_calculate_edit():
+    data = request.get_json()
+    if not data or "dish_name" not in data:
+        return jsonify({"error": "No dish name provided"}), 400
+    
+    overrides = data.get("overrides", [])
+    if not _is_ingredient_list(overrides):
+        return jsonify({"error": "overrides must be a list of {name, quantity} objects with string values"}), 400
+    
+    try:
+        result = calculate_nutrition_with_overrides(data["dish_name"], overrides)
+        result["overrides_applied"] = overrides
+        return _dish_response(result)
+    except AdmissionRejected as e:
+        return _rejected_response(e, dish_name=data["dish_name"])
+    except Exception as e:
+        logger.error("Error recalculating edited dish: %s", e)
+        return jsonify({"error": str(e), "dish_name": data["dish_name"]}), 500
+
+@app.route("/api/calculate/recipe", methods=["POST"])
+def api_calculate_recipe():
+    data = request.get_json()
+    ingredients = data.get("ingredients") if data else None
+    if not isinstance(ingredients, list) or not ingredients:
+        return jsonify({"error": "No ingredients provided"}), 400
+    if not _is_ingredient_list(ingredients):
+        # A number such as 200 would silently fall back to a default weight
+        return jsonify({"error": "ingredients must be a list of {name, quantity} objects with string values, "
+                                 "e.g. \"200 grams\""}), 400
+    
+    dish_type = data.get("dish_type")
+    if dish_type is not None and dish_type not in SERVING_SIZES:
+        return jsonify({"error": f"Unknown dish_type. Expected one of: {', '.join(SERVING_SIZES)}"}), 400
+    
+    servings = data.get("servings")
+    if servings is not None and (isinstance(servings, bool) or not isinstance(servings, (int, float)) or servings <= 0):
+        return jsonify({"error": "servings must be a positive number"}), 400
+    
+    dish_name = data.get("dish_name") or "Custom recipe"
+    try:
+        result = calculate_nutrition_for_recipe(ingredients, dish_name, dish_type, servings)
+        return _dish_response(result)
+    except AdmissionRejected as e:
+        return _rejected_response(e, dish_name=dish_name)
+    except Exception as e:
+        logger.error("Error calculating recipe nutrition: %s", e)
+        return jsonify({"error": str(e), "dish_name": dish_name}), 500
+
+@app.route("/api/meals", methods=["POST"])
+def api_meal():
+    data = request.get_json()
+    if not data or ("components" not in data and "meals" not in data):
+        return jsonify({"error": "Provide components for a meal or meals for a daily plan"}), 400
+    
+    try:
+        if "meals" in data:
+            return _json_response(calculate_day_plan(data["meals"], g.nutrients))
+        return _json_response(calculate_meal(data["components"], g.nutrients))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except AdmissionRejected as e:
+        return _rejected_response(e)
+    except Exception as e:
+        logger.error("Error calculating meal: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/meals/bulk", methods=["POST"])
+def api_meals_bulk():
+    data = request.get_json()
+    if not data or "plans" not in data:
+        return jsonify({"error": "No plans provided"}), 400
+    
+    try:
+        return _json_response(evaluate_plans_bulk(data["plans"], g.nutrients))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except AdmissionRejected as e:
+        return _rejected_response(e)
+    except Exception as e:
+        logger.error("Error evaluating plans: %s", e)
+        return jsonify({"error": str(e)}), 500
+
 # Add compatibility endpoint for the /api/analyze-dish route that was causing 404 errors
 @app.route("/api/analyze-dish", methods=["POST", "OPTIONS"])
 def analyze_dish():
@@ -96,19 +452,21 @@ def analyze_dish():
         return jsonify({"error": "No dish name provided"}), 400
     
     try:
-        result = calculate_nutrition_for_dish(data["dish_name"])
-        return jsonify(result)
+        result, _ = get_nutrition_entry_for_dish(data["dish_name"], raw=True)
+        return _dish_response(result)
+    except AdmissionRejected as e:
+        return _rejected_response(e, dish_name=data["dish_name"])
     except Exception as e:
-        logger.error(f"Error analyzing dish: {str(e)}")
+        logger.error("Error analyzing dish: %s", e)
         return jsonify({"error": str(e), "dish_name": data["dish_name"]}), 500
 
 @app.errorhandler(404)
 def not_found(e):
-    return jsonify({"error": "Endpoint not found. Available endpoints: /api/calculate, /api/analyze-dish"}), 404
+    return jsonify({"error": "Endpoint not found. Available endpoints: /api/calculate, /api/calculate/edit, /api/calculate/recipe, /api/meals, /api/meals/bulk, /api/analyze-dish, /api/dishes/suggest, /api/dishes/<name>/nutrition, /api/dishes/<name>/nutrition/stream"}), 404
 
 @app.errorhandler(500)
 def server_error(e):
     return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    app.run(host=app_config.BACKEND_HOST, port=app_config.BACKEND_PORT, debug=app_config.DEBUG)
@@ -0,0 +1,99 @@
+"""
+Compare the n-gram TF-IDF ingredient index against the fuzz.ratio scan used
+by find_ingredient_in_db, for accuracy and per-lookup latency.
+
+Runs without MongoDB on a synthetic food table: every ingredient name known
+to the code base is expanded into USDA-style entries ("Tomatoes, raw",
+"Tomatoes, canned, ..."), and queries are recipe-style spellings of those
+ingredients ("chopped tomatoes", typos, plurals) with a known right answer.
+Usage (from the repository root):
+
+    python benchmarks/bench_ingredient_matching.py [--queries 500]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from fuzzywuzzy import fuzz
+from database import INDIAN_INGREDIENT_VARIATIONS
+from ingredient_processor import MANUAL_NUTRITION_DATA, INGREDIENT_CORRECTIONS
+from ingredient_index import IngredientIndex
+
+DESCRIPTORS = ["raw", "cooked, boiled", "canned, drained", "dried", "frozen", "fresh",
+               "cooked, without salt", "whole", "ground", "prepared"]
+QUALIFIERS = ["chopped", "finely chopped", "sliced", "fresh", "large", "small", "diced", "whole"]
+
+def build_food_table(rng):
+    bases = set(MANUAL_NUTRITION_DATA) | set(INGREDIENT_CORRECTIONS) | set(INDIAN_INGREDIENT_VARIATIONS)
+    for names in INDIAN_INGREDIENT_VARIATIONS.values():
+        bases.update(names)
+    bases = sorted(bases)
+    foods = []
+    for base in bases:
+        for descriptor in rng.sample(DESCRIPTORS, 4):
+            foods.append(f"{base.capitalize()}, {descriptor}")
+    return bases, foods
+
+def make_query(base, rng):
+    style = rng.randrange(4)
+    if style == 0:
+        return f"{rng.choice(QUALIFIERS)} {base}"
+    if style == 1 and len(base) > 4:
+        i = rng.randrange(1, len(base) - 1)
+        return base[:i] + base[i + 1:]  # dropped letter
+    if style == 2:
+        return base[:-1] if base.endswith("s") else base + "s"
+    return base
+
+def is_correct(base, match):
+    return match is not None and match.split(",")[0].lower() == base
+
+def fuzz_ratio_lookup(query, foods, threshold=80):
+    """The full-scan tier of find_ingredient_in_db"""
+    best, best_score = None, 0
+    for food in foods:
+        score = fuzz.ratio(query, food.lower())
+        if score > best_score and score > threshold:
+            best, best_score = food, score
+    return best
+
+def run(label, lookup, queries):
+    correct = found = 0
+    started = time.perf_counter()
+    for query, base in queries:
+        match = lookup(query)
+        found += match is not None
+        correct += is_correct(base, match)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<12} accuracy {100 * correct / len(queries):5.1f}%   matched {100 * found / len(queries):5.1f}%"
+          f"   {1e6 * elapsed / len(queries):9.1f} us/lookup")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--queries", type=int, default=500, help="number of lookups")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    bases, foods = build_food_table(rng)
+    queries = [(make_query(base, rng), base) for base in (rng.choice(bases) for _ in range(args.queries))]
+
+    started = time.perf_counter()
+    index = IngredientIndex.build(foods)
+    print(f"{len(foods)} food names, index built in {1000 * (time.perf_counter() - started):.0f} ms\n")
+
+    def index_lookup(query):
+        candidates = index.search(query, k=1)
+        return candidates[0][0] if candidates and candidates[0][1] >= 0.45 else None
+
+    run("fuzz.ratio", lambda query: fuzz_ratio_lookup(query, foods), queries)
+    run("ngram index", index_lookup, queries)
+
+if __name__ == "__main__":
+    main()
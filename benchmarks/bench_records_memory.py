@@ -0,0 +1,72 @@
+"""
+Compare memory retained by a batch run with slotted records versus the
+equivalent plain dicts (the shapes the pipeline passed around before).
+
+Runs standardize_ingredients and map_ingredients_to_nutrition over the
+cached recipes without MongoDB (unmatched ingredients fall back to category
+estimates). Usage (from the repository root):
+
+    python benchmarks/bench_records_memory.py [--copies 500]
+"""
+import os
+import sys
+import glob
+import argparse
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import logging
+# No database in this benchmark, so silence the per-ingredient lookup errors
+logging.disable(logging.CRITICAL)
+
+from serializer import load_file
+from ingredient_processor import standardize_ingredients, map_ingredients_to_nutrition
+
+def as_records(recipes):
+    batch = []
+    for recipe in recipes:
+        standardized = standardize_ingredients(recipe["ingredients"])
+        total, matches = map_ingredients_to_nutrition(standardized, None)
+        batch.append((standardized, total, matches))
+    return batch
+
+def as_dicts(recipes):
+    batch = []
+    for recipe in recipes:
+        standardized = standardize_ingredients(recipe["ingredients"])
+        total, matches = map_ingredients_to_nutrition(standardized, None)
+        batch.append((
+            [ing.to_dict() for ing in standardized],
+            total.to_dict(),
+            [dict(match.to_dict(), nutrition=match.nutrition.to_dict() if match.nutrition else None)
+             for match in matches]
+        ))
+    return batch
+
+def measure(label, build, recipes):
+    tracemalloc.start()
+    batch = build(recipes)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<10} retained {current / 1024:>10,.0f} KiB   peak {peak / 1024:>10,.0f} KiB")
+    del batch
+    return current
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--copies", type=int, default=500, help="times each cached recipe is repeated")
+    args = parser.parse_args()
+
+    recipes = [load_file(path) for path in sorted(glob.glob(os.path.join("cache", "*.json")))]
+    recipes = recipes * args.copies
+    print(f"Batch of {len(recipes)} recipes\n")
+
+    records = measure("records", as_records, recipes)
+    dicts = measure("dicts", as_dicts, recipes)
+    print(f"\nRecords retain {100 * (1 - records / dicts):.0f}% less memory than dicts")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare JSON throughput for cache I/O and API responses.
+
+Runs over the recipes in cache/ and the pre-defined dish results, which need
+neither MongoDB nor OpenAI. Usage (from the repository root):
+
+    python benchmarks/bench_serialization.py [--iterations 2000]
+"""
+import os
+import sys
+import json
+import time
+import glob
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+# Pre-defined dishes with cached recipes never reach OpenAI, but the client
+# module refuses to import without a key
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-unused")
+os.environ.setdefault("RESULT_CACHE_DIR", tempfile.mkdtemp(prefix="bench_results_"))
+
+import serializer
+from app import app
+from nutrition_calculator import DISH_NUTRITION_PROFILES, get_nutrition_entry_for_dish
+
+def timed(label, func, items, iterations):
+    """Run func over items for the given iterations and print ops/s"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for item in items:
+            func(item)
+    elapsed = time.perf_counter() - start
+    ops = iterations * len(items)
+    print(f"  {label:<38} {ops / elapsed:>12,.0f} ops/s")
+    return ops / elapsed
+
+def stdlib_load(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    n = args.iterations
+
+    recipe_files = sorted(glob.glob(os.path.join("cache", "*.json")))
+    cached_dishes = [name for name in DISH_NUTRITION_PROFILES
+                     if os.path.exists(os.path.join("cache", name.replace(" ", "_") + ".json"))]
+    print(f"Serializer backend: {serializer.get_backend_name()}")
+    print(f"{len(recipe_files)} cached recipes, {len(cached_dishes)} cached pre-defined dishes\n")
+
+    print("Recipe cache reads")
+    timed("stdlib json.load", stdlib_load, recipe_files, n // 10)
+    timed("serializer.load_file", serializer.load_file, recipe_files, n // 10)
+
+    # Warm the result cache once
+    results = [get_nutrition_entry_for_dish(name)[0] for name in cached_dishes]
+
+    print("\nResult encoding")
+    timed("stdlib json.dumps", lambda r: json.dumps(r).encode("utf-8"), results, n)
+    timed("serializer.dumps", serializer.dumps, results, n)
+
+    print("\nCache hit to response body")
+    with app.test_request_context():
+        def decoded(name):
+            result, _ = get_nutrition_entry_for_dish(name)
+            return app.json.response(result).get_data()
+
+        def pre_serialized(name):
+            result, _ = get_nutrition_entry_for_dish(name, raw=True)
+            return app.response_class(result, mimetype="application/json").get_data()
+
+        timed("decode + jsonify", decoded, cached_dishes, n // 10)
+        timed("pre-serialized bytes", pre_serialized, cached_dishes, n // 10)
+
+if __name__ == "__main__":
+    main()
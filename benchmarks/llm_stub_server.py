@@ -0,0 +1,202 @@
+"""
+OpenAI-compatible stub server for offline load tests.
+
+Answers POST /v1/chat/completions the way the recipe and classification
+prompts expect, with a configurable latency distribution and error rates,
+so the whole backend can be load-tested without API calls or cost:
+
+- requests recorded in the LLM response cache are replayed verbatim;
+- recipe prompts return the matching cache/<dish>.json recipe, or a
+  recorded recipe picked by a hash of the dish name;
+- classification prompts return the known or rule-based category, or one
+  picked by hash.
+
+Usage (from the repository root):
+
+    python benchmarks/llm_stub_server.py --port 8099 --latency lognormal:800,0.5 --error-rate 0.01
+    OPENAI_BASE_URL=http://127.0.0.1:8099/v1 LLM_CACHE_ENABLED=false python run.py
+
+Latency distributions, in milliseconds: fixed:MS, uniform:LOW,HIGH or
+lognormal:MEDIAN,SIGMA. --recipe-latency and --classify-latency override
+--latency per prompt kind.
+"""
+import os
+import re
+import sys
+import glob
+import math
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+# The classifier module refuses to import without a key; the stub never uses it
+os.environ.setdefault("OPENAI_API_KEY", "stub-unused")
+
+from flask import Flask, request, jsonify
+from serializer import dumps, load_file
+from llm_cache import request_key, get_response
+from dish_classifier import DISH_CATEGORIES, classify_dish_type_by_rules
+
+_RECIPE_DISH = re.compile(r"recipe for (.+?), a traditional Indian dish")
+_CLASSIFY_DISH = re.compile(r'Classify the Indian dish "(.+?)"')
+
+def parse_distribution(spec):
+    """
+    Parse a latency distribution spec into a sampler
+
+    Args:
+        spec (str): fixed:MS, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA (milliseconds)
+
+    Returns:
+        callable: Returns one latency in seconds per call
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value]
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda: random.uniform(*values) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1]) / 1000
+    raise argparse.ArgumentTypeError(f"Bad latency distribution: {spec}")
+
+def _pick(name, choices):
+    """Deterministic choice, so a dish always gets the same stub answer"""
+    digest = hashlib.sha256(name.lower().encode("utf-8")).digest()
+    return choices[int.from_bytes(digest[:4], "big") % len(choices)]
+
+class StubResponder:
+    """Builds completion content for recipe and classification prompts"""
+
+    def __init__(self):
+        self.recipes = {}
+        for path in sorted(glob.glob(os.path.join("cache", "*.json"))):
+            recipe = load_file(path)
+            if recipe.get("ingredients"):
+                self.recipes[os.path.basename(path)[:-5]] = recipe
+        if not self.recipes:
+            raise SystemExit("No recorded recipes in cache/*.json to replay")
+        self.recipe_names = sorted(self.recipes)
+
+    def kind(self, messages):
+        system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+        return "classify" if "classifies" in system else "recipe"
+
+    def content(self, model, messages, temperature):
+        # Replay a recorded response for exactly this request if there is one
+        recorded = get_response(request_key(model, messages, temperature))
+        if recorded is not None:
+            return recorded
+
+        prompt = next((m["content"] for m in messages if m.get("role") == "user"), "")
+        if self.kind(messages) == "classify":
+            match = _CLASSIFY_DISH.search(prompt)
+            dish_name = match.group(1) if match else prompt
+            return classify_dish_type_by_rules(dish_name) or _pick(dish_name, DISH_CATEGORIES)
+
+        match = _RECIPE_DISH.search(prompt)
+        dish_name = match.group(1).strip() if match else "dish"
+        key = dish_name.lower().replace(" ", "_")
+        recipe = self.recipes.get(key) or self.recipes[_pick(dish_name, self.recipe_names)]
+        return dumps({"dish_name": dish_name, "ingredients": recipe["ingredients"]}).decode("utf-8")
+
+def create_app(latency=None, error_rate=0.0, rate_limit_rate=0.0):
+    """
+    Build the stub server app
+
+    Args:
+        latency (dict): Prompt kind ("recipe", "classify") -> sampler from parse_distribution
+        error_rate (float): Fraction of requests answered with 500
+        rate_limit_rate (float): Fraction of requests answered with 429
+
+    Returns:
+        Flask: The app
+    """
+    app = Flask(__name__)
+    responder = StubResponder()
+    latency = latency or {}
+    counts = {"requests": 0, "errors": 0, "rate_limited": 0}
+    counts_lock = threading.Lock()
+
+    def count(name):
+        with counts_lock:
+            counts[name] += 1
+
+    def error(status, message, kind):
+        response = jsonify({"error": {"message": message, "type": kind, "code": None}})
+        if status == 429:
+            response.headers["Retry-After"] = "1"
+        return response, status
+
+    @app.route("/v1/chat/completions", methods=["POST"])
+    def chat_completions():
+        body = request.get_json(force=True)
+        model, messages = body.get("model", "stub"), body.get("messages", [])
+        count("requests")
+        sampler = latency.get(responder.kind(messages))
+        if sampler:
+            time.sleep(sampler())
+
+        roll = random.random()
+        if roll < error_rate:
+            count("errors")
+            return error(500, "Stub server error", "server_error")
+        if roll < error_rate + rate_limit_rate:
+            count("rate_limited")
+            return error(429, "Stub rate limit", "rate_limit_error")
+
+        content = responder.content(model, messages, body.get("temperature"))
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        return jsonify({
+            "id": f"chatcmpl-stub-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                      "total_tokens": prompt_tokens + len(content) // 4}
+        })
+
+    @app.route("/v1/models")
+    def models():
+        return jsonify({"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model"},
+                                                   {"id": "gpt-4.1", "object": "model"}]})
+
+    @app.route("/stats")
+    def stats():
+        with counts_lock:
+            return jsonify(dict(counts))
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=parse_distribution, default=parse_distribution("fixed:0"),
+                        help="latency of every completion, e.g. lognormal:800,0.5")
+    parser.add_argument("--recipe-latency", type=parse_distribution, help="latency of recipe prompts")
+    parser.add_argument("--classify-latency", type=parse_distribution, help="latency of classification prompts")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument("--seed", type=int, help="seed latency and error sampling")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    latency = {"recipe": args.recipe_latency or args.latency, "classify": args.classify_latency or args.latency}
+    app = create_app(latency, args.error_rate, args.rate_limit_rate)
+    print(f"Stub OpenAI server on http://{args.host}:{args.port}/v1 "
+          f"({len(app.view_functions) - 1} routes, {args.error_rate:.1%} errors, {args.rate_limit_rate:.1%} rate limited)")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+End-to-end HTTP load test of the backend.
+
+Starts the OpenAI stub server and one backend per configuration, drives each
+with an asyncio HTTP client and prints requests per second, p50/p95/p99
+latency, error rate and per-worker CPU side by side. Usage (from the
+repository root):
+
+    python benchmarks/load_test.py --duration 20 --concurrency 32 \\
+        --config dev=dev --config gunicorn=gunicorn,GUNICORN_WORKERS=4
+
+A configuration is NAME=SERVER[,ENV=VALUE...], where SERVER is dev (Flask
+dev server) or gunicorn and the variables override config.py for that
+backend, e.g. sync=gunicorn,GUNICORN_WORKER_CLASS=sync,GUNICORN_THREADS=1
+against gthread=gunicorn,GUNICORN_WORKER_CLASS=gthread.
+
+Scenarios (--scenarios):
+    cached    POST /api/calculate for warm pre-defined dishes
+    uncached  POST /api/calculate for a new dish every request (stub LLM and
+              ingredient matching; set MONGO_URI to a local nutrition store)
+    mixed     90% cached, 10% uncached
+    bulk      POST /api/meals/bulk with --bulk-plans plans of warm dishes
+
+Backends get a fresh result cache, the LLM response cache off and admission
+control off, so every configuration starts from the same state.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import random
+import socket
+import shutil
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+# Only the dish tables are used here, but the client module refuses to import without a key
+os.environ.setdefault("OPENAI_API_KEY", "load-test-unused")
+
+import numpy as np
+from run import stop_process
+from nutrition_calculator import DISH_NUTRITION_PROFILES
+
+SCENARIOS = {
+    "cached": {"cached": 1.0},
+    "uncached": {"uncached": 1.0},
+    "mixed": {"cached": 0.9, "uncached": 0.1},
+    "bulk": {"bulk": 1.0},
+}
+
+# Applied to every backend before the configuration's own variables
+BACKEND_DEFAULTS = {
+    "LLM_CACHE_ENABLED": "false",
+    "ADMISSION_ENABLED": "false",
+    "REMOTE_CACHE_URL": "",
+    "LOG_LEVEL": "WARNING",
+    # Keep worker pids stable so CPU time is measured per worker
+    "GUNICORN_MAX_REQUESTS": "0",
+}
+
+def parse_config(spec):
+    """
+    Parse NAME=SERVER[,ENV=VALUE...]
+
+    Returns:
+        dict: name, server and env overrides
+    """
+    name, _, rest = spec.partition("=")
+    server, *pairs = rest.split(",")
+    if not name or server not in ("dev", "gunicorn") or not all("=" in pair for pair in pairs):
+        raise argparse.ArgumentTypeError(f"Bad configuration: {spec} (expected NAME=dev|gunicorn[,ENV=VALUE...])")
+    return {"name": name, "server": server, "env": dict(pair.split("=", 1) for pair in pairs)}
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_ready(url, process, timeout):
+    """Poll url until it answers 200; False if the process exits or time runs out"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+def cpu_seconds(pid):
+    """User plus system CPU seconds of a process, from /proc (None elsewhere)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+def worker_pids(pid):
+    """gunicorn worker pids (children of the master), or the process itself for the dev server"""
+    children = []
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    if int(f.read().rsplit(")", 1)[1].split()[1]) == pid:
+                        children.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    return children or [pid]
+
+class Backend:
+    """A backend process started for one configuration"""
+
+    def __init__(self, config, stub_url, ready_timeout):
+        self.config = config
+        self.port = free_port()
+        self.workdir = tempfile.mkdtemp(prefix=f"load_{config['name']}_")
+        env = {**os.environ, **BACKEND_DEFAULTS,
+               "BACKEND_HOST": "127.0.0.1",
+               "BACKEND_PORT": str(self.port),
+               "OPENAI_BASE_URL": stub_url,
+               "RESULT_CACHE_DIR": os.path.join(self.workdir, "results"),
+               "SHARED_CACHE_PATH": os.path.join(self.workdir, "shared_cache.mmap"),
+               **config["env"]}
+        if config["server"] == "gunicorn":
+            command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+        else:
+            command = [sys.executable, "app.py"]
+        self.log = open(os.path.join(self.workdir, "server.log"), "w")
+        self.process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=self.log, stderr=subprocess.STDOUT)
+        if not wait_ready(f"http://127.0.0.1:{self.port}/api/health", self.process, ready_timeout):
+            self.stop()
+            raise SystemExit(f"Backend {config['name']} did not start, see {self.log.name}")
+
+    def cpu_snapshot(self):
+        return {pid: cpu_seconds(pid) for pid in worker_pids(self.process.pid)}
+
+    def stop(self):
+        stop_process(self.process, 10)
+        self.log.close()
+
+class HTTPConnection:
+    """Minimal keep-alive HTTP/1.1 client over asyncio streams"""
+
+    def __init__(self, port):
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        """
+        Send a request and read the whole response
+
+        Returns:
+            int: Status code
+        """
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.writer.write((f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1:{self.port}\r\n"
+                           f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n").encode("latin-1")
+                          + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        version, status = status_line.split()[:2]
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        keep_alive = version == b"HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif "content-length" in headers:
+            await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            # Body runs to the end of the connection
+            await self.reader.read()
+            keep_alive = False
+
+        if not keep_alive:
+            self.close()
+        return int(status)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+class RequestFactory:
+    """Builds the requests of each kind"""
+
+    def __init__(self, warm_dishes, bulk_plans, seed, run_id):
+        self.warm_dishes = warm_dishes
+        self.bulk_plans = bulk_plans
+        self.rng = random.Random(seed)
+        self.run_id = run_id
+        self.counter = 0
+
+    def build(self, kind):
+        """Returns (method, path, body)"""
+        if kind == "cached":
+            return "POST", "/api/calculate", {"dish_name": self.rng.choice(self.warm_dishes)}
+        if kind == "uncached":
+            # A name never seen before, so the whole cold path runs
+            self.counter += 1
+            dish_name = f"{self.rng.choice(self.warm_dishes)} loadtest {self.run_id} {self.counter}"
+            return "POST", "/api/calculate", {"dish_name": dish_name}
+        plans = [[{"dish_name": dish, "portions": self.rng.choice((0.5, 1, 1.5, 2))}
+                  for dish in self.rng.sample(self.warm_dishes, 3)] for _ in range(self.bulk_plans)]
+        return "POST", "/api/meals/bulk", {"plans": plans}
+
+async def run_scenario(port, factory, mix, concurrency, duration):
+    """
+    Drive the backend with concurrency clients for duration seconds
+
+    Returns:
+        dict: Per-request latencies (seconds) and status counts, and the elapsed time
+    """
+    kinds, weights = zip(*mix.items())
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        connection = HTTPConnection(port)
+        try:
+            while time.perf_counter() < deadline:
+                method, path, body = factory.build(factory.rng.choices(kinds, weights)[0])
+                started = time.perf_counter()
+                try:
+                    status = await connection.request(method, path, body)
+                except (OSError, ValueError, asyncio.IncompleteReadError):
+                    connection.close()
+                    status = "connection error"
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return {"latencies": latencies, "statuses": statuses, "elapsed": time.perf_counter() - started}
+
+def summarize(run, cpu_before, cpu_after):
+    """Reduce a scenario run to the reported metrics"""
+    latencies = np.array(run["latencies"]) * 1000
+    requests = len(latencies)
+    errors = sum(count for status, count in run["statuses"].items() if not isinstance(status, int) or status >= 400)
+    # Share of one core each worker used during the run
+    cpu = [100 * (after - (cpu_before.get(pid) or 0)) / run["elapsed"]
+           for pid, after in cpu_after.items() if after is not None]
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if requests else (float("nan"),) * 3
+    return {
+        "requests": requests,
+        "rps": requests / run["elapsed"],
+        "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+        "error_rate": errors / requests if requests else 0.0,
+        "statuses": {str(status): count for status, count in run["statuses"].items()},
+        "workers": len(cpu),
+        "cpu_mean_pct": float(np.mean(cpu)) if cpu else float("nan"),
+        "cpu_max_pct": max(cpu) if cpu else float("nan"),
+    }
+
+def print_report(results, scenarios):
+    names = list(results)
+    for scenario in scenarios:
+        print(f"\n{scenario}")
+        print(f"  {'config':<14}{'requests':>9}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+              f"{'errors':>8}{'workers':>8}{'cpu/worker':>12}")
+        base = results[names[0]][scenario]
+        for name in names:
+            row = results[name][scenario]
+            line = (f"  {name:<14}{row['requests']:>9}{row['rps']:>9.1f}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}"
+                    f"{row['p99_ms']:>9.1f}{row['error_rate']:>8.1%}{row['workers']:>8}"
+                    f"{row['cpu_mean_pct']:>6.0f}/{row['cpu_max_pct']:<5.0f}")
+            if name != names[0] and base["rps"]:
+                line += f"  {row['rps'] / base['rps']:.2f}x rps, {row['p99_ms'] / base['p99_ms']:.2f}x p99 vs {names[0]}"
+            print(line)
+        for name in names:
+            failed = {status: count for status, count in results[name][scenario]["statuses"].items()
+                      if not status.isdigit() or int(status) >= 400}
+            if failed:
+                print(f"  {name} errors: {failed}")
+    print("\ncpu/worker: mean/max % of one core per backend worker process")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--config", type=parse_config, action="append", dest="configs",
+                        help="NAME=dev|gunicorn[,ENV=VALUE...]; repeat to compare (default: dev=dev)")
+    parser.add_argument("--scenarios", default="cached,mixed,bulk",
+                        help=f"comma-separated, from {', '.join(SCENARIOS)}")
+    parser.add_argument("--duration", type=float, default=15, help="seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--bulk-plans", type=int, default=200, help="plans per bulk request")
+    parser.add_argument("--llm-latency", default="lognormal:600,0.5",
+                        help="stub LLM latency distribution (see llm_stub_server.py)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--ready-timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    configs = args.configs or [parse_config("dev=dev")]
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    if len({config["name"] for config in configs}) != len(configs):
+        parser.error("Configuration names must be unique")
+
+    warm_dishes = sorted(name for name in DISH_NUTRITION_PROFILES
+                         if os.path.exists(os.path.join("cache", name.replace(" ", "_") + ".json")))
+    if not warm_dishes:
+        raise SystemExit("No pre-defined dishes with cached recipes to use as warm dishes")
+
+    stub_port = free_port()
+    stub = subprocess.Popen([sys.executable, os.path.join("benchmarks", "llm_stub_server.py"),
+                             "--port", str(stub_port), "--latency", args.llm_latency,
+                             "--error-rate", str(args.llm_error_rate), "--seed", str(args.seed)],
+                            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    run_id = str(int(time.time()))
+    results = {}
+    try:
+        if not wait_ready(f"http://127.0.0.1:{stub_port}/stats", stub, args.ready_timeout):
+            raise SystemExit("Stub LLM server did not start")
+        stub_url = f"http://127.0.0.1:{stub_port}/v1"
+        print(f"{len(warm_dishes)} warm dishes, {args.concurrency} clients, {args.duration:.0f}s per scenario, "
+              f"stub LLM latency {args.llm_latency}")
+
+        for config in configs:
+            print(f"Running {config['name']} ({config['server']}"
+                  + "".join(f", {key}={value}" for key, value in config["env"].items()) + ")...")
+            backend = Backend(config, stub_url, args.ready_timeout)
+            try:
+                factory = RequestFactory(warm_dishes, args.bulk_plans, args.seed, run_id)
+                # Warm every worker's view of the cached dishes before measuring
+                asyncio.run(run_scenario(backend.port, factory, {"cached": 1.0}, args.concurrency, 2))
+                results[config["name"]] = {}
+                for scenario in scenarios:
+                    before = backend.cpu_snapshot()
+                    run = asyncio.run(run_scenario(backend.port, factory, SCENARIOS[scenario],
+                                                   args.concurrency, args.duration))
+                    results[config["name"]][scenario] = summarize(run, before, backend.cpu_snapshot())
+            finally:
+                backend.stop()
+                shutil.rmtree(backend.workdir, ignore_errors=True)
+    finally:
+        stop_process(stub, 5)
+        # Recipes fetched for the uncached dishes land in the shared recipe cache
+        for path in glob.glob(os.path.join("cache", f"*_loadtest_{run_id}_*.json")):
+            os.remove(path)
+
+    print_report(results, scenarios)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": {key: value for key, value in vars(args).items() if key != "configs"},
+                       "configs": configs, "results": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -14,8 +14,169 @@ class Config:
     TESTING = False
     MONGO_URI = os.getenv("MONGO_URI")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
     APP_VERSION = APP_VERSION
-    
+
+    # Full-result cache (recipe + classification + nutrition per dish)
+    RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join("cache", "results"))
+    RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", 7 * 24 * 3600))
+    # Nutrients tracked on top of the built-in registry in nutrition_records,
+    # as comma-separated key=db_field[:unit] entries, e.g. "zinc=zinc_mg:mg"
+    EXTRA_NUTRIENTS = os.getenv("EXTRA_NUTRIENTS", "")
+    # Bump when recipes, nutrition tables or calculation rules change so cached
+    # results and HTTP ETags are invalidated. Cached breakdowns store vectors
+    # as wide as the nutrient registry, so the default follows EXTRA_NUTRIENTS.
+    DATA_VERSION = os.getenv("DATA_VERSION", f"{APP_VERSION}-4" + (f"+{EXTRA_NUTRIENTS}" if EXTRA_NUTRIENTS else ""))
+
+    # HTTP caching for GET /api/dishes/<name>/nutrition
+    HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", 3600))
+    HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE", 24 * 3600))
+    # Responses smaller than this are not worth compressing
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 500))
+
+    # Background precompute worker
+    PRECOMPUTE_CONCURRENCY = int(os.getenv("PRECOMPUTE_CONCURRENCY", 2))
+    PRECOMPUTE_POLL_INTERVAL = int(os.getenv("PRECOMPUTE_POLL_INTERVAL", 30))
+    PRECOMPUTE_REFRESH_MARGIN = int(os.getenv("PRECOMPUTE_REFRESH_MARGIN", 6 * 3600))
+    PRECOMPUTE_POPULAR_BOOST = 5
+    PRECOMPUTE_TREND_DECAY = 0.5
+    # Requested dish names are counted in memory and appended to the request
+    # log this often; distinct names counted between flushes are capped
+    REQUEST_LOG_FLUSH_INTERVAL = int(os.getenv("REQUEST_LOG_FLUSH_INTERVAL", 10))
+    REQUEST_LOG_MAX_NAMES = int(os.getenv("REQUEST_LOG_MAX_NAMES", 1000))
+
+    # Logging (see logging_config.py)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+    # Comma-separated per-module overrides, e.g. "database=WARNING,ingredient_processor=DEBUG"
+    LOG_MODULE_LEVELS = os.getenv("LOG_MODULE_LEVELS", "")
+    # Fraction of sampled per-ingredient debug lines that are kept
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 0.1))
+
+    # Backend server
+    BACKEND_HOST = os.getenv("BACKEND_HOST", "127.0.0.1")
+    BACKEND_PORT = int(os.getenv("BACKEND_PORT", 5000))
+    READINESS_TIMEOUT = int(os.getenv("READINESS_TIMEOUT", 60))
+
+    # Gunicorn production server (see gunicorn.conf.py)
+    GUNICORN_WORKERS = int(os.getenv("GUNICORN_WORKERS", (os.cpu_count() or 1) * 2 + 1))
+    GUNICORN_WORKER_CLASS = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+    GUNICORN_THREADS = int(os.getenv("GUNICORN_THREADS", 4))
+    GUNICORN_PRELOAD = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+    GUNICORN_KEEPALIVE = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+    # Cold requests wait on OpenAI, so allow well over the default 30s
+    GUNICORN_TIMEOUT = int(os.getenv("GUNICORN_TIMEOUT", 120))
+    GUNICORN_GRACEFUL_TIMEOUT = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+    GUNICORN_MAX_REQUESTS = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+
+    # Cross-process shared memory cache (memory-mapped file, one per host)
+    SHARED_CACHE_ENABLED = os.getenv("SHARED_CACHE_ENABLED", "true").lower() == "true"
+    SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", os.path.join("cache", "shared_cache.mmap"))
+    SHARED_CACHE_SLOTS = int(os.getenv("SHARED_CACHE_SLOTS", 4096))
+    SHARED_CACHE_SLOT_SIZE = int(os.getenv("SHARED_CACHE_SLOT_SIZE", 8192))
+    SHARED_CACHE_WAYS = int(os.getenv("SHARED_CACHE_WAYS", 4))
+
+    # Optional Redis-compatible cache shared by all nodes (disabled when unset)
+    REMOTE_CACHE_URL = os.getenv("REMOTE_CACHE_URL", "")
+    REMOTE_CACHE_PREFIX = os.getenv("REMOTE_CACHE_PREFIX", "vyb:")
+    REMOTE_CACHE_TTL = int(os.getenv("REMOTE_CACHE_TTL", 30 * 24 * 3600))
+    REMOTE_CACHE_TIMEOUT = float(os.getenv("REMOTE_CACHE_TIMEOUT", 0.25))
+    # After a failure the remote tier is skipped for this many seconds
+    REMOTE_CACHE_RETRY_AFTER = int(os.getenv("REMOTE_CACHE_RETRY_AFTER", 30))
+    REMOTE_CACHE_COMPRESS_MIN_SIZE = int(os.getenv("REMOTE_CACHE_COMPRESS_MIN_SIZE", 512))
+
+    # Content-addressed cache of OpenAI responses (see llm_cache.py)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join("cache", "llm_cache.sqlite"))
+    LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 30 * 24 * 3600))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 50000))
+    LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    # Hit counts and last-use times are written in one batch this often,
+    # so cache reads don't take SQLite's write lock
+    LLM_CACHE_TOUCH_INTERVAL = int(os.getenv("LLM_CACHE_TOUCH_INTERVAL", 60))
+
+    # Columnar analytics export of computed results, appended by the precompute worker
+    ANALYTICS_EXPORT_ENABLED = os.getenv("ANALYTICS_EXPORT_ENABLED", "true").lower() == "true"
+    ANALYTICS_EXPORT_DIR = os.getenv("ANALYTICS_EXPORT_DIR", os.path.join("cache", "analytics"))
+
+    # Memory-mapped copy of the nutrition database, built with `python nutrient_table.py build`
+    NUTRIENT_TABLE_PATH = os.getenv("NUTRIENT_TABLE_PATH", os.path.join("cache", "nutrient_table.bin"))
+
+    # Ingredient similarity index, built with `python ingredient_index.py build`
+    MATCH_INDEX_PATH = os.getenv("MATCH_INDEX_PATH", os.path.join("cache", "ingredient_index.npz"))
+    # Minimum cosine similarity for the index tier of find_ingredient_in_db,
+    # and the looser last-resort threshold replacing the fuzzy scan
+    MATCH_INDEX_MIN_SIMILARITY = float(os.getenv("MATCH_INDEX_MIN_SIMILARITY", 0.6))
+    MATCH_INDEX_FUZZY_SIMILARITY = float(os.getenv("MATCH_INDEX_FUZZY_SIMILARITY", 0.45))
+
+    # Match-tier statistics, adaptive tier skipping and learned aliases
+    MATCH_STATS_ENABLED = os.getenv("MATCH_STATS_ENABLED", "true").lower() == "true"
+    MATCH_STATS_PATH = os.getenv("MATCH_STATS_PATH", os.path.join("cache", "match_stats.sqlite"))
+    MATCH_STATS_FLUSH_EVERY = int(os.getenv("MATCH_STATS_FLUSH_EVERY", 200))
+    MATCH_STATS_FLUSH_INTERVAL = int(os.getenv("MATCH_STATS_FLUSH_INTERVAL", 60))
+    # Skip a tier for a name pattern after this many attempts below this hit rate
+    MATCH_SKIP_MIN_SAMPLES = int(os.getenv("MATCH_SKIP_MIN_SAMPLES", 50))
+    MATCH_SKIP_MAX_HIT_RATE = float(os.getenv("MATCH_SKIP_MAX_HIT_RATE", 0.02))
+    MATCH_EXPLORE_RATE = float(os.getenv("MATCH_EXPLORE_RATE", 0.05))
+    MATCH_ALIAS_PROMOTE_AFTER = int(os.getenv("MATCH_ALIAS_PROMOTE_AFTER", 3))
+
+    # Parallel ingredient lookups; the MongoDB client pool gets the same size
+    INGREDIENT_RESOLVE_WORKERS = int(os.getenv("INGREDIENT_RESOLVE_WORKERS", 8))
+    # Seconds per dish before unresolved ingredients fall back to category estimates
+    INGREDIENT_RESOLVE_DEADLINE = float(os.getenv("INGREDIENT_RESOLVE_DEADLINE", 10))
+
+    # Latency budget per uncached dish; stages that would overrun it fall back
+    # to estimates, which are served uncached and refreshed in the background (0 disables)
+    LATENCY_BUDGET_MS = int(os.getenv("LATENCY_BUDGET_MS", 0))
+    # Part of the budget the OpenAI calls leave for ingredient matching
+    LATENCY_BUDGET_MATCH_RESERVE_MS = int(os.getenv("LATENCY_BUDGET_MATCH_RESERVE_MS", 200))
+    # Threads running budgeted OpenAI and MongoDB calls; calls that outlive a
+    # budget keep theirs, and when all are busy further calls fall back at once
+    LATENCY_CALL_WORKERS = int(os.getenv("LATENCY_CALL_WORKERS", 16))
+    LATENCY_REFRESH_WORKERS = int(os.getenv("LATENCY_REFRESH_WORKERS", 2))
+    LATENCY_REFRESH_MAX_PENDING = int(os.getenv("LATENCY_REFRESH_MAX_PENDING", 100))
+
+    # Admission control for cold-path computations, per worker process (see admission.py)
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", 4))
+    ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", 16))
+    # Seconds a computation may wait for a slot before it is rejected
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 10))
+    # Cold computations per second per client, and how many may come at once (0 disables)
+    ADMISSION_CLIENT_RATE = float(os.getenv("ADMISSION_CLIENT_RATE", 0.2))
+    ADMISSION_CLIENT_BURST = int(os.getenv("ADMISSION_CLIENT_BURST", 10))
+    # Reverse proxies in front of the app that append to X-Forwarded-For. The
+    # client address is the entry the outermost trusted proxy added; entries
+    # to its left come from the client and are ignored (0: use the peer address)
+    TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", 0))
+
+    # Type-ahead dish suggestions (GET /api/dishes/suggest)
+    DISH_SUGGEST_LIMIT = int(os.getenv("DISH_SUGGEST_LIMIT", 8))
+    # Seconds before the index is rebuilt to pick up newly cached dishes
+    DISH_SUGGEST_REFRESH_INTERVAL = int(os.getenv("DISH_SUGGEST_REFRESH_INTERVAL", 300))
+
+    # Meal and plan aggregation
+    MEAL_RESOLVE_CONCURRENCY = int(os.getenv("MEAL_RESOLVE_CONCURRENCY", 8))
+    MEAL_MAX_PLANS = int(os.getenv("MEAL_MAX_PLANS", 10000))
+    MEAL_MAX_DISHES = int(os.getenv("MEAL_MAX_DISHES", 200))
+
+    # Keep in sync with frontend/src/data/popularDishes.js
+    POPULAR_DISHES = [
+        "Paneer Butter Masala",
+        "Dal Makhani",
+        "Chole Bhature",
+        "Palak Paneer",
+        "Aloo Gobi",
+        "Butter Chicken",
+        "Biryani",
+        "Malai Kofta",
+        "Rajma Chawal",
+        "Sambar",
+        "Masala Dosa",
+        "Idli",
+        "Poha"
+    ]
+
 class DevelopmentConfig(Config):
     """Development environment config"""
     DEBUG = True
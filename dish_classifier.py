@@ -2,9 +2,9 @@ import logging
 from openai import OpenAI
 import os
 from dotenv import load_dotenv
+import remote_cache
+from llm_cache import cached_chat_completion
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
@@ -16,7 +16,9 @@ if not api_key:
     logger.error("OPENAI_API_KEY not found in environment variables")
     raise ValueError("OpenAI API key not found. Make sure OPENAI_API_KEY is set in the .env file.")
 
-client = OpenAI(api_key=api_key)
+# OPENAI_BASE_URL points the client at an OpenAI-compatible server, e.g.
+# benchmarks/llm_stub_server.py for offline load tests
+client = OpenAI(api_key=api_key, base_url=os.getenv("OPENAI_BASE_URL") or None)
 
 # Define dish categories
 DISH_CATEGORIES = [
@@ -61,34 +63,61 @@ KNOWN_DISHES = {
     "appam": "South Indian"
 }
 
-def classify_dish_type(dish_name, recipe=None):
+def classify_dish_type_by_rules(dish_name, recipe=None):
+    """
+    Classify a dish from known dishes, name rules and ingredients only
+    
+    Args:
+        dish_name (str): Name of the dish
+        recipe (dict, optional): Recipe information if available
+    
+    Returns:
+        str: Dish category, or None if no rule matches
+    """
+    # First check if this is a well-known dish with a pre-defined classification
+    dish_name_lower = dish_name.lower()
+    if dish_name_lower in KNOWN_DISHES:
+        logger.debug("Using pre-defined classification for %s: %s", dish_name, KNOWN_DISHES[dish_name_lower])
+        return KNOWN_DISHES[dish_name_lower]
+        
+    # If not in known dishes, try rule-based classification
+    dish_type = rule_based_classification(dish_name)
+    if dish_type:
+        logger.debug("Rule-based classification for %s: %s", dish_name, dish_type)
+        return dish_type
+    
+    # Detect non-vegetarian dishes based on ingredients
+    if recipe and is_non_vegetarian(recipe):
+        logger.debug("Classified %s as Non-Veg Curry based on ingredients", dish_name)
+        return "Non-Veg Curry"
+    return None
+
+def classify_dish_type(dish_name, recipe=None, allow_ai=True):
     """
     Classify a dish into one of the predefined categories
     
     Args:
         dish_name (str): Name of the dish
         recipe (dict, optional): Recipe information if available
+        allow_ai (bool): Fall back to OpenAI when the rules don't match;
+            if False, unmatched dishes default to "Wet Sabzi"
     
     Returns:
         str: Dish category
     """
     try:
-        # First check if this is a well-known dish with a pre-defined classification
-        dish_name_lower = dish_name.lower()
-        if dish_name_lower in KNOWN_DISHES:
-            logger.info(f"Using pre-defined classification for {dish_name}: {KNOWN_DISHES[dish_name_lower]}")
-            return KNOWN_DISHES[dish_name_lower]
-            
-        # If not in known dishes, try rule-based classification
-        dish_type = rule_based_classification(dish_name)
+        dish_type = classify_dish_type_by_rules(dish_name, recipe)
         if dish_type:
-            logger.info(f"Rule-based classification for {dish_name}: {dish_type}")
             return dish_type
         
-        # Detect non-vegetarian dishes based on ingredients
-        if recipe and is_non_vegetarian(recipe):
-            logger.info(f"Classified {dish_name} as Non-Veg Curry based on ingredients")
-            return "Non-Veg Curry"
+        if not allow_ai:
+            return "Wet Sabzi"
+        
+        dish_name_lower = dish_name.lower()
+        # Reuse an AI classification made on another node
+        cached = remote_cache.get_value("class", dish_name_lower)
+        if cached is not None:
+            return cached.decode("utf-8")
             
         # If that fails, use AI to classify
         if recipe:
@@ -96,16 +125,22 @@ def classify_dish_type(dish_name, recipe=None):
                                          for ing in recipe["ingredients"]])
             dish_type = ai_based_classification(dish_name, ingredients_text)
             if dish_type:
-                logger.info(f"AI classification for {dish_name} with ingredients: {dish_type}")
+                logger.info("AI classification for %s with ingredients: %s", dish_name, dish_type)
+                remote_cache.set_value("class", dish_name_lower, dish_type.encode("utf-8"))
                 return dish_type
         
         # Fallback to AI with just the dish name
         dish_type = ai_based_classification(dish_name)
-        logger.info(f"AI classification for {dish_name}: {dish_type}")
+        if dish_type is None:
+            # The API failed; answer with the default but don't share it with
+            # other nodes, so the dish is classified for real once it recovers
+            return "Wet Sabzi"
+        logger.info("AI classification for %s: %s", dish_name, dish_type)
+        remote_cache.set_value("class", dish_name_lower, dish_type.encode("utf-8"))
         return dish_type
         
     except Exception as e:
-        logger.error(f"Error classifying dish: {str(e)}")
+        logger.error("Error classifying dish: %s", e)
         # Default classification if all else fails
         return "Wet Sabzi"
         
@@ -157,7 +192,12 @@ def is_non_vegetarian(recipe):
     return False
 
 def ai_based_classification(dish_name, ingredients_text=None):
-    """Use OpenAI to classify the dish"""
+    """
+    Use OpenAI to classify the dish
+
+    Returns:
+        str: Category from the model's answer, or None if the API call failed
+    """
     try:
         # Prepare prompt
         if ingredients_text:
@@ -178,8 +218,9 @@ def ai_based_classification(dish_name, ingredients_text=None):
             Return only the category name, nothing else.
             """
             
-        # Call OpenAI API
-        response = client.chat.completions.create(
+        # Call OpenAI API (or reuse the answer to an identical earlier request)
+        classification = cached_chat_completion(
+            client,
             model="gpt-4.1",
             messages=[
                 {"role": "system", "content": "You are a helpful assistant that classifies Indian dishes."},
@@ -189,7 +230,7 @@ def ai_based_classification(dish_name, ingredients_text=None):
         )
         
         # Get the classification
-        classification = response.choices[0].message.content.strip()
+        classification = classification.strip()
         
         # Validate classification
         if classification in DISH_CATEGORIES:
@@ -212,5 +253,5 @@ def ai_based_classification(dish_name, ingredients_text=None):
             return "Wet Sabzi"
             
     except Exception as e:
-        logger.error(f"Error in AI classification: {str(e)}")
-        return "Wet Sabzi"  # Default fallback
+        logger.error("Error in AI classification: %s", e)
+        return None
@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+from fuzzywuzzy import fuzz
+from config import app_config
+from dish_classifier import KNOWN_DISHES
+from nutrition_calculator import DISH_NUTRITION_PROFILES
+from result_cache import normalize_dish_name, list_cache_entries
+
+logger = logging.getLogger(__name__)
+
+RECIPE_CACHE_DIR = "cache"
+I18N_DISHES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "src", "i18n", "dishes.json")
+
+# Candidates kept per trie node; a query never needs more than this
+NODE_TOP_K = 16
+
+# Minimum fuzz.ratio between the query and a name's prefix for the fallback
+FUZZY_THRESHOLD = 75
+
+def _load_i18n_names():
+    """
+    Dish names from the frontend translations
+
+    Returns:
+        dict: English display name -> list of names in other languages
+    """
+    try:
+        with open(I18N_DISHES_PATH, encoding="utf-8") as f:
+            translations = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Failed to load dish translations: %s", e)
+        return {}
+
+    english = translations.get("en", {})
+    names = {}
+    for section, dishes in english.items():
+        if section == "dish_types":
+            continue
+        for key, display in dishes.items():
+            names[display] = [other[section][key] for lang, other in translations.items()
+                              if lang != "en" and key in other.get(section, {})]
+    return names
+
+def _recipe_cache_names():
+    """Dishes with a cached recipe, from cache/<name>.json file names"""
+    if not os.path.isdir(RECIPE_CACHE_DIR):
+        return []
+    return [filename[:-5].replace("_", " ") for filename in os.listdir(RECIPE_CACHE_DIR) if filename.endswith(".json")]
+
+class DishSuggestIndex:
+    """
+    Prefix trie over dish names for type-ahead suggestions
+
+    Every word start of every name (and of its translations) is inserted, so
+    "chick" finds "Butter Chicken". Each node keeps its best NODE_TOP_K
+    dishes in rank order, so a lookup is one walk down the trie with no
+    sorting. Dishes with a warm result rank first, then ones with a cached
+    recipe or known classification, then shorter names.
+    """
+
+    def __init__(self, dishes):
+        """
+        Args:
+            dishes (list): Dicts with name, keys (normalized strings to index),
+                dish_type, cached and rank (lower is better)
+        """
+        self.dishes = sorted(dishes, key=lambda dish: dish["rank"])
+        self.root = {}
+        # Word-start suffixes by first letter, for the fuzzy fallback; typos
+        # rarely hit the first letter, so a query scans only one bucket
+        self.suffixes = {}
+        for dish_id, dish in enumerate(self.dishes):
+            for key in dish["keys"]:
+                words = key.split()
+                for i in range(len(words)):
+                    suffix = " ".join(words[i:])
+                    self._insert(suffix, dish_id)
+                    self.suffixes.setdefault(suffix[0], []).append((suffix, dish_id))
+
+    def _insert(self, text, dish_id):
+        node = self.root
+        for char in text:
+            node = node.setdefault(char, {})
+            # Names are inserted best rank first, so the head of each list is the top K
+            top = node.setdefault("", [])
+            if len(top) < NODE_TOP_K and dish_id not in top:
+                top.append(dish_id)
+
+    def _prefix_matches(self, query):
+        node = self.root
+        for char in query:
+            node = node.get(char)
+            if node is None:
+                return []
+        return node.get("", [])
+
+    def _fuzzy_matches(self, query):
+        scores = {}
+        for suffix, dish_id in self.suffixes.get(query[0], []):
+            score = fuzz.ratio(query, suffix[:len(query)])
+            if score >= FUZZY_THRESHOLD and score > scores.get(dish_id, 0):
+                scores[dish_id] = score
+        return sorted(scores, key=lambda dish_id: (-scores[dish_id], dish_id))
+
+    def suggest(self, query, limit=8):
+        """
+        Suggest dish names for a partially typed query
+
+        Args:
+            query (str): What the user has typed so far
+            limit (int): Maximum number of suggestions
+
+        Returns:
+            list: Dicts with name, dish_type, cached and match ("prefix" or "fuzzy")
+        """
+        query = " ".join(normalize_dish_name(query).split())
+        if not query:
+            return []
+
+        found = {dish_id: "prefix" for dish_id in self._prefix_matches(query)[:limit]}
+        # Typos only get the slower scan when the prefix walk comes up short
+        if len(found) < limit and len(query) >= 3:
+            for dish_id in self._fuzzy_matches(query):
+                if len(found) >= limit:
+                    break
+                found.setdefault(dish_id, "fuzzy")
+
+        return [{
+            "name": self.dishes[dish_id]["name"],
+            "dish_type": self.dishes[dish_id]["dish_type"],
+            "cached": self.dishes[dish_id]["cached"],
+            "match": match
+        } for dish_id, match in found.items()]
+
+def build_suggest_index():
+    """
+    Collect dish names from every source and build the index
+
+    Sources are KNOWN_DISHES, DISH_NUTRITION_PROFILES, the popular dishes,
+    cached recipes, warm results and the frontend i18n names.
+
+    Returns:
+        DishSuggestIndex: The built index
+    """
+    warm = {name for name, computed_at in list_cache_entries().items() if computed_at}
+    recipes = set(_recipe_cache_names())
+    i18n_names = _load_i18n_names()
+
+    # Display names: prefer the curated capitalization
+    display = {}
+    for name in list(i18n_names) + app_config.POPULAR_DISHES:
+        display.setdefault(normalize_dish_name(name), name)
+
+    names = set(KNOWN_DISHES) | set(DISH_NUTRITION_PROFILES) | recipes | warm | set(display)
+    dishes = []
+    for name in names:
+        translations = i18n_names.get(display.get(name), [])
+        profile = DISH_NUTRITION_PROFILES.get(name)
+        dishes.append({
+            "name": display.get(name, name.title()),
+            "keys": [name] + [normalize_dish_name(other) for other in translations],
+            "dish_type": KNOWN_DISHES.get(name) or (profile["dish_type"] if profile else None),
+            "cached": name in warm or name in DISH_NUTRITION_PROFILES,
+            "rank": (name not in warm and name not in DISH_NUTRITION_PROFILES,
+                     name not in recipes and name not in KNOWN_DISHES,
+                     len(name), name)
+        })
+    return DishSuggestIndex(dishes)
+
+_index = None
+_built_at = 0.0
+_rebuilding = False
+_index_lock = threading.Lock()
+
+def _rebuild():
+    global _index, _built_at, _rebuilding
+    try:
+        _index, _built_at = build_suggest_index(), time.time()
+    except Exception as e:
+        logger.error("Failed to build dish suggestion index: %s", e)
+    finally:
+        _rebuilding = False
+
+def get_suggest_index():
+    """
+    Return the suggestion index, built on first use
+
+    Once older than DISH_SUGGEST_REFRESH_INTERVAL it is rebuilt in the
+    background (to pick up newly warm dishes) while the old one keeps serving.
+
+    Returns:
+        DishSuggestIndex: The index, or None if it couldn't be built
+    """
+    global _rebuilding
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _rebuild()
+    elif time.time() - _built_at > app_config.DISH_SUGGEST_REFRESH_INTERVAL:
+        with _index_lock:
+            if _rebuilding:
+                return _index
+            _rebuilding = True
+        threading.Thread(target=_rebuild, daemon=True).start()
+    return _index
+
+def suggest_dishes(query, limit=None):
+    """
+    Type-ahead dish suggestions
+
+    Args:
+        query (str): Partially typed dish name
+        limit (int, optional): Maximum number of suggestions
+
+    Returns:
+        list: Suggestions as returned by DishSuggestIndex.suggest
+    """
+    index = get_suggest_index()
+    if index is None:
+        return []
+    limit = min(limit or app_config.DISH_SUGGEST_LIMIT, NODE_TOP_K)
+    return index.suggest(query, limit)
+
+def main():
+    parser = argparse.ArgumentParser(description="Query dish suggestions and time them")
+    parser.add_argument("query")
+    parser.add_argument("--limit", type=int, default=8)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = build_suggest_index()
+    print(f"Indexed {len(index.dishes)} dishes in {1000 * (time.perf_counter() - started):.1f} ms")
+    started = time.perf_counter()
+    suggestions = index.suggest(args.query, args.limit)
+    print(f"Lookup took {1000 * (time.perf_counter() - started):.2f} ms")
+    for suggestion in suggestions:
+        print(f"  {suggestion['name']:<30} {suggestion['match']:<7} {'cached' if suggestion['cached'] else ''}")
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ import React, { useState } from 'react';
 import styled from 'styled-components';
 import { HiOutlineFire, HiOutlineInformationCircle } from 'react-icons/hi';
 import { Oval } from 'react-loader-spinner';
-import api from '../utils/api'; // Import the API utility
+import { useNutrition } from '../hooks/useNutrition';
 import SearchForm from './SearchForm';
 import NutritionResult from './NutritionResult';
 import popularDishes from '../data/popularDishes';
@@ -144,35 +144,11 @@ const ResultsSection = styled.div`
 
 function NutritionCalculator() {
   const [dishName, setDishName] = useState('');
-  const [result, setResult] = useState(null);
-  const [loading, setLoading] = useState(false);
-  const [error, setError] = useState('');
-  const [loadingStage, setLoadingStage] = useState('');
+  const { result, loading, error, loadingStage, calculateNutrition: fetchNutrition } = useNutrition();
 
-  const calculateNutrition = async (dish) => {
-    try {
-      setLoading(true);
-      setError('');
-      setResult(null);
-      
-      // Show loading stages for better UX
-      setLoadingStage('Fetching recipe ingredients...');
-      await new Promise(r => setTimeout(r, 500)); // Small delay for UX
-      
-      setLoadingStage('Analyzing dish components...');
-      const response = await api.post('/api/calculate', { dish_name: dish });
-      
-      setLoadingStage('Calculating nutritional values...');
-      await new Promise(r => setTimeout(r, 500)); // Small delay for UX
-      
-      setResult(response.data);
-    } catch (err) {
-      setError(err.response?.data?.error || 'Unable to calculate nutrition. Please try a different dish.');
-      console.error('Error calculating nutrition:', err);
-    } finally {
-      setLoading(false);
-      setLoadingStage('');
-    }
+  const calculateNutrition = (dish) => {
+    // The hook already puts the error message in state
+    fetchNutrition(dish).catch(() => {});
   };
 
   const handleSubmit = (e) => {
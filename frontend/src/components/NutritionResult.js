@@ -31,6 +31,10 @@ const DEFAULT_IMAGE_URL = "https://images.unsplash.com/photo-1585937421612-70a00
 
 const PLACEHOLDER_IMAGE_URL = "https://images.unsplash.com/photo-1585937421612-70a008356fbe?w=600&q=80";
 
+// Nutrients without data come back as null: show a dash, never 0
+const formatNutrient = (value, unit = '') =>
+  value === null || value === undefined ? '—' : `${value.toFixed(1)}${unit}`;
+
 const ResultCard = styled.div`
   background: var(--card-bg);
   border-radius: var(--border-radius-lg);
@@ -495,11 +499,11 @@ function NutritionResult({ result }) {
     // Nutrients table
     const nutrientsData = [
       ['Nutrient', 'Amount'],
-      ['Calories', `${nutritionData.calories.toFixed(1)} kcal`],
-      ['Protein', `${nutritionData.protein.toFixed(1)} g`],
-      ['Carbs', `${nutritionData.carbs.toFixed(1)} g`],
-      ['Fat', `${nutritionData.fat.toFixed(1)} g`],
-      ['Fiber', `${nutritionData.fiber.toFixed(1)} g`]
+      ['Calories', formatNutrient(nutritionData.calories, ' kcal')],
+      ['Protein', formatNutrient(nutritionData.protein, ' g')],
+      ['Carbs', formatNutrient(nutritionData.carbs, ' g')],
+      ['Fat', formatNutrient(nutritionData.fat, ' g')],
+      ['Fiber', formatNutrient(nutritionData.fiber, ' g')]
     ];
     
     doc.autoTable({
@@ -602,7 +606,7 @@ function NutritionResult({ result }) {
           <NutrientIcon bgColor="239, 68, 68">
             <HiOutlineCalendar size={18} />
           </NutrientIcon>
-          <NutrientValue color="239, 68, 68">{nutritionData.calories.toFixed(1)}</NutrientValue>
+          <NutrientValue color="239, 68, 68">{formatNutrient(nutritionData.calories)}</NutrientValue>
           <NutrientLabel>Calories</NutrientLabel>
         </NutrientCard>
         
@@ -610,7 +614,7 @@ function NutritionResult({ result }) {
           <NutrientIcon bgColor="16, 185, 129">
             <HiOutlineScale size={18} />
           </NutrientIcon>
-          <NutrientValue color="16, 185, 129">{nutritionData.protein.toFixed(1)}g</NutrientValue>
+          <NutrientValue color="16, 185, 129">{formatNutrient(nutritionData.protein, 'g')}</NutrientValue>
           <NutrientLabel>Protein</NutrientLabel>
         </NutrientCard>
         
@@ -618,7 +622,7 @@ function NutritionResult({ result }) {
           <NutrientIcon bgColor="59, 130, 246">
             <HiOutlineCake size={18} />
           </NutrientIcon>
-          <NutrientValue color="59, 130, 246">{nutritionData.carbs.toFixed(1)}g</NutrientValue>
+          <NutrientValue color="59, 130, 246">{formatNutrient(nutritionData.carbs, 'g')}</NutrientValue>
           <NutrientLabel>Carbs</NutrientLabel>
         </NutrientCard>
         
@@ -626,7 +630,7 @@ function NutritionResult({ result }) {
           <NutrientIcon bgColor="245, 158, 11">
             <HiOutlineScale size={18} />
           </NutrientIcon>
-          <NutrientValue color="245, 158, 11">{nutritionData.fat.toFixed(1)}g</NutrientValue>
+          <NutrientValue color="245, 158, 11">{formatNutrient(nutritionData.fat, 'g')}</NutrientValue>
           <NutrientLabel>Fat</NutrientLabel>
         </NutrientCard>
         
@@ -634,7 +638,7 @@ function NutritionResult({ result }) {
           <NutrientIcon bgColor="139, 92, 246">
             <HiOutlineChartPie size={18} />
           </NutrientIcon>
-          <NutrientValue color="139, 92, 246">{nutritionData.fiber?.toFixed(1) || 0}g</NutrientValue>
+          <NutrientValue color="139, 92, 246">{formatNutrient(nutritionData.fiber, 'g')}</NutrientValue>
           <NutrientLabel>Fiber</NutrientLabel>
         </NutrientCard>
       </NutritionGrid>
@@ -646,6 +650,15 @@ function NutritionResult({ result }) {
         </span>
       </ServingSizeNote>
 
+      {result.estimated && (
+        <ServingSizeNote>
+          <HiOutlineInformationCircle size={16} />
+          <span>
+            Quick estimate ({result.estimates.join(', ')} estimated). Search again shortly for the full calculation.
+          </span>
+        </ServingSizeNote>
+      )}
+
       {result.ingredients_used && result.ingredients_used.length > 0 && (
         <IngredientsSection>
           <SectionTitle>
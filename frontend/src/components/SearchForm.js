@@ -1,6 +1,7 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import styled from 'styled-components';
 import { HiOutlineSearch, HiOutlineArrowRight } from 'react-icons/hi';
+import api from '../utils/api';
 
 const Form = styled.form`
   margin-bottom: 1.5rem;
@@ -113,6 +114,27 @@ function SearchForm({ dishName, setDishName, handleSubmit, loading }) {
   // Example dish names that can be clicked to fill the search box
   const exampleDishes = ["Butter Chicken", "Dal Makhani", "Masala Dosa", "Chole Bhature"];
   
+  const [suggestions, setSuggestions] = useState([]);
+
+  // Offer names the backend already knows (warm ones first) while typing
+  useEffect(() => {
+    const query = dishName.trim();
+    if (!query) {
+      setSuggestions([]);
+      return undefined;
+    }
+    const controller = new AbortController();
+    const timer = setTimeout(() => {
+      api.get('/api/dishes/suggest', { params: { q: query }, signal: controller.signal })
+        .then((response) => setSuggestions(response.data.suggestions))
+        .catch(() => {});
+    }, 120);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [dishName]);
+
   const handleExampleClick = (dish) => {
     setDishName(dish);
   };
@@ -131,7 +153,14 @@ function SearchForm({ dishName, setDishName, handleSubmit, loading }) {
           disabled={loading}
           required
           autoFocus
+          list="dish-suggestions"
+          autoComplete="off"
         />
+        <datalist id="dish-suggestions">
+          {suggestions.map((suggestion) => (
+            <option key={suggestion.name} value={suggestion.name} />
+          ))}
+        </datalist>
         <Button type="submit" disabled={loading || !dishName.trim()}>
           <span>Calculate</span>
           <HiOutlineArrowRight size={18} />
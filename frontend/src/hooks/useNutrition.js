@@ -1,8 +1,106 @@
-import { useState, useCallback } from 'react';
-import axios from 'axios';
+import { useState, useCallback, useEffect, useRef } from 'react';
+
+// Same base URL as the axios instance in utils/api
+const baseURL = process.env.REACT_APP_API_URL || '';
+
+// Results of the last few dishes, most recently used last
+const MEMO_SIZE = 20;
+const memo = new Map();
+
+// Streams in flight, shared by every caller asking for the same dish
+const inflight = new Map();
+
+const normalizeName = (dishName) => dishName.trim().toLowerCase().replace(/\s+/g, ' ');
+
+function remember(key, result) {
+  memo.delete(key);
+  memo.set(key, result);
+  if (memo.size > MEMO_SIZE) {
+    memo.delete(memo.keys().next().value);
+  }
+}
+
+/**
+ * Read the NDJSON stage stream for a dish, passing each stage event on
+ * @param {string} dishName - Name of the dish to analyze
+ * @param {AbortSignal} signal - Aborts the request
+ * @param {Function} onStage - Called with each {stage, message} event
+ * @returns {Promise<Object>} - Nutrition data
+ */
+async function streamNutrition(dishName, signal, onStage) {
+  const response = await fetch(
+    `${baseURL}/api/dishes/${encodeURIComponent(dishName)}/nutrition/stream`,
+    { signal }
+  );
+  if (!response.ok || !response.body) {
+    const data = await response.json().catch(() => ({}));
+    throw new Error(data.error || `Request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+
+    let newline;
+    while ((newline = buffered.indexOf('\n')) >= 0) {
+      const line = buffered.slice(0, newline).trim();
+      buffered = buffered.slice(newline + 1);
+      if (!line) continue;
+
+      const event = JSON.parse(line);
+      if (event.stage === 'done') return event.result;
+      if (event.stage === 'error') throw new Error(event.error);
+      onStage(event);
+    }
+    if (done) throw new Error('Connection closed before the result arrived');
+  }
+}
+
+/**
+ * Join the stream for a dish, starting one if none is running
+ * @returns {Object} - {promise, unsubscribe}
+ */
+function subscribe(key, dishName, onStage) {
+  let entry = inflight.get(key);
+  if (!entry) {
+    const controller = new AbortController();
+    entry = { controller, listeners: new Set(), lastStage: null };
+    entry.promise = streamNutrition(dishName, controller.signal, (event) => {
+      entry.lastStage = event;
+      entry.listeners.forEach((listener) => listener(event));
+    })
+      .then((result) => {
+        // Estimates are replaced by the full result once the backend has it
+        if (!result.estimated) remember(key, result);
+        return result;
+      })
+      .finally(() => inflight.delete(key));
+    inflight.set(key, entry);
+  }
+
+  entry.listeners.add(onStage);
+  if (entry.lastStage) onStage(entry.lastStage);
+
+  const unsubscribe = () => {
+    entry.listeners.delete(onStage);
+    // Nobody is waiting for this dish any more
+    if (entry.listeners.size === 0 && inflight.get(key) === entry) {
+      entry.controller.abort();
+      inflight.delete(key);
+    }
+  };
+  return { promise: entry.promise, unsubscribe };
+}
 
 /**
  * Custom hook for nutrition data calculation
+ *
+ * Loading stages come from the backend as the pipeline runs them; cached
+ * dishes resolve at once. Identical requests share one stream, a new
+ * request cancels the previous one, and recent results are memoized.
  * @returns {Object} - Nutrition calculation state and functions
  */
 export function useNutrition() {
@@ -10,49 +108,73 @@ export function useNutrition() {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [loadingStage, setLoadingStage] = useState('');
+  const current = useRef(null);
+
+  const cancel = useCallback(() => {
+    if (current.current) {
+      current.current.unsubscribe();
+      current.current = null;
+    }
+  }, []);
+
+  useEffect(() => cancel, [cancel]);
 
   /**
    * Calculate nutrition for a specific dish
    * @param {string} dishName - Name of the dish to analyze
-   * @returns {Promise<Object>} - Nutrition data
+   * @returns {Promise<Object>} - Nutrition data, or undefined if superseded
    */
   const calculateNutrition = useCallback(async (dishName) => {
+    cancel();
+    const key = normalizeName(dishName);
+    setError('');
+
+    if (memo.has(key)) {
+      const cached = memo.get(key);
+      remember(key, cached);
+      setResult(cached);
+      setLoading(false);
+      setLoadingStage('');
+      return cached;
+    }
+
+    setLoading(true);
+    setResult(null);
+    setLoadingStage('Looking up dish...');
+
+    const subscription = subscribe(key, dishName, (event) => setLoadingStage(event.message));
+    current.current = subscription;
     try {
-      setLoading(true);
-      setError('');
-      setResult(null);
-      
-      // Show loading stages for better UX
-      setLoadingStage('Fetching recipe ingredients...');
-      await new Promise(r => setTimeout(r, 500)); 
-      
-      setLoadingStage('Analyzing dish components...');
-      const response = await axios.post('/api/calculate', { dish_name: dishName });
-      
-      setLoadingStage('Calculating nutritional values...');
-      await new Promise(r => setTimeout(r, 500));
-      
-      setResult(response.data);
-      return response.data;
+      const data = await subscription.promise;
+      if (current.current !== subscription) return undefined;
+      setResult(data);
+      return data;
     } catch (err) {
-      const errorMessage = err.response?.data?.error || 
-        'Unable to calculate nutrition. Please try a different dish.';
+      if (current.current !== subscription || err.name === 'AbortError') return undefined;
+      const errorMessage = err.message || 'Unable to calculate nutrition. Please try a different dish.';
       setError(errorMessage);
       console.error('Error calculating nutrition:', err);
       throw new Error(errorMessage);
     } finally {
-      setLoading(false);
-      setLoadingStage('');
+      if (current.current === subscription) {
+        subscription.unsubscribe();
+        current.current = null;
+        setLoading(false);
+        setLoadingStage('');
+      }
     }
-  }, []);
+  }, [cancel]);
 
   /**
-   * Clear previous results
+   * Clear previous results and cancel a running request
    */
   const clearResults = useCallback(() => {
+    cancel();
     setResult(null);
     setError('');
-  }, []);
+    setLoading(false);
+    setLoadingStage('');
+  }, [cancel]);
 
   return {
     result,
@@ -0,0 +1,25 @@
+# Gunicorn settings for the production backend, tuned from config.py
+# Usage: gunicorn -c gunicorn.conf.py app:app
+from config import app_config
+
+bind = f"{app_config.BACKEND_HOST}:{app_config.BACKEND_PORT}"
+
+# Requests spend most of their time waiting on OpenAI and MongoDB, so a few
+# threads per worker keep CPUs busy without one process per connection
+workers = app_config.GUNICORN_WORKERS
+worker_class = app_config.GUNICORN_WORKER_CLASS
+threads = app_config.GUNICORN_THREADS
+
+# Load the app (and its lookup tables) once in the master and fork workers from it
+preload_app = app_config.GUNICORN_PRELOAD
+
+keepalive = app_config.GUNICORN_KEEPALIVE
+timeout = app_config.GUNICORN_TIMEOUT
+graceful_timeout = app_config.GUNICORN_GRACEFUL_TIMEOUT
+
+# Recycle workers periodically, with jitter so they don't all restart together
+max_requests = app_config.GUNICORN_MAX_REQUESTS
+max_requests_jitter = max(1, app_config.GUNICORN_MAX_REQUESTS // 10)
+
+accesslog = "-"
+errorlog = "-"
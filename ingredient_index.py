@@ -0,0 +1,218 @@
+import os
+import re
+import math
+import logging
+import argparse
+import threading
+import numpy as np
+from config import app_config
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]+")
+
+def analyze(text):
+    """
+    Turn a food name into weighted features: character 3-grams of each padded
+    word plus whole words, so "tomatoes" still lands near "tomato" while
+    full-word overlaps count for more than shared fragments
+
+    Returns:
+        dict: Feature -> sublinear term frequency
+    """
+    words = _NON_ALNUM.sub(" ", text.lower()).split()
+    counts = {}
+    for word in words:
+        counts[f"w:{word}"] = counts.get(f"w:{word}", 0) + 1
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            gram = padded[i:i + 3]
+            counts[gram] = counts.get(gram, 0) + 1
+    return {feature: 1 + math.log(count) for feature, count in counts.items()}
+
+class IngredientIndex:
+    """
+    Character n-gram TF-IDF index over food names
+
+    Stored as an inverted index in CSR form (per-feature slices of document
+    ids and weights), so a query only touches the postings of its own
+    ~15 features and scores every name with one bincount.
+    """
+
+    def __init__(self, names, vocabulary, idf, indptr, doc_ids, weights):
+        self.names = names
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+
+    @classmethod
+    def build(cls, names):
+        """
+        Build the index from food names
+
+        Args:
+            names (list): Food names, e.g. every food_name in nutrition_source
+
+        Returns:
+            IngredientIndex: The built index
+        """
+        names = list(dict.fromkeys(name for name in names if name))
+        docs = [analyze(name) for name in names]
+
+        vocabulary = {}
+        for doc in docs:
+            for feature in doc:
+                vocabulary.setdefault(feature, len(vocabulary))
+        df = np.zeros(len(vocabulary))
+        for doc in docs:
+            for feature in doc:
+                df[vocabulary[feature]] += 1
+        idf = np.log((1 + len(docs)) / (1 + df)) + 1
+
+        postings = [[] for _ in vocabulary]
+        for doc_id, doc in enumerate(docs):
+            ids = [vocabulary[feature] for feature in doc]
+            values = np.array(list(doc.values())) * idf[ids]
+            values /= np.linalg.norm(values) or 1.0
+            for feature_id, value in zip(ids, values):
+                postings[feature_id].append((doc_id, value))
+
+        indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(p) for p in postings])
+        doc_ids = np.fromiter((d for p in postings for d, _ in p), dtype=np.int32, count=indptr[-1])
+        weights = np.fromiter((w for p in postings for _, w in p), dtype=np.float32, count=indptr[-1])
+        return cls(names, vocabulary, idf.astype(np.float32), indptr, doc_ids, weights)
+
+    def search(self, query, k=5):
+        """
+        Find the food names most similar to a query
+
+        Args:
+            query (str): Ingredient name
+            k (int): Number of candidates
+
+        Returns:
+            list: (food name, cosine similarity) pairs, best first
+        """
+        # Features no name has still count toward the query norm, so a
+        # query that is mostly unknown can't score highly
+        unseen_idf = math.log(1 + len(self.names)) + 1
+        ids, values, norm = [], [], 0.0
+        for feature, tf in analyze(query).items():
+            feature_id = self.vocabulary.get(feature)
+            weight = tf * (self.idf[feature_id] if feature_id is not None else unseen_idf)
+            norm += weight * weight
+            if feature_id is not None:
+                ids.append(feature_id)
+                values.append(weight)
+        if not ids:
+            return []
+        ids = np.array(ids)
+        query_weights = np.array(values) / math.sqrt(norm)
+
+        starts, ends = self.indptr[ids], self.indptr[ids + 1]
+        doc_ids = np.concatenate([self.doc_ids[s:e] for s, e in zip(starts, ends)])
+        contributions = np.concatenate([self.weights[s:e] * w for s, e, w in zip(starts, ends, query_weights)])
+        scores = np.bincount(doc_ids, weights=contributions, minlength=len(self.names))
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.names[i], float(scores[i])) for i in top if scores[i] > 0]
+
+    def save(self, path):
+        """
+        Write the index to an .npz file
+
+        Names and features are stored as fixed-width unicode arrays, not
+        object arrays, so loading never unpickles anything.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        features = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez(path, names=np.array(self.names, dtype=str), features=np.array(features, dtype=str),
+                 idf=self.idf, indptr=self.indptr, doc_ids=self.doc_ids, weights=self.weights)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index written by save()
+
+        Raises:
+            ValueError: For files holding object arrays (written by older
+                versions); rebuild them with `python ingredient_index.py build`
+        """
+        with np.load(path, allow_pickle=False) as data:
+            features = data["features"].tolist()
+            return cls(data["names"].tolist(), {f: i for i, f in enumerate(features)},
+                       data["idf"], data["indptr"], data["doc_ids"], data["weights"])
+
+_index = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+def get_ingredient_index():
+    """
+    Return the index built by `python ingredient_index.py build`, loading it once
+
+    Returns:
+        IngredientIndex: The index, or None if it hasn't been built
+    """
+    global _index, _index_loaded
+    if not _index_loaded:
+        with _index_lock:
+            if not _index_loaded:
+                path = app_config.MATCH_INDEX_PATH
+                if os.path.exists(path):
+                    try:
+                        _index = IngredientIndex.load(path)
+                        logger.info("Loaded ingredient index with %d names", len(_index.names))
+                    except Exception as e:
+                        logger.warning("Failed to load ingredient index %s: %s", path, e)
+                _index_loaded = True
+    return _index
+
+def find_similar_food(ingredient_name, min_similarity=None):
+    """
+    Best index match for an ingredient if it is similar enough
+
+    Returns:
+        tuple: (food name, similarity), or None if no index or no close match
+    """
+    index = get_ingredient_index()
+    if index is None:
+        return None
+    min_similarity = app_config.MATCH_INDEX_MIN_SIMILARITY if min_similarity is None else min_similarity
+    candidates = index.search(ingredient_name, k=1)
+    if candidates and candidates[0][1] >= min_similarity:
+        return candidates[0]
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the ingredient similarity index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="index every food_name in the nutrition database")
+    query_parser = subparsers.add_parser("query", help="show the top matches for a name")
+    query_parser.add_argument("name")
+    query_parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        from database import get_nutrition_db_connection
+        db = get_nutrition_db_connection()
+        names = [doc["food_name"] for doc in db.nutrition_source.find({}, {"food_name": 1}) if doc.get("food_name")]
+        index = IngredientIndex.build(names)
+        index.save(app_config.MATCH_INDEX_PATH)
+        print(f"Indexed {len(index.names)} food names into {app_config.MATCH_INDEX_PATH}")
+    else:
+        index = get_ingredient_index()
+        if index is None:
+            parser.error(f"No index at {app_config.MATCH_INDEX_PATH}; run the build command first")
+        for name, score in index.search(args.name, args.k):
+            print(f"{score:.3f}  {name}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,20 @@
+import os
 import re
+import time
 import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+import numpy as np
 from fuzzywuzzy import process
-from database import find_ingredient_in_db
+from config import app_config
+from database import find_ingredient_in_db, get_food_by_name
+from nutrient_table import TableRow, get_nutrient_table
+from ingredient_index import get_ingredient_index, find_similar_food
+from logging_config import SAMPLED
+from nutrition_rules import apply_rules
+from nutrition_records import NUTRIENT_FIELDS, NUTRIENT_FIELD_SCALES, NutrientVector, StandardizedIngredient, MatchResult
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Enhanced household measurement conversion to grams
@@ -94,97 +104,180 @@ INGREDIENT_CATEGORIES = {
 }
 
 # Manual nutrition data for common ingredients that might be missing from DB
+# (per 100g; nutrients of the registry left out of an entry have no data)
 MANUAL_NUTRITION_DATA = {
     "chickpeas": {
         "calories": 364,
         "protein": 19.3,
         "carbs": 61.0,
         "fat": 6.0,
-        "fiber": 17.0
+        "fiber": 17.0,
+        "sugars": 10.7,
+        "saturated_fat": 0.6,
+        "sodium": 24,
+        "potassium": 875,
+        "iron": 6.2,
+        "calcium": 105,
+        "vitamin_a": 3,
+        "vitamin_c": 4.0,
+        "folate": 557
     },
     "urad dal": {
         "calories": 341,
         "protein": 25.1,
         "carbs": 59.0,
         "fat": 1.6,
-        "fiber": 18.3
+        "fiber": 18.3,
+        "saturated_fat": 0.1,
+        "sodium": 38,
+        "potassium": 983,
+        "iron": 7.6,
+        "calcium": 138,
+        "vitamin_a": 1,
+        "folate": 216
     },
     "rajma": {
         "calories": 333,
         "protein": 24.0,
         "carbs": 60.0,
         "fat": 1.5,
-        "fiber": 15.0
+        "fiber": 15.0,
+        "sugars": 2.2,
+        "saturated_fat": 0.2,
+        "sodium": 12,
+        "potassium": 1359,
+        "iron": 6.7,
+        "calcium": 83,
+        "vitamin_c": 4.5,
+        "folate": 394
     },
     "whole wheat flour": {
         "calories": 340,
         "protein": 13.0,
         "carbs": 72.0,
         "fat": 1.7,
-        "fiber": 11.2
+        "fiber": 11.2,
+        "sugars": 0.4,
+        "saturated_fat": 0.3,
+        "sodium": 2,
+        "potassium": 363,
+        "iron": 3.6,
+        "calcium": 34,
+        "folate": 44
     },
     "maida": {
         "calories": 348,
         "protein": 10.3,
         "carbs": 73.6,
         "fat": 1.2,
-        "fiber": 2.7
+        "fiber": 2.7,
+        "sugars": 0.3,
+        "saturated_fat": 0.2,
+        "sodium": 2,
+        "potassium": 107,
+        "iron": 1.2,
+        "calcium": 15,
+        "folate": 26
     },
     "red chili powder": {
         "calories": 282,
         "protein": 12.0,
         "carbs": 56.6,
         "fat": 14.0,
-        "fiber": 34.8
+        "fiber": 34.8,
+        "sugars": 10.3,
+        "saturated_fat": 3.3,
+        "sodium": 30,
+        "potassium": 2014,
+        "iron": 7.8,
+        "calcium": 148,
+        "vitamin_a": 2081,
+        "vitamin_c": 76.4,
+        "folate": 106
     },
     "coriander powder": {
         "calories": 279,
         "protein": 12.4,
         "carbs": 52.1,
         "fat": 16.1,
-        "fiber": 41.9
+        "fiber": 41.9,
+        "saturated_fat": 1.0,
+        "sodium": 35,
+        "potassium": 1267,
+        "iron": 16.3,
+        "calcium": 709,
+        "vitamin_c": 21.0
     },
     "cumin powder": {
         "calories": 375,
         "protein": 18.0,
         "carbs": 44.2,
         "fat": 22.3,
-        "fiber": 10.5
+        "fiber": 10.5,
+        "sugars": 2.3,
+        "saturated_fat": 1.5,
+        "sodium": 168,
+        "potassium": 1788,
+        "iron": 66.4,
+        "calcium": 931,
+        "vitamin_a": 64,
+        "vitamin_c": 7.7,
+        "folate": 10
     },
     "oil": {
         "calories": 884,
         "protein": 0,
         "carbs": 0,
         "fat": 100,
-        "fiber": 0
+        "fiber": 0,
+        "saturated_fat": 10.3
     },
     "vegetable oil": {
         "calories": 884,
         "protein": 0,
         "carbs": 0,
         "fat": 100,
-        "fiber": 0
+        "fiber": 0,
+        "saturated_fat": 10.3
     },
     "potato": {
         "calories": 77,
         "protein": 2.0,
         "carbs": 17.0,
         "fat": 0.1,
-        "fiber": 2.2
+        "fiber": 2.2,
+        "sugars": 0.8,
+        "sodium": 6,
+        "potassium": 425,
+        "iron": 0.8,
+        "calcium": 12,
+        "vitamin_c": 19.7,
+        "folate": 15
     },
     "green chili": {
         "calories": 40,
         "protein": 2.0,
         "carbs": 9.0,
         "fat": 0.2,
-        "fiber": 1.5
+        "fiber": 1.5,
+        "sugars": 5.1,
+        "sodium": 7,
+        "potassium": 340,
+        "iron": 1.2,
+        "calcium": 18,
+        "vitamin_a": 59,
+        "vitamin_c": 242.5,
+        "folate": 23
     },
     "curry leaves": {
         "calories": 108,
         "protein": 6.0,
         "carbs": 18.7,
         "fat": 1.0,
-        "fiber": 6.4
+        "fiber": 6.4,
+        "iron": 0.9,
+        "calcium": 830,
+        "vitamin_c": 4.0
     },
     "dosa": {  # Per plain dosa without filling
         "calories": 120,
@@ -202,6 +295,59 @@ MANUAL_NUTRITION_DATA = {
     }
 }
 
+# Default nutrition values per 100g for different categories
+CATEGORY_NUTRITION = {
+    "spice": {
+        "calories": 250,
+        "protein": 10,
+        "carbs": 50,
+        "fat": 10,
+        "fiber": 30
+    },
+    "vegetable": {
+        "calories": 65,
+        "protein": 3,
+        "carbs": 12,
+        "fat": 0.5,
+        "fiber": 4
+    },
+    "grain": {
+        "calories": 350,
+        "protein": 10,
+        "carbs": 70,
+        "fat": 2,
+        "fiber": 10
+    },
+    "protein": {
+        "calories": 300,
+        "protein": 20,
+        "carbs": 40,
+        "fat": 5,
+        "fiber": 10
+    },
+    "liquid": {
+        "calories": 40,
+        "protein": 1,
+        "carbs": 5,
+        "fat": 1,
+        "fiber": 0
+    },
+    "default": {
+        "calories": 150,
+        "protein": 5,
+        "carbs": 20,
+        "fat": 5,
+        "fiber": 5
+    }
+}
+
+# Unit factor of each nutrition_source field, in NutrientVector order (see NUTRIENT_SCHEMA)
+DB_FIELD_SCALES = np.array(NUTRIENT_FIELD_SCALES)
+
+# Per-100g tables converted once, so lookups only allocate the scaled result
+MANUAL_NUTRITION_VECTORS = {name: NutrientVector.from_mapping(data) for name, data in MANUAL_NUTRITION_DATA.items()}
+CATEGORY_NUTRITION_VECTORS = {name: NutrientVector.from_mapping(data) for name, data in CATEGORY_NUTRITION.items()}
+
 # Ingredient name mapping for common Indian ingredients
 INGREDIENT_NAME_MAPPING = {
     "chickpeas": ["chickpeas", "chole", "chana", "garbanzo beans"],
@@ -234,7 +380,7 @@ def standardize_ingredients(ingredients_list):
         ingredients_list (list): List of ingredients from recipe
     
     Returns:
-        list: Standardized ingredients with weights in grams
+        list: StandardizedIngredient records with weights in grams
     """
     standardized = []
     
@@ -248,11 +394,8 @@ def standardize_ingredients(ingredients_list):
             
             # Skip ingredients that are marked as "to taste" or "for garnish"
             if "to taste" in quantity or "for garnish" in quantity or "as needed" in quantity:
-                standardized.append({
-                    "name": name,
-                    "quantity": quantity,
-                    "weight_grams": 0  # Zero weight for excluded ingredients
-                })
+                # Zero weight for excluded ingredients
+                standardized.append(StandardizedIngredient(name, quantity, 0))
                 continue
                 
             if not name or not quantity:
@@ -264,30 +407,22 @@ def standardize_ingredients(ingredients_list):
             if numeric_value is None or unit is None:
                 # If we can't parse, make an educated guess
                 weight_grams = estimate_weight_from_description(name, quantity)
-                standardized.append({
-                    "name": normalize_ingredient_name(name),
-                    "quantity": quantity,
-                    "weight_grams": weight_grams
-                })
+                standardized.append(StandardizedIngredient(normalize_ingredient_name(name), quantity, weight_grams))
                 continue
                 
             # Convert to standard unit and weight in grams
             weight_grams = convert_to_grams(numeric_value, unit, name, size_desc)
             
-            standardized.append({
-                "name": normalize_ingredient_name(name),
-                "quantity": f"{numeric_value} {unit}",
-                "weight_grams": weight_grams
-            })
+            standardized.append(StandardizedIngredient(normalize_ingredient_name(name), f"{numeric_value} {unit}", weight_grams))
                 
         except Exception as e:
-            logger.warning(f"Error standardizing ingredient {ingredient}: {str(e)}")
+            logger.warning("Error standardizing ingredient %s: %s", ingredient, e)
             # Add with default values
-            standardized.append({
-                "name": normalize_ingredient_name(ingredient.get("name", "unknown")),
-                "quantity": ingredient.get("quantity", "unknown"),
-                "weight_grams": 50  # Default fallback weight
-            })
+            standardized.append(StandardizedIngredient(
+                normalize_ingredient_name(ingredient.get("name", "unknown")),
+                ingredient.get("quantity", "unknown"),
+                50  # Default fallback weight
+            ))
     
     return standardized
 
@@ -517,227 +652,266 @@ def map_ingredients_to_nutrition(standardized_ingredients, db):
     Map ingredients to nutrition database and calculate total nutrition
     
     Args:
-        standardized_ingredients (list): Standardized ingredients with weights
+        standardized_ingredients (list): StandardizedIngredient records with weights
         db: Database connection object
     
     Returns:
-        tuple: (total nutrition dict, list of ingredients with mapped nutrition)
+        tuple: (total NutrientVector, list of MatchResult records)
     """
-    total_nutrition = {
-        "calories": 0,
-        "protein": 0,
-        "carbs": 0,
-        "fat": 0,
-        "fiber": 0
-    }
+    matches = resolve_ingredients(standardized_ingredients, db)
+    total_nutrition = sum_contributions(matches)
     
-    ingredients_with_nutrition = []
+    # Apply some validation and sanity checks to the nutrition totals
+    validate_nutrition_totals(total_nutrition, matches)
     
-    for ingredient in standardized_ingredients:
-        try:
-            name = ingredient["name"]
-            weight_grams = ingredient["weight_grams"]
-            
-            # Skip ingredients with zero weight (usually "to taste" or garnish)
-            if weight_grams <= 0:
-                ingredients_with_nutrition.append({
-                    "ingredient": name,
-                    "quantity": ingredient["quantity"],
-                    "matched_to": "Excluded from calculation"
-                })
-                continue
-            
-            # Check for special case corrections first
-            if name in INGREDIENT_CORRECTIONS:
-                matched_name = INGREDIENT_CORRECTIONS[name]
-                
-                # First check if we have manual nutrition data
-                manual_match = get_manual_nutrition_data(name)
-                if manual_match:
-                    nutrition = calculate_manual_ingredient_nutrition(manual_match, weight_grams)
-                    for key in total_nutrition:
-                        if key in nutrition:
-                            total_nutrition[key] += nutrition[key]
-                    
-                    ingredients_with_nutrition.append({
-                        "ingredient": name,
-                        "quantity": ingredient["quantity"],
-                        "matched_to": matched_name
-                    })
-                    continue
-                else:
-                    # Try to find corrected name in database
-                    db_ingredient = find_ingredient_in_db(db, matched_name)
-                    if db_ingredient:
-                        nutrition = calculate_ingredient_nutrition(db_ingredient, weight_grams)
-                        for key in total_nutrition:
-                            if key in nutrition:
-                                total_nutrition[key] += nutrition[key]
-                        
-                        ingredients_with_nutrition.append({
-                            "ingredient": name,
-                            "quantity": ingredient["quantity"],
-                            "matched_to": matched_name
-                        })
-                        continue
-            
-            # First check if we have manual nutrition data
-            manual_match = get_manual_nutrition_data(name)
-            if manual_match:
-                nutrition = calculate_manual_ingredient_nutrition(manual_match, weight_grams)
-                for key in total_nutrition:
-                    if key in nutrition:
-                        total_nutrition[key] += nutrition[key]
-                
-                ingredients_with_nutrition.append({
-                    "ingredient": name,
-                    "quantity": ingredient["quantity"],
-                    "matched_to": f"{name} (standard values)"
-                })
+    return total_nutrition, matches
+
+_resolve_pool = None
+_resolve_pool_pid = None
+_resolve_pool_lock = threading.Lock()
+
+def get_resolve_pool():
+    """
+    Shared thread pool for ingredient lookups, sized to the MongoDB connection pool
+    
+    Created lazily and again after a fork, since worker threads don't survive
+    into gunicorn's forked workers.
+    """
+    global _resolve_pool, _resolve_pool_pid
+    if _resolve_pool_pid != os.getpid():
+        with _resolve_pool_lock:
+            if _resolve_pool_pid != os.getpid():
+                _resolve_pool = ThreadPoolExecutor(max_workers=app_config.INGREDIENT_RESOLVE_WORKERS,
+                                                   thread_name_prefix="ingredient-resolve")
+                _resolve_pool_pid = os.getpid()
+    return _resolve_pool
+
+def _resolve_one(ingredient, db):
+    try:
+        return match_ingredient(ingredient, db)
+    except Exception as e:
+        logger.error("Error processing ingredient %s: %s", getattr(ingredient, "name", "unknown"), e)
+        # In case of error, still add the ingredient to the list without affecting nutrition totals
+        return MatchResult(
+            getattr(ingredient, "name", "unknown"),
+            getattr(ingredient, "quantity", "unknown"),
+            "not calculated (error)"
+        )
+
+def resolve_ingredients(standardized_ingredients, db, deadline=None):
+    """
+    Resolve every ingredient to a MatchResult carrying its nutrition contribution
+    
+    Lookups are independent database round trips, so with a database they fan
+    out on the shared resolve pool. Results are put back in recipe order, so
+    totals summed from them are the same as with sequential lookups.
+    Ingredients still unresolved at the deadline fall back to category
+    estimates; their lookups are cancelled if they haven't started.
+    
+    Args:
+        standardized_ingredients (list): StandardizedIngredient records with weights
+        db: Database connection object
+        deadline (float, optional): Seconds allowed for all lookups, defaults
+            to INGREDIENT_RESOLVE_DEADLINE
+    
+    Returns:
+        list: MatchResult records in recipe order
+    """
+    if db is None:
+        return [_resolve_one(ingredient, db) for ingredient in standardized_ingredients]
+    
+    deadline = app_config.INGREDIENT_RESOLVE_DEADLINE if deadline is None else deadline
+    if len(standardized_ingredients) < 2 or app_config.INGREDIENT_RESOLVE_WORKERS < 2:
+        # Sequential lookups keep the same deadline: none starts after it passes
+        expires = time.monotonic() + deadline
+        matches = []
+        for ingredient in standardized_ingredients:
+            if time.monotonic() < expires:
+                matches.append(_resolve_one(ingredient, db))
                 continue
-            
-            # Find ingredient in database
-            db_ingredient = find_ingredient_in_db(db, name)
-            
-            if not db_ingredient:
-                # If not found, try fuzzy matching
-                db_ingredient = fuzzy_match_ingredient(db, name)
-            
-            if db_ingredient:
-                # Calculate nutrition based on weight
-                nutrition = calculate_ingredient_nutrition(db_ingredient, weight_grams)
-                
-                # Add to total
-                for key in total_nutrition:
-                    if key in nutrition:
-                        total_nutrition[key] += nutrition[key]
-                
-                matched_name = db_ingredient.get("name", db_ingredient.get("food_name", "unknown"))
-                ingredients_with_nutrition.append({
-                    "ingredient": name,
-                    "quantity": ingredient["quantity"],
-                    "matched_to": matched_name
-                })
-            else:
-                # Ingredient not found, but still add a reasonable estimate based on category
-                estimated_nutrition = estimate_nutrition_by_category(name, weight_grams)
-                
-                # Add estimated nutrition to total
-                for key in total_nutrition:
-                    if key in estimated_nutrition:
-                        total_nutrition[key] += estimated_nutrition[key]
-                
-                ingredients_with_nutrition.append({
-                    "ingredient": name,
-                    "quantity": ingredient["quantity"],
-                    "matched_to": "estimated values"
-                })
-        except Exception as e:
-            logger.error(f"Error processing ingredient {ingredient.get('name', 'unknown')}: {str(e)}")
-            # In case of error, still add the ingredient to the list without affecting nutrition totals
-            ingredients_with_nutrition.append({
-                "ingredient": ingredient.get("name", "unknown"),
-                "quantity": ingredient.get("quantity", "unknown"),
-                "matched_to": "not calculated (error)"
-            })
+            logger.warning("Lookup for %s missed the %ss deadline, using category estimate", ingredient.name, deadline)
+            matches.append(estimate_ingredient_match(ingredient))
+        return matches
+    
+    pool = get_resolve_pool()
+    # Copy the context so lookups log under the caller's request id
+    futures = [pool.submit(contextvars.copy_context().run, _resolve_one, ingredient, db)
+               for ingredient in standardized_ingredients]
+    wait(futures, timeout=deadline)
+    
+    matches = []
+    for ingredient, future in zip(standardized_ingredients, futures):
+        if future.done():
+            matches.append(future.result())
+            continue
+        future.cancel()
+        logger.warning("Lookup for %s missed the %ss deadline, using category estimate", ingredient.name, deadline)
+        matches.append(estimate_ingredient_match(ingredient))
+    
+    return matches
+
+def estimate_ingredient_match(ingredient):
+    """
+    Resolve an ingredient without the database: manual standard values if
+    known, else the category estimate
     
-    # Apply some validation and sanity checks to the nutrition totals
-    validate_nutrition_totals(total_nutrition, ingredients_with_nutrition)
+    Args:
+        ingredient (StandardizedIngredient): Ingredient with weight in grams
+    
+    Returns:
+        MatchResult: Match marked "(lookup timed out)" when a category estimate was used
+    """
+    if ingredient.weight_grams <= 0:
+        return MatchResult(ingredient.name, ingredient.quantity, "Excluded from calculation")
+    manual_match = get_manual_nutrition_data(ingredient.name)
+    if manual_match:
+        nutrition = calculate_manual_ingredient_nutrition(manual_match, ingredient.weight_grams)
+        return MatchResult(ingredient.name, ingredient.quantity, f"{ingredient.name} (standard values)", nutrition)
+    return MatchResult(
+        ingredient.name,
+        ingredient.quantity,
+        "estimated values (lookup timed out)",
+        estimate_nutrition_by_category(ingredient.name, ingredient.weight_grams)
+    )
+
+def sum_contributions(matches):
+    """
+    Sum the nutrition contributions of resolved ingredients (before validation)
+
+    Ingredients without data for a nutrient are skipped; a nutrient none of
+    them has data for stays NaN.
+    """
+    # One column sum over the stacked vectors, however many nutrients are tracked
+    contributions = [match.nutrition.values for match in matches if match.nutrition is not None]
+    if not contributions:
+        return NutrientVector()
+    stacked = np.array(contributions)
+    totals = np.where(np.isnan(stacked).all(axis=0), np.nan, np.nansum(stacked, axis=0))
+    return NutrientVector(totals.tolist())
+
+def nutrient_coverage(ingredients, matches):
+    """
+    Share of the matched ingredient weight that has data for each nutrient
+
+    Args:
+        ingredients (list): StandardizedIngredients, parallel to matches
+        matches (list): MatchResults of the ingredients
+
+    Returns:
+        np.ndarray: One share in [0, 1] per nutrient, or None if no matched
+            ingredient has a weight
+    """
+    pairs = [(ingredient.weight_grams, match.nutrition.values) for ingredient, match in zip(ingredients, matches)
+             if match.nutrition is not None and ingredient.weight_grams > 0]
+    if not pairs:
+        return None
+    weights = np.array([weight for weight, _ in pairs])
+    has_data = ~np.isnan(np.array([values for _, values in pairs]))
+    return weights @ has_data / weights.sum()
+
+def needs_lookup(ingredient):
+    """
+    Whether matching an ingredient queries the database
+    
+    Excluded (zero-weight) ingredients and those with manual standard values
+    are resolved in memory; everything else runs the MongoDB match tiers.
+    """
+    return ingredient.weight_grams > 0 and get_manual_nutrition_data(ingredient.name) is None
+
+def match_ingredient(ingredient, db):
+    """
+    Resolve one standardized ingredient to its nutrition contribution
+    
+    Args:
+        ingredient (StandardizedIngredient): Ingredient with weight in grams
+        db: Database connection object
+    
+    Returns:
+        MatchResult: Match description and NutrientVector for the ingredient's weight
+    """
+    name = ingredient.name
+    weight_grams = ingredient.weight_grams
     
-    return total_nutrition, ingredients_with_nutrition
+    # Skip ingredients with zero weight (usually "to taste" or garnish)
+    if weight_grams <= 0:
+        return MatchResult(name, ingredient.quantity, "Excluded from calculation")
+    
+    # Check for special case corrections first
+    if name in INGREDIENT_CORRECTIONS:
+        matched_name = INGREDIENT_CORRECTIONS[name]
+        
+        # First check if we have manual nutrition data
+        manual_match = get_manual_nutrition_data(name)
+        if manual_match:
+            nutrition = calculate_manual_ingredient_nutrition(manual_match, weight_grams)
+            return MatchResult(name, ingredient.quantity, matched_name, nutrition)
+        
+        # Try to find corrected name in database
+        db_ingredient = find_ingredient_in_db(db, matched_name)
+        if db_ingredient:
+            nutrition = calculate_ingredient_nutrition(db_ingredient, weight_grams)
+            return MatchResult(name, ingredient.quantity, matched_name, nutrition)
+    
+    # First check if we have manual nutrition data
+    manual_match = get_manual_nutrition_data(name)
+    if manual_match:
+        nutrition = calculate_manual_ingredient_nutrition(manual_match, weight_grams)
+        return MatchResult(name, ingredient.quantity, f"{name} (standard values)", nutrition)
+    
+    # Find ingredient in database
+    db_ingredient = find_ingredient_in_db(db, name)
+    
+    if not db_ingredient:
+        # If not found, try fuzzy matching
+        db_ingredient = fuzzy_match_ingredient(db, name)
+    
+    if db_ingredient:
+        # Calculate nutrition based on weight
+        nutrition = calculate_ingredient_nutrition(db_ingredient, weight_grams)
+        matched_name = db_ingredient.get("name", db_ingredient.get("food_name", "unknown"))
+        return MatchResult(name, ingredient.quantity, matched_name, nutrition)
+    
+    # Ingredient not found, but still add a reasonable estimate based on category
+    nutrition = estimate_nutrition_by_category(name, weight_grams)
+    return MatchResult(name, ingredient.quantity, "estimated values", nutrition)
 
 def get_manual_nutrition_data(ingredient_name):
-    """Check if we have manual nutrition data for this ingredient"""
-    for name, data in MANUAL_NUTRITION_DATA.items():
+    """Check if we have manual nutrition data for this ingredient (per-100g NutrientVector)"""
+    for name, vector in MANUAL_NUTRITION_VECTORS.items():
         if name in ingredient_name:
-            return data
+            return vector
     return None
 
 def calculate_manual_ingredient_nutrition(nutrition_data, weight_grams):
     """Calculate nutrition for a specific ingredient based on weight using manual data"""
-    nutrition = {}
-    
     # Nutrition values are per 100g
-    ratio = weight_grams / 100.0
-    
-    for key, value in nutrition_data.items():
-        nutrition[key] = value * ratio
-    
-    return nutrition
+    return nutrition_data.scaled(weight_grams / 100.0)
 
 def estimate_nutrition_by_category(ingredient_name, weight_grams):
     """Provide a reasonable nutrition estimate based on ingredient category"""
     category = determine_ingredient_category(ingredient_name)
     
-    # Default nutrition values per 100g for different categories
-    category_nutrition = {
-        "spice": {
-            "calories": 250,
-            "protein": 10,
-            "carbs": 50,
-            "fat": 10,
-            "fiber": 30
-        },
-        "vegetable": {
-            "calories": 65,
-            "protein": 3,
-            "carbs": 12,
-            "fat": 0.5,
-            "fiber": 4
-        },
-        "grain": {
-            "calories": 350,
-            "protein": 10,
-            "carbs": 70,
-            "fat": 2,
-            "fiber": 10
-        },
-        "protein": {
-            "calories": 300,
-            "protein": 20,
-            "carbs": 40,
-            "fat": 5,
-            "fiber": 10
-        },
-        "liquid": {
-            "calories": 40,
-            "protein": 1,
-            "carbs": 5,
-            "fat": 1,
-            "fiber": 0
-        },
-        "default": {
-            "calories": 150,
-            "protein": 5,
-            "carbs": 20,
-            "fat": 5,
-            "fiber": 5
-        }
-    }
-    
     # Get nutrition values for this category
-    nutrition_values = category_nutrition.get(category, category_nutrition["default"])
+    nutrition_values = CATEGORY_NUTRITION_VECTORS.get(category, CATEGORY_NUTRITION_VECTORS["default"])
     
     # Calculate nutrition based on weight
-    ratio = weight_grams / 100.0
-    nutrition = {}
-    
-    for key, value in nutrition_values.items():
-        nutrition[key] = value * ratio
-    
-    return nutrition
+    return nutrition_values.scaled(weight_grams / 100.0)
 
 def fuzzy_match_ingredient(db, ingredient_name):
     """Use fuzzy matching to find the closest ingredient in database"""
     try:
-        collection = db["nutrition_source"]
+        # The similarity index replaces the full-collection scan when it is built
+        if get_ingredient_index() is not None:
+            similar = find_similar_food(ingredient_name, app_config.MATCH_INDEX_FUZZY_SIMILARITY)
+            return get_food_by_name(db, similar[0]) if similar else None
         
-        # Get all ingredient names from database
-        all_ingredients = []
-        cursor = collection.find({}, {"food_name": 1})
-        for doc in cursor:
-            if "food_name" in doc:
-                all_ingredients.append(doc["food_name"])
+        # Get all ingredient names from the nutrient table or database
+        table = get_nutrient_table()
+        if table is not None:
+            all_ingredients = table.names()
+        else:
+            all_ingredients = [doc["food_name"] for doc in db["nutrition_source"].find({}, {"food_name": 1})
+                               if "food_name" in doc]
         
         if not all_ingredients:
             return None
@@ -747,36 +921,28 @@ def fuzzy_match_ingredient(db, ingredient_name):
         
         # Only accept match if score is above threshold
         if score >= 70:
-            result = collection.find_one({"food_name": best_match})
-            logger.info(f"Fuzzy matched {ingredient_name} to {best_match} with score {score}")
+            result = get_food_by_name(db, best_match)
+            logger.debug("Fuzzy matched %s to %s with score %s", ingredient_name, best_match, score, extra=SAMPLED)
             return result
     
     except Exception as e:
-        logger.error(f"Error in fuzzy matching: {str(e)}")
+        logger.error("Error in fuzzy matching: %s", e)
     
     return None
 
 def calculate_ingredient_nutrition(db_ingredient, weight_grams):
     """Calculate nutrition for a specific ingredient based on weight"""
-    nutrition = {}
-    
     # Nutrition values in database are per 100g
     ratio = weight_grams / 100.0
     
-    # Map to the correct field names based on the database structure
-    nutrition_mapping = {
-        "calories": "energy_kcal",
-        "protein": "protein_g",
-        "carbs": "carb_g",
-        "fat": "fat_g",
-        "fiber": "fibre_g"
-    }
-    
-    for key, db_key in nutrition_mapping.items():
-        if db_key in db_ingredient and db_ingredient[db_key] is not None:
-            nutrition[key] = db_ingredient[db_key] * ratio
+    # Fields the food doesn't have stay NaN (no data) rather than counting as 0
+    if isinstance(db_ingredient, TableRow):
+        # One gather from the mapped row
+        values = db_ingredient.take(db_ingredient.table.column_ids(NUTRIENT_FIELDS))
+    else:
+        values = np.array([db_ingredient.get(field) for field in NUTRIENT_FIELDS], dtype=float)
     
-    return nutrition
+    return NutrientVector((values * DB_FIELD_SCALES * ratio).tolist())
 
 def validate_nutrition_totals(nutrition_totals, ingredients):
     """Apply validation and sanity checks to calculated nutrition totals"""
@@ -787,8 +953,7 @@ def validate_nutrition_totals(nutrition_totals, ingredients):
         multiplier = 250 / max(nutrition_totals["calories"], 1)  # Ensure we don't divide by zero
         multiplier = min(multiplier, 10)  # Cap the multiplier at 10x
         
-        for key in nutrition_totals:
-            nutrition_totals[key] *= multiplier
+        nutrition_totals.scale(multiplier)
     
     # Check if fiber content is unrealistically high (more than 30% of total weight)
     total_weight_estimate = (nutrition_totals["protein"] + 
@@ -802,7 +967,7 @@ def validate_nutrition_totals(nutrition_totals, ingredients):
     
     # Cap fiber at realistic levels for Indian dishes
     if nutrition_totals["fiber"] > 10:
-        logger.warning(f"Capping unrealistically high fiber: {nutrition_totals['fiber']:.1f}g → 8.0g")
+        logger.warning("Capping unrealistically high fiber: %.1fg → 8.0g", nutrition_totals["fiber"])
         nutrition_totals["fiber"] = 8.0
     
     # Check if macros add up (protein + carbs + fat should be reasonable compared to calories)
@@ -816,14 +981,4 @@ def validate_nutrition_totals(nutrition_totals, ingredients):
         nutrition_totals["calories"] = calorie_from_macros
     
     # Ensure minimum reasonable values for a dish
-    min_values = {
-        "calories": 100,
-        "protein": 2,
-        "carbs": 10,
-        "fat": 2,
-        "fiber": 1
-    }
-    
-    for key, min_val in min_values.items():
-        if nutrition_totals[key] < min_val:
-            nutrition_totals[key] = min_val
+    apply_rules(nutrition_totals, "totals")
@@ -0,0 +1,95 @@
+import os
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from config import app_config
+
+logger = logging.getLogger(__name__)
+
+class LatencyBudget:
+    """
+    Time left for one dish calculation, and the parts that fell back to estimates
+
+    Pipeline stages ask for the remaining time, bound their slow calls with
+    call_within, and mark what they had to estimate. Calls that run past the
+    budget keep going in the background, so their results (e.g. a fetched
+    recipe) still reach the caches.
+    """
+
+    def __init__(self, seconds):
+        self.deadline = time.monotonic() + seconds
+        self.estimates = set()
+        self.pending = []  # Futures of calls that outlived the budget
+
+    def remaining(self, reserve=0.0):
+        """Seconds left, minus reserve (may be negative)"""
+        return self.deadline - time.monotonic() - reserve
+
+    def mark_estimated(self, part):
+        """Record that part of the result (e.g. "recipe") is an estimate"""
+        self.estimates.add(part)
+
+_pool = None
+_pool_pid = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    """
+    Bounded pool for budgeted calls, with one slot per worker thread
+
+    Created lazily and again after a fork, since worker threads don't survive
+    into gunicorn's forked workers.
+    """
+    global _pool, _pool_pid, _pool_slots
+    if _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool_pid != os.getpid():
+                _pool = ThreadPoolExecutor(max_workers=app_config.LATENCY_CALL_WORKERS,
+                                           thread_name_prefix="latency-budget")
+                _pool_slots = threading.BoundedSemaphore(app_config.LATENCY_CALL_WORKERS)
+                _pool_pid = os.getpid()
+    return _pool, _pool_slots
+
+def call_within(budget, fn, *args, reserve=0.0, **kwargs):
+    """
+    Call fn, giving up once the budget (minus reserve) runs out
+
+    Without a budget fn simply runs in the caller's thread.
+
+    Args:
+        budget (LatencyBudget): Budget of the calculation, or None
+        fn (callable): Slow call, e.g. an OpenAI or MongoDB round trip
+        reserve (float): Seconds to keep for the stages after this one
+
+    Returns:
+        The return value of fn
+
+    Raises:
+        TimeoutError: If fn didn't finish in time; it keeps running in the
+            background and its future is added to budget.pending. Also
+            raised without calling fn when every LATENCY_CALL_WORKERS thread
+            is busy (e.g. with calls that outlived earlier budgets), so a
+            slow upstream makes requests fall back instead of piling up
+    """
+    if budget is None:
+        return fn(*args, **kwargs)
+    timeout = budget.remaining(reserve)
+    if timeout <= 0:
+        raise TimeoutError()
+
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        logger.warning("All %d budgeted call threads are busy, falling back for %s",
+                       app_config.LATENCY_CALL_WORKERS, getattr(fn, "__name__", fn))
+        raise TimeoutError()
+    # Copy the context so the call logs under the caller's request id
+    future = pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        budget.pending.append(future)
+        raise
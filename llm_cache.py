@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import atexit
+import argparse
+import threading
+from config import app_config
+import remote_cache
+
+logger = logging.getLogger(__name__)
+
+# Responses keyed by a hash of the request, so any caller sending the same
+# (model, messages, temperature) gets the stored answer without an API call
+_SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    content TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS llm_responses_accessed ON llm_responses (accessed_at);
+CREATE INDEX IF NOT EXISTS llm_responses_created ON llm_responses (created_at);
+-- Running entry count and size, kept by triggers so the size limits never need a scan
+CREATE TABLE IF NOT EXISTS llm_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO llm_meta SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses;
+CREATE TRIGGER IF NOT EXISTS llm_responses_insert AFTER INSERT ON llm_responses BEGIN
+    UPDATE llm_meta SET entries = entries + 1, bytes = bytes + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS llm_responses_delete AFTER DELETE ON llm_responses BEGIN
+    UPDATE llm_meta SET entries = entries - 1, bytes = bytes - old.size;
+END;
+CREATE TRIGGER IF NOT EXISTS llm_responses_resize AFTER UPDATE OF size ON llm_responses BEGIN
+    UPDATE llm_meta SET bytes = bytes + new.size - old.size;
+END;
+COMMIT;
+"""
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "remote_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+# Hits not yet written to the store: key -> [hits, last access time]. Reads
+# stay read-only; the counts go out in one write every LLM_CACHE_TOUCH_INTERVAL
+_pending_touches = {}
+_last_touch_flush = time.monotonic()
+
+def request_key(model, messages, temperature):
+    """
+    Content address of a chat completion request
+
+    Args:
+        model (str): Model name
+        messages (list): Chat messages as sent to the API
+        temperature (float): Sampling temperature
+
+    Returns:
+        str: Hex SHA-256 of the canonical JSON of the request
+    """
+    canonical = json.dumps({"model": model, "messages": messages, "temperature": temperature},
+                           sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(canonical).hexdigest()
+
+_local = threading.local()
+_initialized = set()  # (pid, path) pairs whose schema is set up
+
+def _connect():
+    """
+    This thread's connection to the store, opened on first use
+
+    The schema and WAL mode are set up once per process and path; each
+    thread keeps its connection open because sqlite3 connections can't be
+    shared between threads, and reopens it after a fork or a path change.
+    """
+    path = app_config.LLM_CACHE_PATH
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.owner == (os.getpid(), path):
+        return conn
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5)
+    owner = (os.getpid(), path)
+    with _lock:
+        if owner not in _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _initialized.add(owner)
+    _local.conn, _local.owner = conn, owner
+    return conn
+
+def _count(stat):
+    with _lock:
+        _stats[stat] += 1
+
+def get_response(key, model=None):
+    """
+    Stored response content for a request key, or None if missing or expired
+
+    Falls back to the remote tier, so a prompt answered on another node is
+    reused here. Remote hits are copied into the local store, so the next
+    lookup doesn't need the network.
+    """
+    try:
+        with _connect() as conn:
+            row = conn.execute("SELECT content, created_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row and time.time() - row[1] < app_config.LLM_CACHE_TTL:
+                _touch(key)
+                return row[0]
+    except sqlite3.Error as e:
+        logger.warning("Failed to read LLM cache: %s", e)
+
+    cached = remote_cache.get_value("llm", key)
+    if cached is not None:
+        _count("remote_hits")
+        content = cached.decode("utf-8")
+        _store_local(key, model or "unknown", content)
+        return content
+    _count("misses")
+    return None
+
+def _touch(key):
+    """Count a hit, flushing the pending hits once LLM_CACHE_TOUCH_INTERVAL has passed"""
+    with _lock:
+        _stats["hits"] += 1
+        pending = _pending_touches.setdefault(key, [0, 0.0])
+        pending[0] += 1
+        pending[1] = time.time()
+        due = time.monotonic() - _last_touch_flush >= app_config.LLM_CACHE_TOUCH_INTERVAL
+    if due:
+        flush_touches()
+
+def flush_touches():
+    """Write pending hit counts and access times in one transaction"""
+    global _pending_touches, _last_touch_flush
+    with _lock:
+        touches, _pending_touches = _pending_touches, {}
+        _last_touch_flush = time.monotonic()
+    if not touches:
+        return
+    try:
+        with _connect() as conn:
+            conn.executemany("UPDATE llm_responses SET hits = hits + ?, accessed_at = MAX(accessed_at, ?) "
+                             "WHERE key = ?", [(hits, accessed_at, key) for key, (hits, accessed_at) in touches.items()])
+    except sqlite3.Error as e:
+        logger.warning("Failed to record %d LLM cache hits: %s", len(touches), e)
+
+def store_response(key, model, content):
+    """Store response content, evicting least recently used entries over the size limits"""
+    if _store_local(key, model, content):
+        _count("stores")
+    remote_cache.set_value("llm", key, content.encode("utf-8"), app_config.LLM_CACHE_TTL)
+
+def _store_local(key, model, content):
+    """Write a response to the local store only; returns False if that failed"""
+    now = time.time()
+    size = len(content.encode("utf-8"))
+    try:
+        with _connect() as conn:
+            # An upsert, not INSERT OR REPLACE, whose implicit delete wouldn't fire the size triggers
+            conn.execute("INSERT INTO llm_responses (key, model, content, size, created_at, accessed_at) "
+                         "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET model = excluded.model, "
+                         "content = excluded.content, size = excluded.size, created_at = excluded.created_at, "
+                         "accessed_at = excluded.accessed_at", (key, model, content, size, now, now))
+            _evict(conn)
+        return True
+    except sqlite3.Error as e:
+        logger.warning("Failed to store LLM response: %s", e)
+        return False
+
+def _evict(conn):
+    """Drop expired entries, then the least recently used until within the limits"""
+    evicted = conn.execute("DELETE FROM llm_responses WHERE created_at < ?",
+                           (time.time() - app_config.LLM_CACHE_TTL,)).rowcount
+    entries, total = conn.execute("SELECT entries, bytes FROM llm_meta").fetchone()
+    while entries > app_config.LLM_CACHE_MAX_ENTRIES or total > app_config.LLM_CACHE_MAX_BYTES:
+        # Evict in batches of a tenth so a full cache doesn't delete on every store
+        evicted += conn.execute("DELETE FROM llm_responses WHERE key IN (SELECT key FROM llm_responses "
+                                "ORDER BY accessed_at LIMIT ?)", (max(1, entries // 10),)).rowcount
+        entries, total = conn.execute("SELECT entries, bytes FROM llm_meta").fetchone()
+    if evicted:
+        with _lock:
+            _stats["evictions"] += evicted
+
+def cached_chat_completion(client, model, messages, temperature, validate=None):
+    """
+    Chat completion content, served from the LLM cache when the same request was made before
+
+    Args:
+        client (openai.OpenAI): Client used on a miss
+        model (str): Model name
+        messages (list): Chat messages
+        temperature (float): Sampling temperature
+        validate (callable, optional): Returns False for content that must
+            not be cached (e.g. unparseable JSON), so the request is retried
+
+    Returns:
+        str: Content of the first choice
+    """
+    if not app_config.LLM_CACHE_ENABLED:
+        response = client.chat.completions.create(model=model, messages=messages, temperature=temperature)
+        return response.choices[0].message.content
+
+    key = request_key(model, messages, temperature)
+    content = get_response(key, model)
+    if content is not None:
+        logger.debug("LLM cache hit for %s request %s", model, key[:12])
+        return content
+
+    response = client.chat.completions.create(model=model, messages=messages, temperature=temperature)
+    content = response.choices[0].message.content
+    if validate is None or validate(content):
+        store_response(key, model, content)
+    return content
+
+def stats():
+    """
+    Counters of this process plus totals of the store
+
+    Returns:
+        dict: Process hits, remote_hits, misses, stores and evictions; stored
+            entries, bytes and lifetime hits per model
+    """
+    flush_touches()
+    with _lock:
+        result = dict(_stats)
+    with _connect() as conn:
+        result["models"] = {model: {"entries": entries, "bytes": size, "hits": hits} for model, entries, size, hits in
+                            conn.execute("SELECT model, COUNT(*), SUM(size), SUM(hits) FROM llm_responses GROUP BY model")}
+    return result
+
+def clear():
+    """Delete every stored response"""
+    with _connect() as conn:
+        conn.execute("DELETE FROM llm_responses")
+
+atexit.register(flush_touches)
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM response cache")
+    parser.add_argument("command", choices=["stats", "clear"])
+    args = parser.parse_args()
+    if args.command == "clear":
+        clear()
+        print("LLM cache cleared")
+        return
+    totals = stats()["models"]
+    if not totals:
+        print("LLM cache is empty")
+    for model, row in totals.items():
+        print(f"{model:<20}{row['entries']:>8} entries{row['bytes'] / 1024:>10.1f} KiB{row['hits']:>8} hits")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import os
+import sys
+import time
+import uuid
+import queue
+import atexit
+import random
+import logging
+import contextvars
+from logging.handlers import QueueHandler, QueueListener
+from config import app_config
+from serializer import dumps
+
+# Request id of the work currently being logged, set per request or job
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+# Pass as extra= on high-volume per-ingredient debug lines so they are sampled
+SAMPLED = {"sampled": True}
+
+_queue_handler = None
+_listener = None
+_output_handlers = []
+
+def new_request_id(request_id=None):
+    """
+    Set the request id for log records emitted in the current context
+
+    Args:
+        request_id (str, optional): Id to use, e.g. from an X-Request-ID header
+
+    Returns:
+        str: The id now in effect
+    """
+    request_id = request_id or uuid.uuid4().hex[:16]
+    request_id_var.set(request_id)
+    return request_id
+
+class RequestIdFilter(logging.Filter):
+    """Attach the current request id to each record"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records logged with extra=SAMPLED"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if getattr(record, "sampled", False):
+            return self.rate >= 1 or random.random() < self.rate
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return dumps(entry).decode("utf-8")
+
+class LazyQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves message formatting to the listener thread
+
+    The stock QueueHandler merges msg and args in the calling thread. Log
+    arguments in this code base are immutable values, so the record can be
+    passed on as-is and formatted off the request path.
+    """
+
+    def prepare(self, record):
+        if record.exc_info:
+            # Tracebacks hold frames that should not outlive the call
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def _parse_module_levels(spec):
+    """Parse "module=LEVEL,other=LEVEL" into a dict"""
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def _start_listener():
+    global _listener
+    log_queue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_output_handlers, respect_handler_level=True)
+    _listener.start()
+
+def _stop_listener():
+    if _listener:
+        _listener.stop()
+
+def setup_logging():
+    """
+    Configure logging once for the whole process
+
+    Records go through a queue to a background listener thread that
+    formats and writes them, so request threads never block on I/O.
+    Output is JSON lines by default (LOG_FORMAT=text for plain text), levels
+    come from LOG_LEVEL and LOG_MODULE_LEVELS, and records logged with
+    extra=SAMPLED are kept at LOG_SAMPLE_RATE.
+    """
+    global _queue_handler
+    if _queue_handler is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if app_config.LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+        formatter.converter = time.gmtime
+        stream_handler.setFormatter(formatter)
+    _output_handlers.append(stream_handler)
+
+    _queue_handler = LazyQueueHandler(queue.SimpleQueue())
+    # Filters on the queue handler run in the logging thread, where the request context lives
+    _queue_handler.addFilter(RequestIdFilter())
+    _queue_handler.addFilter(SamplingFilter(app_config.LOG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(app_config.LOG_LEVEL)
+
+    for name, level in _parse_module_levels(app_config.LOG_MODULE_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    _start_listener()
+    atexit.register(_stop_listener)
+    # Listener threads don't survive fork (gunicorn preload), so start a fresh one in each child
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_start_listener)
@@ -0,0 +1,249 @@
+import os
+import time
+import atexit
+import random
+import sqlite3
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from config import app_config
+
+logger = logging.getLogger(__name__)
+
+# Counters are kept in memory and added to the SQLite tables in batches by a
+# background thread, so lookups never wait on disk and several processes can
+# share one stats file
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tier_stats (
+    pattern TEXT NOT NULL,
+    tier TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0,
+    miss_ms REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (pattern, tier)
+);
+CREATE TABLE IF NOT EXISTS alias_candidates (
+    ingredient TEXT NOT NULL,
+    food_name TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (ingredient, food_name)
+);
+"""
+
+_lock = threading.Lock()  # guards the pending counters and the loaded snapshot, never held over I/O
+_flush_lock = threading.Lock()  # one flush at a time
+_pending_tiers = defaultdict(lambda: [0, 0, 0.0])  # (pattern, tier) -> [hits, misses, miss_ms]
+_pending_aliases = defaultdict(int)  # (ingredient, food_name) -> hits
+_pending_count = 0
+_tier_stats = {}  # (pattern, tier) -> (hits, misses), as of the last flush
+_aliases = {}  # ingredient -> food_name, promoted candidates only
+_flush_wanted = threading.Event()
+_flusher_pid = None
+
+def name_pattern(ingredient_name):
+    """
+    Group names whose tiers tend to behave alike: by their last word
+    ("*powder", "*seeds", "*dal"), where Indian ingredient names put the form
+    """
+    words = ingredient_name.split()
+    return f"*{words[-1]}" if words else "*"
+
+def _connect():
+    directory = os.path.dirname(app_config.MATCH_STATS_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(app_config.MATCH_STATS_PATH, timeout=5)
+    conn.executescript(_SCHEMA)
+    return conn
+
+def _load():
+    """Read current totals and promoted aliases, then swap them in"""
+    global _tier_stats, _aliases
+    tier_stats, aliases = {}, {}
+    try:
+        with _connect() as conn:
+            for pattern, tier, hits, misses in conn.execute("SELECT pattern, tier, hits, misses FROM tier_stats"):
+                tier_stats[(pattern, tier)] = (hits, misses)
+            for ingredient, food_name in conn.execute(
+                    "SELECT ingredient, food_name FROM alias_candidates WHERE hits >= ? ORDER BY hits",
+                    (app_config.MATCH_ALIAS_PROMOTE_AFTER,)):
+                aliases[ingredient] = food_name
+    except sqlite3.Error as e:
+        logger.warning("Failed to load match stats: %s", e)
+    with _lock:
+        _tier_stats, _aliases = tier_stats, aliases
+
+def _flusher():
+    """Background thread: load the stats, then flush when asked or every MATCH_STATS_FLUSH_INTERVAL"""
+    _load()
+    while True:
+        _flush_wanted.wait(app_config.MATCH_STATS_FLUSH_INTERVAL)
+        _flush_wanted.clear()
+        try:
+            flush()
+        except Exception as e:
+            logger.warning("Match stats flush failed: %s", e)
+
+def _ensure_flusher():
+    """
+    Start the background flusher of this process
+
+    Started again after a fork, since threads don't survive into gunicorn's
+    forked workers. Until its first load completes, lookups see no stats:
+    no tier is skipped and no alias is used.
+    """
+    global _flusher_pid
+    if _flusher_pid != os.getpid():
+        with _lock:
+            if _flusher_pid != os.getpid():
+                _flusher_pid = os.getpid()
+                threading.Thread(target=_flusher, name="match-stats-flush", daemon=True).start()
+
+def flush():
+    """Add pending counters to the stats file and reload the merged totals"""
+    global _pending_tiers, _pending_aliases, _pending_count
+    with _flush_lock:
+        # Swap the pending counters under the lock; write them outside it
+        with _lock:
+            tiers, aliases = _pending_tiers, _pending_aliases
+            _pending_tiers, _pending_aliases = defaultdict(lambda: [0, 0, 0.0]), defaultdict(int)
+            _pending_count = 0
+        if not tiers and not aliases:
+            return
+        now = time.time()
+        try:
+            with _connect() as conn:
+                conn.executemany(
+                    "INSERT INTO tier_stats (pattern, tier, hits, misses, miss_ms) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (pattern, tier) DO UPDATE SET hits = hits + excluded.hits, "
+                    "misses = misses + excluded.misses, miss_ms = miss_ms + excluded.miss_ms",
+                    [(pattern, tier, *counts) for (pattern, tier), counts in tiers.items()])
+                conn.executemany(
+                    "INSERT INTO alias_candidates (ingredient, food_name, hits, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (ingredient, food_name) DO UPDATE SET hits = hits + excluded.hits, "
+                    "updated_at = excluded.updated_at",
+                    [(ingredient, food_name, hits, now) for (ingredient, food_name), hits in aliases.items()])
+        except sqlite3.Error as e:
+            logger.warning("Failed to save match stats: %s", e)
+        _load()
+
+def record_tier(pattern, tier, hit, elapsed):
+    """
+    Count one attempt of a match tier
+
+    Args:
+        pattern (str): name_pattern() of the ingredient
+        tier (str): Tier name, e.g. "partial"
+        hit (bool): Whether the tier found a match
+        elapsed (float): Seconds the attempt took (summed for misses)
+    """
+    global _pending_count
+    if not app_config.MATCH_STATS_ENABLED:
+        return
+    with _lock:
+        counts = _pending_tiers[(pattern, tier)]
+        if hit:
+            counts[0] += 1
+        else:
+            counts[1] += 1
+            counts[2] += elapsed * 1000
+        _pending_count += 1
+        full = _pending_count >= app_config.MATCH_STATS_FLUSH_EVERY
+    _ensure_flusher()
+    if full:
+        _flush_wanted.set()
+
+def record_alias_candidate(ingredient_name, food_name):
+    """Count a slow-tier resolution; repeated ones are promoted to aliases"""
+    global _pending_count
+    if not app_config.MATCH_STATS_ENABLED:
+        return
+    with _lock:
+        _pending_aliases[(ingredient_name, food_name)] += 1
+        _pending_count += 1
+        full = _pending_count >= app_config.MATCH_STATS_FLUSH_EVERY
+    _ensure_flusher()
+    if full:
+        _flush_wanted.set()
+
+def get_alias(ingredient_name):
+    """Return the learned food_name for an ingredient, or None"""
+    if not app_config.MATCH_STATS_ENABLED:
+        return None
+    _ensure_flusher()
+    return _aliases.get(ingredient_name)
+
+def should_skip_tier(pattern, tier):
+    """
+    True if a tier practically never hits for this name pattern
+
+    A small fraction of lookups still run skipped tiers (MATCH_EXPLORE_RATE)
+    so the stats notice when the database changes.
+    """
+    if not app_config.MATCH_STATS_ENABLED:
+        return False
+    _ensure_flusher()
+    hits, misses = _tier_stats.get((pattern, tier), (0, 0))
+    if hits + misses < app_config.MATCH_SKIP_MIN_SAMPLES:
+        return False
+    if hits / (hits + misses) >= app_config.MATCH_SKIP_MAX_HIT_RATE:
+        return False
+    return random.random() >= app_config.MATCH_EXPLORE_RATE
+
+def report(limit=30):
+    """Print tier hit rates, miss latency and learned aliases"""
+    flush()
+    with _connect() as conn:
+        print("Tier totals")
+        print(f"  {'tier':<12}{'hits':>8}{'misses':>8}{'hit rate':>10}{'avg miss ms':>13}")
+        for tier, hits, misses, miss_ms in conn.execute(
+                "SELECT tier, SUM(hits), SUM(misses), SUM(miss_ms) FROM tier_stats GROUP BY tier ORDER BY SUM(hits) DESC"):
+            total = hits + misses
+            print(f"  {tier:<12}{hits:>8}{misses:>8}{100 * hits / total:>9.1f}%{miss_ms / misses if misses else 0:>13.1f}")
+
+        print(f"\nPattern/tier pairs by time lost to misses (top {limit}, * = currently skipped)")
+        print(f"  {'pattern':<20}{'tier':<12}{'hits':>8}{'misses':>8}{'miss ms':>10}")
+        for pattern, tier, hits, misses, miss_ms in conn.execute(
+                "SELECT pattern, tier, hits, misses, miss_ms FROM tier_stats ORDER BY miss_ms DESC LIMIT ?", (limit,)):
+            skipped = (tier != "exact" and hits + misses >= app_config.MATCH_SKIP_MIN_SAMPLES
+                       and hits / (hits + misses) < app_config.MATCH_SKIP_MAX_HIT_RATE)
+            print(f"  {pattern:<20}{tier:<12}{hits:>8}{misses:>8}{miss_ms:>10.0f}{' *' if skipped else ''}")
+
+        print(f"\nLearned aliases (promoted after {app_config.MATCH_ALIAS_PROMOTE_AFTER} slow-tier hits)")
+        rows = conn.execute("SELECT ingredient, food_name, hits FROM alias_candidates WHERE hits >= ? "
+                            "ORDER BY hits DESC LIMIT ?", (app_config.MATCH_ALIAS_PROMOTE_AFTER, limit)).fetchall()
+        for ingredient, food_name, hits in rows:
+            print(f"  {ingredient:<30} -> {food_name} ({hits})")
+        if not rows:
+            print("  none yet")
+
+def reset():
+    """Delete all collected stats and aliases"""
+    global _pending_count, _tier_stats, _aliases
+    with _flush_lock:
+        with _lock:
+            _pending_tiers.clear()
+            _pending_aliases.clear()
+            _pending_count = 0
+            _tier_stats, _aliases = {}, {}
+        with _connect() as conn:
+            conn.execute("DELETE FROM tier_stats")
+            conn.execute("DELETE FROM alias_candidates")
+
+atexit.register(flush)
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingredient match-tier statistics")
+    parser.add_argument("command", choices=["report", "reset"])
+    parser.add_argument("--limit", type=int, default=30, help="rows per report section")
+    args = parser.parse_args()
+    if args.command == "report":
+        report(args.limit)
+    else:
+        reset()
+        print("Match stats cleared")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from config import app_config
+from nutrition_records import NUTRIENT_KEYS, NUTRIENT_INDEX, NutrientVector
+from nutrition_calculator import get_nutrition_for_dish
+from result_cache import normalize_dish_name, prefetch_results
+
+logger = logging.getLogger(__name__)
+
+def parse_components(components):
+    """
+    Validate a meal's component list
+
+    Args:
+        components (list): [{"dish_name": ..., "portions": ...}] or plain dish names
+            (one portion each)
+
+    Returns:
+        list: (normalized dish name, portions) tuples
+
+    Raises:
+        ValueError: If a component is malformed
+    """
+    if not isinstance(components, list) or not components:
+        raise ValueError("A meal needs a non-empty list of components")
+
+    parsed = []
+    for component in components:
+        if isinstance(component, str):
+            component = {"dish_name": component}
+        if not isinstance(component, dict) or not str(component.get("dish_name", "")).strip():
+            raise ValueError("Each component needs a dish_name")
+
+        portions = component.get("portions", 1)
+        if isinstance(portions, bool) or not isinstance(portions, (int, float)) or portions < 0:
+            raise ValueError(f"Invalid portions for {component['dish_name']}: {portions!r}")
+        parsed.append((normalize_dish_name(component["dish_name"]), float(portions)))
+    return parsed
+
+def get_serving_key(result):
+    """Return the "estimated_nutrition_per_..." key of a dish result, or None"""
+    return next((key for key in result if key.startswith("estimated_nutrition_per_")), None)
+
+def resolve_dishes(dish_names):
+    """
+    Fetch results for many dishes concurrently through the result cache
+
+    Results held only by the remote tier are fetched in one pipelined round
+    trip first. Cached dishes return immediately; misses are calculated in
+    parallel (and cached) so one slow dish doesn't serialize the whole meal.
+
+    Args:
+        dish_names (list): Normalized dish names, without duplicates
+
+    Returns:
+        dict: Dish name -> nutrition result
+
+    Raises:
+        AdmissionRejected: If a miss may not be computed now
+    """
+    if not dish_names:
+        return {}
+    prefetch_results(dish_names)
+    workers = max(1, min(app_config.MEAL_RESOLVE_CONCURRENCY, len(dish_names)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Each lookup runs in a copy of the caller's context, so cold dishes
+        # count against the requesting client's admission limits
+        contexts = [contextvars.copy_context() for _ in dish_names]
+        return dict(zip(dish_names, executor.map(
+            lambda context, dish_name: context.run(get_nutrition_for_dish, dish_name), contexts, dish_names)))
+
+def build_dish_matrix(dish_names, results):
+    """
+    Stack per-serving nutrient values into a (dishes, nutrients) matrix
+
+    Dishes that failed to calculate get a zero row. Nutrients a dish has no
+    data for are NaN, so totals including that dish are unknown (null).
+
+    Returns:
+        np.ndarray: Shape (len(dish_names), len(NUTRIENT_KEYS))
+    """
+    matrix = np.zeros((len(dish_names), len(NUTRIENT_KEYS)))
+    for i, dish_name in enumerate(dish_names):
+        result = results[dish_name]
+        key = get_serving_key(result)
+        if key:
+            matrix[i] = NutrientVector.from_mapping(result[key]).values
+    return matrix
+
+def build_portion_matrix(plans, dish_index):
+    """
+    Turn parsed plans into a (plans, dishes) matrix of portion counts
+
+    Args:
+        plans (list): Lists of (dish name, portions) tuples
+        dish_index (dict): Dish name -> column
+
+    Returns:
+        np.ndarray: Shape (len(plans), len(dish_index))
+    """
+    portions = np.zeros((len(plans), len(dish_index)))
+    for row, plan in enumerate(plans):
+        for dish_name, count in plan:
+            portions[row, dish_index[dish_name]] += count
+    return portions
+
+def evaluate_plans(plans, nutrients=None):
+    """
+    Compute nutrient totals for many plans at once
+
+    Every distinct dish is resolved once, then all plan totals come from a
+    single matrix product: (plans x dishes) portions @ (dishes x nutrients).
+    A total is NaN only if the plan has a portion of a dish without data
+    for that nutrient.
+
+    Args:
+        plans (list): Lists of (dish name, portions) tuples from parse_components
+        nutrients (tuple, optional): Nutrient columns to compute, in output
+            order (default: all of NUTRIENT_KEYS)
+
+    Returns:
+        tuple: (totals array of shape (len(plans), len(nutrients)),
+            dish name -> result dict, dish name -> column index)
+    """
+    dish_names = list(dict.fromkeys(dish_name for plan in plans for dish_name, _ in plan))
+    if len(dish_names) > app_config.MEAL_MAX_DISHES:
+        raise ValueError(f"Too many distinct dishes (max {app_config.MEAL_MAX_DISHES})")
+
+    results = resolve_dishes(dish_names)
+    dish_index = {dish_name: i for i, dish_name in enumerate(dish_names)}
+    dish_matrix = build_dish_matrix(dish_names, results)
+    if nutrients:
+        # Only the requested columns go through the product
+        dish_matrix = dish_matrix[:, [NUTRIENT_INDEX[key] for key in nutrients]]
+    portions = build_portion_matrix(plans, dish_index)
+    # 0 * NaN is NaN, so multiply known values only and mark unknown totals
+    # just for the plans that contain a dish without data
+    totals = portions @ np.nan_to_num(dish_matrix)
+    totals[((portions > 0) @ np.isnan(dish_matrix)) > 0] = np.nan
+    return totals, results, dish_index
+
+def _totals_dict(values, nutrients=None):
+    # NaN: a dish of the plan has no data for the nutrient, so the total is unknown
+    return {key: round(float(value), 1) if value == value else None
+            for key, value in zip(nutrients or NUTRIENT_KEYS, values)}
+
+def _errors(results):
+    return {dish_name: result["error"] for dish_name, result in results.items() if "error" in result}
+
+def calculate_meal(components, nutrients=None):
+    """
+    Aggregate nutrition for one meal such as "2 roti + dal makhani + rice"
+
+    Args:
+        components (list): See parse_components
+        nutrients (tuple, optional): Nutrients to report (default: all)
+
+    Returns:
+        dict: Per-component values and meal totals
+    """
+    plan = parse_components(components)
+    totals, results, dish_index = evaluate_plans([plan], nutrients)
+
+    items = []
+    for dish_name, portions in plan:
+        result = results[dish_name]
+        key = get_serving_key(result)
+        serving = NutrientVector.from_mapping(result[key]) if key else NutrientVector()
+        items.append({
+            "dish_name": dish_name,
+            "dish_type": result.get("dish_type"),
+            "portions": portions,
+            "serving": key[len("estimated_nutrition_per_"):] if key else None,
+            "nutrition": serving.scale(portions).to_dict(digits=1, keys=nutrients)
+        })
+
+    meal = {"components": items, "total_nutrition": _totals_dict(totals[0], nutrients)}
+    errors = _errors(results)
+    if errors:
+        meal["errors"] = errors
+    return meal
+
+def calculate_day_plan(meals, nutrients=None):
+    """
+    Aggregate nutrition for a daily plan made of named meals
+
+    Args:
+        meals (dict): Meal name -> component list, e.g. {"lunch": ["roti", "dal makhani"]}
+        nutrients (tuple, optional): Nutrients to report (default: all)
+
+    Returns:
+        dict: Totals per meal and for the whole day
+    """
+    if not isinstance(meals, dict) or not meals:
+        raise ValueError("A plan needs a non-empty mapping of meal name to components")
+
+    names = list(meals)
+    totals, results, _ = evaluate_plans([parse_components(meals[name]) for name in names], nutrients)
+
+    plan = {
+        "meals": {name: _totals_dict(row, nutrients) for name, row in zip(names, totals)},
+        "total_nutrition": _totals_dict(totals.sum(axis=0), nutrients)
+    }
+    errors = _errors(results)
+    if errors:
+        plan["errors"] = errors
+    return plan
+
+def evaluate_plans_bulk(plans, nutrients=None):
+    """
+    Evaluate thousands of candidate plans for a planner's search loop
+
+    Args:
+        plans (list): Component lists (see parse_components)
+        nutrients (tuple, optional): Nutrient columns to return (default: all)
+
+    Returns:
+        dict: Totals as one row per plan in the order of "nutrients", which
+            keeps the response compact and easy to load into an array
+    """
+    if not isinstance(plans, list) or not plans:
+        raise ValueError("No plans provided")
+    if len(plans) > app_config.MEAL_MAX_PLANS:
+        raise ValueError(f"Too many plans (max {app_config.MEAL_MAX_PLANS})")
+
+    totals, results, _ = evaluate_plans([parse_components(plan) for plan in plans], nutrients)
+    response = {
+        "nutrients": list(nutrients or NUTRIENT_KEYS),
+        # Unknown totals (NaN) as null
+        "totals": np.where(np.isnan(totals), None, np.round(totals, 1)).tolist()
+    }
+    errors = _errors(results)
+    if errors:
+        response["errors"] = errors
+    return response
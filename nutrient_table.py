@@ -0,0 +1,281 @@
+import os
+import mmap
+import struct
+import logging
+import argparse
+import threading
+import numpy as np
+from config import app_config
+from nutrition_records import NUTRIENT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Fixed-layout binary copy of the numeric nutrition_source fields, built with
+# `python nutrient_table.py build`. Workers mmap the file read-only, so every
+# gunicorn worker on a host shares one copy in the page cache and a lookup
+# reads a row as a NumPy view instead of a pymongo round trip and document.
+#
+# File layout (little-endian):
+#   header         see _HEADER: magic, version, row and field counts, section offsets
+#   fields         NUL-separated field names, in column order
+#   names          food_name of every row, UTF-8, concatenated
+#   keys           lower-cased names, concatenated in sorted order
+#   name index     per row: (offset, length) into names
+#   key index      per key, sorted by key bytes: (offset, length, row) into keys
+#   values         float64 matrix, rows x fields, NaN where a document has no value
+_MAGIC = b"VYBNUTR1"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIII4xQQQQQQ")
+_NAME_ENTRY = np.dtype([("offset", "<u4"), ("length", "<u4")])
+_KEY_ENTRY = np.dtype([("offset", "<u4"), ("length", "<u4"), ("row", "<u4")])
+# The value matrix starts on a cache-line boundary
+_ALIGN = 64
+
+# Fields of the nutrient registry come first, in NutrientVector order; every
+# other numeric field found in the collection follows in name order
+CORE_FIELDS = NUTRIENT_FIELDS
+
+class TableRow:
+    """
+    One food of the table, usable wherever a nutrition_source document is read
+
+    get() and [] look fields up by name like a document; values is the
+    row's NumPy view into the shared matrix.
+    """
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __repr__(self):
+        return f"TableRow({self.table.name(self.row)!r})"
+
+    @property
+    def values(self):
+        return self.table.values[self.row]
+
+    def take(self, columns):
+        """Values of the given column ids (see NutrientTable.column_ids), NaN where missing"""
+        values = self.table.values[self.row, columns]
+        values[columns < 0] = np.nan
+        return values
+
+    def get(self, key, default=None):
+        if key == "food_name":
+            return self.table.name(self.row)
+        column = self.table.columns.get(key)
+        if column is None:
+            return default
+        value = self.table.values[self.row, column]
+        return default if value != value else float(value)
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+class NutrientTable:
+    """A memory-mapped nutrient table written by write_table"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = self._mmap
+        (magic, version, rows, field_count, fields_offset, names_offset, keys_offset,
+         name_index_offset, key_index_offset, values_offset) = _HEADER.unpack_from(buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a version {_VERSION} nutrient table")
+
+        self.fields = tuple(bytes(buf[fields_offset:names_offset]).decode("utf-8").split("\0"))[:field_count]
+        self.columns = {field: i for i, field in enumerate(self.fields)}
+        self._column_ids = {}
+        self._names_offset = names_offset
+        self._keys_offset = keys_offset
+        # Views into the mapping; nothing below copies the file
+        self.name_index = np.frombuffer(buf, dtype=_NAME_ENTRY, count=rows, offset=name_index_offset)
+        self.key_index = np.frombuffer(buf, dtype=_KEY_ENTRY, count=rows, offset=key_index_offset)
+        self.values = np.frombuffer(buf, dtype="<f8", count=rows * field_count, offset=values_offset).reshape(rows, field_count)
+
+    def __len__(self):
+        return len(self.values)
+
+    def column_ids(self, fields):
+        """Column number of each field, -1 for fields the table doesn't have"""
+        fields = tuple(fields)
+        ids = self._column_ids.get(fields)
+        if ids is None:
+            ids = self._column_ids[fields] = np.array([self.columns.get(field, -1) for field in fields], dtype=np.intp)
+        return ids
+
+    def name(self, row):
+        """food_name of a row"""
+        offset, length = self.name_index[row]
+        start = self._names_offset + int(offset)
+        return self._mmap[start:start + int(length)].decode("utf-8")
+
+    def _key(self, position):
+        offset, length, _ = self.key_index[position]
+        start = self._keys_offset + int(offset)
+        return self._mmap[start:start + int(length)]
+
+    def find(self, food_name, case_sensitive=False):
+        """
+        Look a food up by name with a binary search over the key index
+
+        Args:
+            food_name (str): Name to find
+            case_sensitive (bool): Require the stored name to match exactly,
+                like find_one({"food_name": name}); otherwise match ignoring
+                case, like a ^name$ regex with the i option
+
+        Returns:
+            TableRow: The first such row in collection order, or None
+        """
+        key = food_name.lower().encode("utf-8")
+        low, high = 0, len(self.key_index)
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        # Rows sharing a key are stored in collection order
+        while low < len(self.key_index) and self._key(low) == key:
+            row = int(self.key_index[low]["row"])
+            if not case_sensitive or self.name(row) == food_name:
+                return TableRow(self, row)
+            low += 1
+        return None
+
+    def names(self):
+        """Every food_name, in collection order"""
+        return [self.name(row) for row in range(len(self))]
+
+def _numeric(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def write_table(path, documents):
+    """
+    Write a nutrient table file from nutrition_source documents
+
+    Args:
+        path (str): Output file; replaced atomically
+        documents (iterable): Documents with a food_name and numeric fields
+
+    Returns:
+        tuple: (row count, field names)
+    """
+    documents = [doc for doc in documents if doc.get("food_name")]
+    extra = sorted({key for doc in documents for key, value in doc.items()
+                    if _numeric(value) and key not in CORE_FIELDS and key != "_id"})
+    fields = list(CORE_FIELDS) + extra
+    rows = len(documents)
+
+    values = np.full((rows, len(fields)), np.nan, dtype="<f8")
+    for row, doc in enumerate(documents):
+        for column, field in enumerate(fields):
+            value = doc.get(field)
+            if _numeric(value):
+                values[row, column] = value
+
+    names = [doc["food_name"].encode("utf-8") for doc in documents]
+    name_index = np.zeros(rows, dtype=_NAME_ENTRY)
+    name_index["length"] = [len(name) for name in names]
+    name_index["offset"][1:] = np.cumsum(name_index["length"])[:-1]
+
+    # Stable sort, so equal keys keep collection order
+    keys = [doc["food_name"].lower().encode("utf-8") for doc in documents]
+    order = sorted(range(rows), key=keys.__getitem__)
+    key_index = np.zeros(rows, dtype=_KEY_ENTRY)
+    key_index["length"] = [len(keys[row]) for row in order]
+    key_index["offset"][1:] = np.cumsum(key_index["length"])[:-1]
+    key_index["row"] = order
+
+    sections = [b"\0".join(field.encode("utf-8") for field in fields), b"".join(names),
+                b"".join(keys[row] for row in order), name_index.tobytes(), key_index.tobytes()]
+    offsets, position = [], _HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+    values_offset = -(-position // _ALIGN) * _ALIGN
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, rows, len(fields), *offsets, values_offset))
+        for section in sections:
+            f.write(section)
+        f.write(b"\0" * (values_offset - position))
+        f.write(values.tobytes())
+    # Workers that already mapped the old file keep reading it until they restart
+    os.replace(tmp_path, path)
+    return rows, fields
+
+_table = None
+_table_loaded = False
+_table_lock = threading.Lock()
+
+def get_nutrient_table():
+    """
+    Return the table built by `python nutrient_table.py build`, mapping it once
+
+    Returns:
+        NutrientTable: The table, or None if it hasn't been built
+    """
+    global _table, _table_loaded
+    if not _table_loaded:
+        with _table_lock:
+            if not _table_loaded:
+                path = app_config.NUTRIENT_TABLE_PATH
+                if os.path.exists(path):
+                    try:
+                        _table = NutrientTable(path)
+                        logger.info("Mapped nutrient table with %d foods and %d fields", len(_table), len(_table.fields))
+                    except Exception as e:
+                        logger.warning("Failed to map nutrient table %s: %s", path, e)
+                _table_loaded = True
+    return _table
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the memory-mapped nutrient table")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="copy every nutrition_source document into the table")
+    subparsers.add_parser("info", help="show the size and fields of the table")
+    lookup_parser = subparsers.add_parser("lookup", help="show the values of one food")
+    lookup_parser.add_argument("name")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        from database import get_nutrition_db_connection
+        db = get_nutrition_db_connection()
+        rows, fields = write_table(app_config.NUTRIENT_TABLE_PATH, db.nutrition_source.find({}))
+        print(f"Wrote {rows} foods x {len(fields)} fields to {app_config.NUTRIENT_TABLE_PATH}")
+        return
+
+    table = get_nutrient_table()
+    if table is None:
+        parser.error(f"No nutrient table at {app_config.NUTRIENT_TABLE_PATH}; run the build command first")
+    if args.command == "info":
+        size = os.path.getsize(app_config.NUTRIENT_TABLE_PATH)
+        print(f"{len(table)} foods, {len(table.fields)} fields, {size / 1024:.1f} KiB")
+        print(", ".join(table.fields))
+        return
+
+    row = table.find(args.name)
+    if row is None:
+        print(f"No food named {args.name!r}")
+        return
+    print(row.get("food_name"))
+    for field, value in zip(table.fields, row.values):
+        if value == value:
+            print(f"  {field:<20}{value:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,29 @@
 import os
+import threading
+import numpy as np
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait
 from recipe_fetcher import get_recipe_for_dish
-from ingredient_processor import standardize_ingredients, map_ingredients_to_nutrition
+from ingredient_processor import (standardize_ingredients, resolve_ingredients, match_ingredient, needs_lookup,
+                                  estimate_ingredient_match, sum_contributions, nutrient_coverage,
+                                  validate_nutrition_totals, CATEGORY_NUTRITION_VECTORS)
 from database import get_nutrition_db_connection, find_ingredient_in_db
-from dish_classifier import classify_dish_type
+from dish_classifier import classify_dish_type, classify_dish_type_by_rules
+from nutrition_rules import apply_rules, apply_rules_batch
+from nutrition_records import NUTRIENT_KEYS, DishBreakdown, MatchResult, NutrientVector
+from admission import AdmissionRejected, cold_path
+from latency_budget import LatencyBudget, call_within
+from logging_config import new_request_id
+from config import app_config
+from result_cache import (get_cache_entry, is_entry_fresh, store_result, record_dish_request,
+                          get_breakdown, store_breakdown)
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Seconds of a latency budget kept for the cheap final stages
+RESULT_STAGE_RESERVE = 0.02
+
 # Pre-defined nutrition profiles for common dishes to ensure consistency
 DISH_NUTRITION_PROFILES = {
     "chole bhature": {
@@ -85,15 +100,56 @@ DISH_NUTRITION_PROFILES = {
     }
 }
 
-def calculate_nutrition_for_dish(dish_name):
+# Standard serving size per dish type
+SERVING_SIZES = {
+    "Wet Sabzi": ("200ml", "_katori"),
+    "Dry Sabzi": ("100g", ""),
+    "Dal": ("200ml", "_katori"),
+    "Rice": ("150g", "_bowl"),
+    "Roti": ("1", "_piece"),
+    "Paratha": ("1", "_piece"),
+    "Non-Veg Curry": ("200ml", "_katori"),
+    "Dessert": ("100g", "_serving"),
+    "Chaat": ("1", "_plate"),
+    "South Indian": ("1", "_piece"),  # For dosas, idlis, etc.
+    "Breakfast": ("1", "_serving")
+}
+
+# Default cooked weight per dish type, used when ingredient weights are too low
+DEFAULT_TOTAL_WEIGHTS = {
+    "Wet Sabzi": 800,  # grams for 4 servings
+    "Dry Sabzi": 600,
+    "Dal": 800,
+    "Rice": 800,
+    "Non-Veg Curry": 900,
+    "Dessert": 500,
+    "Chaat": 400,
+    "South Indian": 600,  # Total weight for 4 dosas or 8 idlis
+    "Breakfast": 500
+}
+
+# Dish types that absorb water while cooking
+WET_DISH_TYPES = frozenset(["Wet Sabzi", "Dal", "Non-Veg Curry"])
+
+def _report_stage(progress, stage, message):
+    if progress is not None:
+        progress(stage, message)
+
+def calculate_nutrition_for_dish(dish_name, progress=None, budget=None):
     """
     Main function to calculate nutrition for a given dish.
     
     Args:
         dish_name (str): Name of the dish
+        progress (callable, optional): Called as progress(stage, message)
+            when each pipeline stage starts
+        budget (LatencyBudget, optional): Time allowed; stages that would
+            overrun it fall back to estimates
     
     Returns:
-        dict: Nutrition information for the dish
+        dict: Nutrition information for the dish. If parts were estimated to
+            stay within the budget, "estimated" is True and "estimates" lists
+            them ("recipe", "dish_type", "ingredients")
     """
     # Normalize dish name for consistent matching
     dish_name_normalized = dish_name.lower().strip()
@@ -101,79 +157,563 @@ def calculate_nutrition_for_dish(dish_name):
     try:
         # Check if this is a pre-defined dish with known nutrition values
         if dish_name_normalized in DISH_NUTRITION_PROFILES:
-            logger.info(f"Using pre-defined nutrition profile for {dish_name}")
-            return get_predefined_nutrition(dish_name, dish_name_normalized)
-        
-        # Step 1: Fetch recipe for the dish
-        recipe = get_recipe_for_dish(dish_name)
-        
-        if not recipe or "ingredients" not in recipe or not recipe["ingredients"]:
-            return {
-                "error": "Could not fetch recipe or no ingredients found",
-                "dish_name": dish_name
-            }
-        
-        # Step 2: Classify dish type
-        dish_type = classify_dish_type(dish_name, recipe)
-        logger.info(f"Classified {dish_name} as: {dish_type}")
-        
-        # Step 3: Standardize ingredients to household measurements
-        standardized_ingredients = standardize_ingredients(recipe["ingredients"])
-        
-        # Step 4: Map ingredients to nutrition database and calculate total nutrition
-        db = get_nutrition_db_connection()
-        nutrition_data, used_ingredients = map_ingredients_to_nutrition(standardized_ingredients, db)
+            logger.info("Using pre-defined nutrition profile for %s", dish_name)
+            result = get_predefined_nutrition(dish_name, dish_name_normalized, budget)
+        else:
+            breakdown = build_dish_breakdown(dish_name, progress, budget)
+            if breakdown is None:
+                return {
+                    "error": "Could not fetch recipe or no ingredients found",
+                    "dish_name": dish_name
+                }
+            
+            _report_stage(progress, "nutrition", "Calculating nutritional values...")
+            result = build_dish_result(dish_name, breakdown)
         
+        if budget is not None and budget.estimates:
+            result["estimated"] = True
+            result["estimates"] = sorted(budget.estimates)
+        return result
+    except Exception as e:
+        logger.error("Error calculating nutrition: %s", e)
+        return {
+            "error": f"Error processing dish: {str(e)}",
+            "dish_name": dish_name
+        }
+
+def build_dish_breakdown(dish_name, progress=None, budget=None):
+    """
+    Run the expensive stages (recipe, classification, ingredient matching) for a dish.
+    
+    The breakdown is stored in the result cache so later ingredient edits can
+    reuse every per-ingredient weight and nutrient contribution.
+    
+    With a budget, the OpenAI calls may use all but LATENCY_BUDGET_MATCH_RESERVE_MS
+    of it. A recipe that doesn't arrive in time is replaced by a dish-type
+    estimate. A classification that doesn't arrive in time falls back to the
+    rules. Ingredients not matched in time get category estimates. Breakdowns
+    with estimates are not stored.
+    
+    Args:
+        dish_name (str): Name of the dish
+        progress (callable, optional): Stage callback, see calculate_nutrition_for_dish
+        budget (LatencyBudget, optional): Time allowed for the whole calculation
+    
+    Returns:
+        DishBreakdown: Intermediate results, or None if no recipe was found
+    """
+    match_reserve = app_config.LATENCY_BUDGET_MATCH_RESERVE_MS / 1000
+    
+    # Step 1: Fetch recipe for the dish
+    _report_stage(progress, "recipe", "Fetching recipe ingredients...")
+    try:
+        recipe = call_within(budget, get_recipe_for_dish, dish_name, reserve=match_reserve)
+    except TimeoutError:
+        logger.warning("Recipe for %s missed the latency budget, estimating by dish type", dish_name)
+        return estimate_dish_breakdown(dish_name, budget)
+    
+    if not recipe or "ingredients" not in recipe or not recipe["ingredients"]:
+        return None
+    
+    # Step 2: Classify dish type
+    _report_stage(progress, "classify", "Analyzing dish components...")
+    try:
+        dish_type = call_within(budget, classify_dish_type, dish_name, recipe, reserve=match_reserve)
+    except TimeoutError:
+        dish_type = classify_dish_type_by_rules(dish_name, recipe)
+        if dish_type is None:
+            budget.mark_estimated("dish_type")
+            dish_type = classify_dish_type(dish_name, recipe, allow_ai=False)
+    logger.info("Classified %s as: %s", dish_name, dish_type)
+    
+    # Step 3: Standardize ingredients to household measurements
+    standardized_ingredients = standardize_ingredients(recipe["ingredients"])
+    
+    # Step 4: Map ingredients to nutrition database
+    _report_stage(progress, "ingredients", f"Matching {len(standardized_ingredients)} ingredients...")
+    try:
+        db = call_within(budget, get_nutrition_db_connection, reserve=RESULT_STAGE_RESERVE)
+        deadline = None if budget is None else max(0, budget.remaining(RESULT_STAGE_RESERVE))
+        matches = resolve_ingredients(standardized_ingredients, db, deadline)
+    except TimeoutError:
+        logger.warning("No database connection within the latency budget for %s", dish_name)
+        matches = [estimate_ingredient_match(ingredient) for ingredient in standardized_ingredients]
+    if budget is not None and any(match.matched_to == "estimated values (lookup timed out)" for match in matches):
+        budget.mark_estimated("ingredients")
+    
+    breakdown = DishBreakdown(
+        dish_name.lower().strip(),
+        dish_type,
+        standardized_ingredients,
+        matches,
+        sum_contributions(matches),
+        sum_ingredient_weights(standardized_ingredients)
+    )
+    if budget is None or not budget.estimates:
+        store_breakdown(dish_name, breakdown.to_dict())
+    return breakdown
+
+def estimate_dish_breakdown(dish_name, budget):
+    """
+    Breakdown for a dish whose recipe is unavailable: the generic category
+    estimate over the default cooked weight of its dish type
+    
+    Args:
+        dish_name (str): Name of the dish
+        budget (LatencyBudget): Budget whose estimates are updated
+    
+    Returns:
+        DishBreakdown: Breakdown with no ingredients
+    """
+    budget.mark_estimated("recipe")
+    budget.mark_estimated("ingredients")
+    dish_type = classify_dish_type_by_rules(dish_name)
+    if dish_type is None:
+        budget.mark_estimated("dish_type")
+        dish_type = classify_dish_type(dish_name, allow_ai=False)
+    
+    total_weight = DEFAULT_TOTAL_WEIGHTS.get(dish_type, 700)
+    # A raw weight of 0 makes adjust_total_weight fall back to the same default
+    return DishBreakdown(dish_name.lower().strip(), dish_type, [], [],
+                         CATEGORY_NUTRITION_VECTORS["default"].scaled(total_weight / 100.0), 0)
+
+def build_dish_result(dish_name, breakdown, servings=None):
+    """
+    Run the cheap stages (validation, serving size, adjustments) on a breakdown.
+    
+    Args:
+        dish_name (str): Name of the dish as requested
+        breakdown (DishBreakdown): Output of build_dish_breakdown, possibly edited
+        servings (int, optional): Split the recipe into this many servings
+            instead of using the standard serving size for the dish type
+    
+    Returns:
+        dict: Nutrition information for the dish
+    """
+    nutrition_per_serving, serving, estimated_total_weight = _serving_nutrition(breakdown, servings)
+    
+    # Apply post-calculation adjustments (dish-type minimums and caps,
+    # South Indian ranges) from the rule table
+    adjustments = apply_rules(nutrition_per_serving, "serving", breakdown.dish_type, breakdown.dish_name)
+    return _dish_result(dish_name, breakdown, nutrition_per_serving, serving, estimated_total_weight,
+                        adjustments, servings)
+
+def build_dish_results(dishes):
+    """
+    build_dish_result for many dishes, applying the serving rules to all of them in one pass
+    
+    Args:
+        dishes (list): (dish name, DishBreakdown) pairs
+    
+    Returns:
+        list: Nutrition results, in the order of dishes
+    """
+    if not dishes:
+        return []
+    prepared = [_serving_nutrition(breakdown) for _, breakdown in dishes]
+    matrix = np.stack([np.frombuffer(nutrition.values) for nutrition, _, _ in prepared])
+    _, fired = apply_rules_batch(matrix, "serving", [breakdown.dish_type for _, breakdown in dishes],
+                                 [breakdown.dish_name for _, breakdown in dishes])
+    return [
+        _dish_result(dish_name, breakdown, NutrientVector(values.tolist()), serving, estimated_total_weight,
+                     [rule_id for rule_id in rule_ids if rule_id])
+        for (dish_name, breakdown), (_, serving, estimated_total_weight), values, rule_ids
+        in zip(dishes, prepared, matrix, fired)
+    ]
+
+def _serving_nutrition(breakdown, servings=None):
+    """
+    Validated nutrition per serving of a breakdown, before the serving rules
+    
+    Returns:
+        tuple: (NutrientVector, (serving size, serving unit), estimated cooked weight in grams)
+    """
+    dish_type = breakdown.dish_type
+    
+    # Validate a copy so the cached raw totals stay untouched
+    nutrition_data = breakdown.raw_total.copy()
+    validate_nutrition_totals(nutrition_data, breakdown.matches)
+    
+    # Estimate total cooked weight (assuming recipe is for 4 servings)
+    estimated_total_weight = adjust_total_weight(breakdown.raw_weight, dish_type)
+    
+    if servings:
+        # The caller knows how many servings the recipe makes
+        serving_size, serving_unit = "serving", ""
+        nutrition_per_serving = nutrition_data.scaled(1 / servings)
+    else:
         # Step 5: Calculate serving size based on dish type
         serving_size, serving_unit = get_serving_size(dish_type)
         
-        # Estimate total cooked weight (assuming recipe is for 4 servings)
-        estimated_total_weight = estimate_total_weight(standardized_ingredients, dish_type)
-        
         # Calculate nutrition per serving
         nutrition_per_serving = calculate_nutrition_per_serving(
             nutrition_data, 
             estimated_total_weight, 
             serving_size
         )
+    return nutrition_per_serving, (serving_size, serving_unit), estimated_total_weight
+
+def _dish_result(dish_name, breakdown, nutrition_per_serving, serving, estimated_total_weight, adjustments,
+                 servings=None):
+    """Assemble the result of build_dish_result from the adjusted per-serving values"""
+    dish_type = breakdown.dish_type
+    serving_size, serving_unit = serving
+    
+    # Nutrients no ingredient had data for are reported as null, and partly
+    # covered ones list the share of ingredient weight their value is based on
+    coverage = nutrient_coverage(breakdown.ingredients, breakdown.matches)
+    if coverage is None:
+        coverage = (~np.isnan(np.frombuffer(breakdown.raw_total.values))).astype(float)
+    np.frombuffer(nutrition_per_serving.values)[coverage == 0] = np.nan
+    
+    # Log final nutrition values for debugging
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Final nutrition for %s (%s, %s%s): %s", dish_name, dish_type, serving_size, serving_unit,
+                     ", ".join(f"{nutrient}={value:.1f}" for nutrient, value in nutrition_per_serving.items()))
+    
+    result = {
+        "dish_name": dish_name,
+        "dish_type": dish_type,
+        f"estimated_nutrition_per_{serving_size}{serving_unit}": nutrition_per_serving.to_dict(digits=1),
+        "ingredients_used": [match.to_dict() for match in breakdown.matches],
+        "adjustments_applied": adjustments,
+        "nutrient_coverage": {key: round(float(share), 2) for key, share in zip(NUTRIENT_KEYS, coverage) if share < 1}
+    }
+    if servings:
+        result["servings"] = servings
+        result["serving_weight_grams"] = round(estimated_total_weight / servings, 1)
+    return result
+
+def calculate_nutrition_for_recipe(ingredients, dish_name="Custom recipe", dish_type=None, servings=None):
+    """
+    Calculate nutrition for a client-supplied recipe without any OpenAI calls.
+    
+    Args:
+        ingredients (list): [{"name": ..., "quantity": ...}], the shape cached recipes use
+        dish_name (str, optional): Name used for the result and rule-based classification
+        dish_type (str, optional): Dish category; classified from the name and
+            ingredients by rules only when omitted
+        servings (int, optional): Number of servings the recipe makes. When
+            given, results are per serving (total / servings) instead of per
+            standard serving size for the dish type
+    
+    Returns:
+        dict: Nutrition information for the recipe
+    
+    Raises:
+        AdmissionRejected: If ingredients need database lookups and these
+            may not start now
+    """
+    try:
+        recipe = {"dish_name": dish_name, "ingredients": ingredients}
+        if not dish_type:
+            dish_type = classify_dish_type(dish_name, recipe, allow_ai=False)
         
-        # Apply post-calculation adjustments based on dish type
-        apply_dish_type_adjustments(nutrition_per_serving, dish_type)
+        standardized_ingredients = standardize_ingredients(ingredients)
+        if any(needs_lookup(ingredient) for ingredient in standardized_ingredients):
+            # Client-chosen names go to MongoDB regex and fuzzy scans, so
+            # they pass admission control like uncached dishes
+            with cold_path():
+                matches = resolve_ingredients(standardized_ingredients, get_nutrition_db_connection())
+        else:
+            matches = resolve_ingredients(standardized_ingredients, None)
+        breakdown = DishBreakdown(
+            dish_name.lower().strip(),
+            dish_type,
+            standardized_ingredients,
+            matches,
+            sum_contributions(matches),
+            sum_ingredient_weights(standardized_ingredients)
+        )
+        return build_dish_result(dish_name, breakdown, servings)
+    except AdmissionRejected:
+        # The app answers 429 with Retry-After
+        raise
+    except Exception as e:
+        logger.error("Error calculating recipe nutrition: %s", e)
+        return {
+            "error": f"Error processing recipe: {str(e)}",
+            "dish_name": dish_name
+        }
+
+def get_dish_breakdown(dish_name):
+    """Return the cached breakdown for a dish, computing it on a miss"""
+    cached = get_breakdown(dish_name)
+    if cached is not None:
+        return DishBreakdown.from_dict(cached)
+    with cold_path():
+        return build_dish_breakdown(dish_name)
+
+def calculate_nutrition_with_overrides(dish_name, overrides):
+    """
+    Recalculate a dish after the user edits ingredient quantities.
+    
+    Only the edited ingredients are re-standardized. Their old contributions
+    are subtracted from the cached raw totals and the new ones added, scaling
+    the cached per-ingredient nutrient vector by the weight change, so no
+    recipe, classification or database lookup is needed for ingredients that
+    were already matched. Then the cheap validation and adjustment stages run.
+    
+    For pre-defined profile dishes the per-serving change in the raw totals
+    is added to the profile values, so edits change the values the user saw.
+    
+    Args:
+        dish_name (str): Name of the dish
+        overrides (list): [{"name": ..., "quantity": ...}]; a quantity of "0"
+            removes the ingredient and unknown names are added to the recipe
+    
+    Returns:
+        dict: Nutrition information for the edited dish
+    
+    Raises:
+        AdmissionRejected: If the dish has no cached breakdown, or an edit
+            needs a database lookup, and this may not start now
+    """
+    try:
+        breakdown = get_dish_breakdown(dish_name)
+        if breakdown is None:
+            return {
+                "error": "Could not fetch recipe or no ingredients found",
+                "dish_name": dish_name
+            }
         
-        # For South Indian dishes, apply specific adjustments
-        if (dish_type == "South Indian"):
-            apply_south_indian_adjustments(nutrition_per_serving, dish_name_normalized)
+        ingredients = list(breakdown.ingredients)
+        matches = list(breakdown.matches)
+        raw_total = breakdown.raw_total.copy()
+        raw_weight = breakdown.raw_weight
+        positions = {ing.name: i for i, ing in enumerate(ingredients)}
+        db = None
         
-        # Log final nutrition values for debugging
-        logger.info(f"Final nutrition for {dish_name} ({dish_type}, {serving_size}{serving_unit}):")
-        for nutrient, value in nutrition_per_serving.items():
-            logger.info(f"  {nutrient}: {round(value, 1)}")
+        with ExitStack() as admitted:
+            def lookup(ingredient):
+                # Client-chosen names go to MongoDB regex and fuzzy scans, so the
+                # first one that needs the database admits the edit as cold-path work
+                nonlocal db
+                if db is None and needs_lookup(ingredient):
+                    admitted.enter_context(cold_path())
+                    db = get_nutrition_db_connection()
+                return match_ingredient(ingredient, db)
+            
+            for override in overrides:
+                edited = standardize_ingredients([override])
+                if not edited:
+                    continue
+                new_ingredient = edited[0]
+                index = positions.get(new_ingredient.name, positions.get(override.get("name", "").strip().lower()))
+                
+                if index is None:
+                    # Added ingredient: the only case that needs a fresh match
+                    if new_ingredient.weight_grams <= 0:
+                        new_match = MatchResult(new_ingredient.name, new_ingredient.quantity, "Excluded from calculation")
+                    else:
+                        new_match = lookup(new_ingredient)
+                    positions[new_ingredient.name] = len(ingredients)
+                    ingredients.append(new_ingredient)
+                    matches.append(new_match)
+                else:
+                    old_ingredient, old_match = ingredients[index], matches[index]
+                    if old_match.nutrition is not None:
+                        raw_total.add(old_match.nutrition, -1.0)
+                    if not old_ingredient.is_excluded:
+                        raw_weight -= old_ingredient.weight_grams
+                
+                    if new_ingredient.weight_grams <= 0:
+                        # Removed ("0") or excluded: only the old contribution is subtracted
+                        new_match = MatchResult(old_match.ingredient, new_ingredient.quantity, "Excluded from calculation")
+                    elif old_match.nutrition is not None and old_ingredient.weight_grams > 0:
+                        # Same food, different amount: scale the cached contribution
+                        nutrition = old_match.nutrition.scaled(new_ingredient.weight_grams / old_ingredient.weight_grams)
+                        new_match = MatchResult(old_match.ingredient, new_ingredient.quantity, old_match.matched_to, nutrition)
+                    else:
+                        new_match = lookup(new_ingredient)
+                    ingredients[index] = new_ingredient
+                    matches[index] = new_match
+                
+                if new_match.nutrition is not None:
+                    raw_total.add(new_match.nutrition)
+                if not new_ingredient.is_excluded:
+                    raw_weight += new_ingredient.weight_grams
         
-        return {
-            "dish_name": dish_name,
-            "dish_type": dish_type,
-            f"estimated_nutrition_per_{serving_size}{serving_unit}": {
-                "calories": round(nutrition_per_serving["calories"], 1),
-                "protein": round(nutrition_per_serving["protein"], 1),
-                "carbs": round(nutrition_per_serving["carbs"], 1),
-                "fat": round(nutrition_per_serving["fat"], 1),
-                "fiber": round(nutrition_per_serving["fiber"], 1) if "fiber" in nutrition_per_serving else 0
-            },
-            "ingredients_used": used_ingredients
-        }
+        edited_breakdown = DishBreakdown(breakdown.dish_name, breakdown.dish_type, ingredients, matches,
+                                         raw_total, raw_weight)
+        profile = DISH_NUTRITION_PROFILES.get(breakdown.dish_name)
+        if profile is not None:
+            return apply_profile_delta(dish_name, profile, breakdown, edited_breakdown)
+        return build_dish_result(dish_name, edited_breakdown)
+    except AdmissionRejected:
+        # Computing a missing breakdown or a lookup was refused; the app answers 429 with Retry-After
+        raise
     except Exception as e:
-        logger.error(f"Error calculating nutrition: {str(e)}")
+        logger.error("Error recalculating edited dish: %s", e)
         return {
             "error": f"Error processing dish: {str(e)}",
             "dish_name": dish_name
         }
 
-def get_predefined_nutrition(dish_name, dish_name_normalized):
+def apply_profile_delta(dish_name, profile, breakdown, edited_breakdown):
+    """
+    Result for an edited profile dish: the profile values plus what the edits add or remove
+    
+    The change in raw totals is split over the servings the unedited recipe
+    makes, so added ingredients add to each serving instead of diluting it.
+    
+    Args:
+        dish_name (str): Name of the dish as requested
+        profile (dict): Entry of DISH_NUTRITION_PROFILES
+        breakdown (DishBreakdown): The dish's recipe as shown unedited
+        edited_breakdown (DishBreakdown): The recipe with the user's edits
+    
+    Returns:
+        dict: Nutrition information for the edited dish
+    """
+    dish_type = profile["dish_type"]
+    serving_size, serving_unit = profile["serving_size"]
+    
+    # Nutrients without data on either side don't change
+    delta = NutrientVector((np.nan_to_num(np.frombuffer(edited_breakdown.raw_total.values))
+                            - np.nan_to_num(np.frombuffer(breakdown.raw_total.values))).tolist())
+    delta = calculate_nutrition_per_serving(delta, adjust_total_weight(breakdown.raw_weight, dish_type), serving_size)
+    
+    result = build_dish_result(dish_name, DishBreakdown(
+        edited_breakdown.dish_name, dish_type, edited_breakdown.ingredients, edited_breakdown.matches,
+        edited_breakdown.raw_total, edited_breakdown.raw_weight))
+    result[f"estimated_nutrition_per_{serving_size}{serving_unit}"] = {
+        key: max(0.0, round(profile[key] + delta[key], 1)) if profile.get(key) is not None else None
+        for key in NUTRIENT_KEYS
+    }
+    # The values are the profile's, not a share of the recipe's ingredient weight
+    result.pop("nutrient_coverage", None)
+    return result
+
+def get_nutrition_for_dish(dish_name):
+    """
+    Return nutrition for a dish, serving from the result cache when possible.
+    
+    Args:
+        dish_name (str): Name of the dish
+    
+    Returns:
+        dict: Nutrition information for the dish
+    """
+    result, _ = get_nutrition_entry_for_dish(dish_name)
+    return result
+
+def get_nutrition_entry_for_dish(dish_name, raw=False, progress=None):
+    """
+    Like get_nutrition_for_dish, but also return the result-cache entry.
+    
+    The entry carries the metadata (computation time, data version) that
+    HTTP caching needs to build ETags.
+    
+    Args:
+        dish_name (str): Name of the dish
+        raw (bool): Return successful results as serialized JSON bytes, so
+            cache hits are served without decoding and re-encoding
+        progress (callable, optional): Stage callback for cache misses,
+            see calculate_nutrition_for_dish
+    
+    Returns:
+        tuple: (nutrition result, cache entry dict or None if the result was not cached).
+            The result is a dict, or bytes when raw is set and the result was cached.
+    
+    Raises:
+        AdmissionRejected: If a miss may not be computed now (see admission.py)
+    """
+    entry = get_cache_entry(dish_name, raw=raw)
+    if entry and is_entry_fresh(entry):
+        logger.debug("Serving cached result for %s", dish_name)
+        record_dish_request(dish_name)
+        return (entry["result_bytes"] if raw else entry["result"]), entry
+    
+    # Queue time in admission control counts against the budget too
+    budget = LatencyBudget(app_config.LATENCY_BUDGET_MS / 1000) if app_config.LATENCY_BUDGET_MS > 0 else None
+    # Misses fetch recipes and match ingredients, so they pass admission control
+    with cold_path():
+        result = calculate_nutrition_for_dish(dish_name, progress, budget)
+    if "error" in result:
+        return result, None
+    # Only names that produced a result feed the precompute worker
+    record_dish_request(dish_name)
+    if result.get("estimated"):
+        # Serve the estimate uncached and compute the real result in the background
+        schedule_dish_refresh(dish_name, budget.pending)
+        return result, None
+    
+    entry = store_result(dish_name, result)
+    if raw and entry:
+        return entry["result_bytes"], entry
+    return result, entry
+
+def refresh_dish_result(dish_name):
+    """
+    Compute nutrition for a dish and store it in the result cache.
+    
+    Error results are returned but never cached.
+    
+    Args:
+        dish_name (str): Name of the dish
+    
+    Returns:
+        dict: Nutrition information for the dish
+    """
+    result = calculate_nutrition_for_dish(dish_name)
+    if "error" not in result:
+        store_result(dish_name, result)
+    return result
+
+_refresh_pool = None
+_refreshing = set()
+_refresh_lock = threading.Lock()
+
+def schedule_dish_refresh(dish_name, after=()):
+    """
+    Compute and cache a dish's full result in the background
+    
+    Used after serving an estimate. Each dish is refreshed once at a time,
+    and at most LATENCY_REFRESH_MAX_PENDING dishes wait.
+    
+    Args:
+        dish_name (str): Name of the dish
+        after (list): Futures to wait for first, e.g. the recipe fetch that
+            outlived the budget, so it isn't requested twice
+    
+    Returns:
+        bool: True if a refresh was scheduled
+    """
+    global _refresh_pool
+    key = dish_name.lower().strip()
+    with _refresh_lock:
+        if key in _refreshing or len(_refreshing) >= app_config.LATENCY_REFRESH_MAX_PENDING:
+            return False
+        _refreshing.add(key)
+        if _refresh_pool is None:
+            _refresh_pool = ThreadPoolExecutor(max_workers=app_config.LATENCY_REFRESH_WORKERS,
+                                               thread_name_prefix="refresh")
+    _refresh_pool.submit(_refresh_after, dish_name, key, list(after))
+    return True
+
+def _refresh_after(dish_name, key, after):
+    new_request_id(f"refresh-{key.replace(' ', '_')}")
+    try:
+        wait(after)
+        refresh_dish_result(dish_name)
+    except Exception as e:
+        logger.error("Background refresh of %s failed: %s", dish_name, e)
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(key)
+
+def get_predefined_nutrition(dish_name, dish_name_normalized, budget=None):
     """Generate response using pre-defined nutrition values"""
     profile = DISH_NUTRITION_PROFILES[dish_name_normalized]
     
     # Construct a more complete response with ingredient data
-    recipe = get_recipe_for_dish(dish_name)
+    try:
+        recipe = call_within(budget, get_recipe_for_dish, dish_name, reserve=RESULT_STAGE_RESERVE)
+    except TimeoutError:
+        # The nutrition values don't depend on it; only the ingredient list is missing
+        budget.mark_estimated("recipe")
+        recipe = None
     ingredients_used = []
     
     if recipe and "ingredients" in recipe:
@@ -195,67 +735,58 @@ def get_predefined_nutrition(dish_name, dish_name_normalized):
     return {
         "dish_name": dish_name,
         "dish_type": profile["dish_type"],
-        f"estimated_nutrition_per_{serving_size}{serving_unit}": {
-            "calories": profile["calories"],
-            "protein": profile["protein"],
-            "carbs": profile["carbs"],
-            "fat": profile["fat"],
-            "fiber": profile["fiber"]
-        },
+        # Nutrients a profile doesn't list are unknown (null), not zero
+        f"estimated_nutrition_per_{serving_size}{serving_unit}": {key: profile.get(key) for key in NUTRIENT_KEYS},
         "ingredients_used": ingredients_used
     }
 
+def select_result_nutrients(result, nutrients):
+    """
+    Copy of a dish result whose per-serving nutrition holds only some nutrients
+
+    Args:
+        result (dict): Dish result as returned by get_nutrition_for_dish
+        nutrients (tuple): Keys from parse_nutrient_subset, or None for all
+
+    Returns:
+        dict: The result itself when nothing is filtered, otherwise a shallow copy
+    """
+    serving_key = next((key for key in result if key.startswith("estimated_nutrition_per_")), None)
+    if not nutrients or serving_key is None:
+        return result
+    selected = dict(result)
+    selected[serving_key] = {key: result[serving_key].get(key) for key in nutrients}
+    if "nutrient_coverage" in result:
+        selected["nutrient_coverage"] = {key: share for key, share in result["nutrient_coverage"].items()
+                                         if key in nutrients}
+    return selected
+
 def get_serving_size(dish_type):
     """Return standard serving size based on dish type"""
-    serving_sizes = {
-        "Wet Sabzi": ("200ml", "_katori"),
-        "Dry Sabzi": ("100g", ""),
-        "Dal": ("200ml", "_katori"),
-        "Rice": ("150g", "_bowl"),
-        "Roti": ("1", "_piece"),
-        "Paratha": ("1", "_piece"),
-        "Non-Veg Curry": ("200ml", "_katori"),
-        "Dessert": ("100g", "_serving"),
-        "Chaat": ("1", "_plate"),
-        "South Indian": ("1", "_piece"),  # For dosas, idlis, etc.
-        "Breakfast": ("1", "_serving")
-    }
-    
-    return serving_sizes.get(dish_type, ("100", "g"))
+    return SERVING_SIZES.get(dish_type, ("100", "g"))
+
+def sum_ingredient_weights(standardized_ingredients):
+    """Sum up ingredient weights, skipping "to taste" and "for garnish" items"""
+    return sum(ing.weight_grams for ing in standardized_ingredients if not ing.is_excluded)
 
 def estimate_total_weight(standardized_ingredients, dish_type):
     """Estimate total cooked weight of the dish"""
-    # Default values based on dish type
-    default_weights = {
-        "Wet Sabzi": 800,  # grams for 4 servings
-        "Dry Sabzi": 600,
-        "Dal": 800,
-        "Rice": 800,
-        "Non-Veg Curry": 900,
-        "Dessert": 500,
-        "Chaat": 400,
-        "South Indian": 600,  # Total weight for 4 dosas or 8 idlis
-        "Breakfast": 500
-    }
-    
-    # Sum up ingredient weights, excluding "to taste" and "for garnish"
-    total_raw_weight = sum([ing.get("weight_grams", 0) for ing in standardized_ingredients 
-                           if "to taste" not in ing.get("quantity", "").lower() and 
-                              "for garnish" not in ing.get("quantity", "").lower() and
-                              "as needed" not in ing.get("quantity", "").lower()])
-    
-    logger.info(f"Calculated raw ingredient weight: {total_raw_weight}g for dish type {dish_type}")
+    return adjust_total_weight(sum_ingredient_weights(standardized_ingredients), dish_type)
+
+def adjust_total_weight(total_raw_weight, dish_type):
+    """Turn the summed raw ingredient weight into an estimated cooked weight"""
+    logger.debug("Calculated raw ingredient weight: %sg for dish type %s", total_raw_weight, dish_type)
     
     # If total weight is too low, use default
     if total_raw_weight < 200:
-        default_weight = default_weights.get(dish_type, 700)
-        logger.info(f"Raw weight too low, using default: {default_weight}g")
+        default_weight = DEFAULT_TOTAL_WEIGHTS.get(dish_type, 700)
+        logger.debug("Raw weight too low, using default: %sg", default_weight)
         return default_weight
     
     # For wet dishes, account for water added during cooking
-    if dish_type in ["Wet Sabzi", "Dal", "Non-Veg Curry"]:
+    if dish_type in WET_DISH_TYPES:
         total_weight = total_raw_weight * 1.3  # Add 30% for water
-        logger.info(f"Added 30% for water, adjusted weight: {total_weight}g")
+        logger.debug("Added 30%% for water, adjusted weight: %sg", total_weight)
         return total_weight
         
     return total_raw_weight
@@ -275,96 +806,7 @@ def calculate_nutrition_per_serving(nutrition_data, total_weight, serving_size):
         serving_grams = int(serving_size.replace("g", ""))
         serving_ratio = serving_grams / total_weight
     
-    logger.info(f"Calculating nutrition with serving ratio: {serving_ratio:.3f} (serving: {serving_size}, total: {total_weight}g)")
+    logger.debug("Calculating nutrition with serving ratio: %.3f (serving: %s, total: %sg)", serving_ratio, serving_size, total_weight)
     
     # Calculate nutrition per serving
-    nutrition_per_serving = {}
-    for nutrient, value in nutrition_data.items():
-        nutrition_per_serving[nutrient] = value * serving_ratio
-    
-    return nutrition_per_serving
-
-def apply_dish_type_adjustments(nutrition_data, dish_type):
-    """Apply dish-type specific adjustments to nutrition values"""
-    # Apply minimum values based on dish type
-    min_values = {
-        "Wet Sabzi": {"calories": 180, "protein": 8, "carbs": 8, "fat": 10, "fiber": 2},
-        "Dry Sabzi": {"calories": 120, "protein": 3, "carbs": 15, "fat": 5, "fiber": 3},
-        "Dal": {"calories": 200, "protein": 10, "carbs": 20, "fat": 5, "fiber": 5},
-        "Rice": {"calories": 200, "protein": 4, "carbs": 40, "fat": 1, "fiber": 1},
-        "Non-Veg Curry": {"calories": 250, "protein": 20, "carbs": 8, "fat": 15, "fiber": 1},
-        "Chaat": {"calories": 450, "protein": 12, "carbs": 60, "fat": 20, "fiber": 8},
-        "Paratha": {"calories": 150, "protein": 3, "carbs": 25, "fat": 5, "fiber": 1},
-        "Roti": {"calories": 80, "protein": 2, "carbs": 15, "fat": 1, "fiber": 1},
-        "Dessert": {"calories": 200, "protein": 2, "carbs": 30, "fat": 8, "fiber": 0},
-        "South Indian": {"calories": 120, "protein": 3, "carbs": 20, "fat": 3, "fiber": 1},
-        "Breakfast": {"calories": 150, "protein": 4, "carbs": 25, "fat": 5, "fiber": 2}
-    }
-    
-    # Apply maximum values for fiber based on dish type (prevent unrealistic fiber values)
-    max_fiber_values = {
-        "Wet Sabzi": 5,
-        "Dry Sabzi": 6,
-        "Dal": 8,
-        "Rice": 3,
-        "Non-Veg Curry": 4,
-        "Chaat": 8,
-        "Paratha": 3,
-        "Roti": 2,
-        "Dessert": 2,
-        "South Indian": 3,
-        "Breakfast": 4
-    }
-    
-    # Apply minimum values for specific dish type
-    if dish_type in min_values:
-        for nutrient, min_val in min_values[dish_type].items():
-            if nutrient in nutrition_data and nutrition_data[nutrient] < min_val:
-                logger.info(f"Adjusting {nutrient} from {nutrition_data[nutrient]:.1f} to minimum {min_val}")
-                nutrition_data[nutrient] = min_val
-                
-    # Apply maximum fiber value
-    if "fiber" in nutrition_data and dish_type in max_fiber_values:
-        max_fiber = max_fiber_values[dish_type]
-        if nutrition_data["fiber"] > max_fiber:
-            logger.info(f"Capping fiber from {nutrition_data['fiber']:.1f}g to maximum {max_fiber}g")
-            nutrition_data["fiber"] = max_fiber
-    
-    # Apply global minimum values
-    global_min = {"calories": 50, "protein": 1, "carbs": 5, "fat": 1, "fiber": 0}
-    for nutrient, min_val in global_min.items():
-        if nutrient in nutrition_data and nutrition_data[nutrient] < min_val:
-            nutrition_data[nutrient] = min_val
-
-def apply_south_indian_adjustments(nutrition_data, dish_name):
-    """Apply specific adjustments for South Indian dishes based on name"""
-    # Standard nutrition ranges for common South Indian dishes
-    if "dosa" in dish_name:
-        if "masala" in dish_name:
-            # Masala dosa contains potato filling
-            nutrition_data["calories"] = max(nutrition_data["calories"], 180)
-            nutrition_data["protein"] = max(nutrition_data["protein"], 5.0)
-            nutrition_data["carbs"] = max(nutrition_data["carbs"], 30.0) 
-            nutrition_data["fat"] = max(nutrition_data["fat"], 7.0)
-            nutrition_data["fiber"] = min(max(nutrition_data["fiber"], 2.0), 3.0)
-        else:
-            # Plain dosa
-            nutrition_data["calories"] = max(nutrition_data["calories"], 120)
-            nutrition_data["protein"] = max(nutrition_data["protein"], 3.0)
-            nutrition_data["carbs"] = max(nutrition_data["carbs"], 20.0)
-            nutrition_data["fat"] = max(nutrition_data["fat"], 3.5)
-            nutrition_data["fiber"] = min(max(nutrition_data["fiber"], 1.0), 2.0)
-    elif "idli" in dish_name:
-        # Values per 2 pieces
-        nutrition_data["calories"] = max(nutrition_data["calories"], 150)
-        nutrition_data["protein"] = max(nutrition_data["protein"], 4.0)
-        nutrition_data["carbs"] = max(nutrition_data["carbs"], 30.0)
-        nutrition_data["fat"] = max(nutrition_data["fat"], 0.5)
-        nutrition_data["fiber"] = min(max(nutrition_data["fiber"], 1.0), 1.5)
-    elif "vada" in dish_name:
-        # Values per 2 pieces
-        nutrition_data["calories"] = max(nutrition_data["calories"], 150)
-        nutrition_data["protein"] = max(nutrition_data["protein"], 4.5)
-        nutrition_data["carbs"] = max(nutrition_data["carbs"], 18.0)
-        nutrition_data["fat"] = max(nutrition_data["fat"], 8.0)
-        nutrition_data["fiber"] = min(max(nutrition_data["fiber"], 1.5), 2.0)
+    return nutrition_data.scaled(serving_ratio)
@@ -0,0 +1,243 @@
+import math
+from array import array
+from config import app_config
+
+# Nutrient registry: every nutrient the pipeline tracks, in NutrientVector
+# order. "field" is the nutrition_source field it is read from and "scale"
+# converts that field's unit to the reported "unit". Vectors, the nutrient
+# table, API responses and the analytics export are all sized from this
+# table. A value the source doesn't have is NaN ("no data", not 0); sums skip
+# it, and a nutrient no ingredient had data for is reported as null.
+NUTRIENT_SCHEMA = {
+    "calories": {"field": "energy_kcal", "unit": "kcal", "label": "Calories"},
+    "protein": {"field": "protein_g", "unit": "g", "label": "Protein"},
+    "carbs": {"field": "carb_g", "unit": "g", "label": "Carbs"},
+    "fat": {"field": "fat_g", "unit": "g", "label": "Fat"},
+    "fiber": {"field": "fibre_g", "unit": "g", "label": "Fiber"},
+    "sugars": {"field": "freesugar_g", "unit": "g", "label": "Sugars"},
+    "saturated_fat": {"field": "sfa_mg", "unit": "g", "label": "Saturated fat", "scale": 0.001},
+    "cholesterol": {"field": "cholesterol_mg", "unit": "mg", "label": "Cholesterol"},
+    "sodium": {"field": "sodium_mg", "unit": "mg", "label": "Sodium"},
+    "potassium": {"field": "potassium_mg", "unit": "mg", "label": "Potassium"},
+    "iron": {"field": "iron_mg", "unit": "mg", "label": "Iron"},
+    "calcium": {"field": "calcium_mg", "unit": "mg", "label": "Calcium"},
+    "vitamin_a": {"field": "vita_ug", "unit": "µg", "label": "Vitamin A"},
+    "vitamin_c": {"field": "vitc_mg", "unit": "mg", "label": "Vitamin C"},
+    "folate": {"field": "folate_ug", "unit": "µg", "label": "Folate"},
+}
+
+def _parse_extra_nutrients(spec):
+    """Parse EXTRA_NUTRIENTS ("zinc=zinc_mg:mg,...") into registry entries"""
+    extra = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, _, field = item.partition("=")
+        field, _, unit = field.partition(":")
+        if not key or not field:
+            raise ValueError(f"Bad EXTRA_NUTRIENTS entry {item!r}, expected key=db_field[:unit]")
+        extra[key.strip()] = {"field": field.strip(), "unit": unit.strip(),
+                              "label": key.strip().replace("_", " ").capitalize()}
+    return extra
+
+NUTRIENT_SCHEMA.update(_parse_extra_nutrients(app_config.EXTRA_NUTRIENTS))
+
+# Order of values inside every NutrientVector
+NUTRIENT_KEYS = tuple(NUTRIENT_SCHEMA)
+NUTRIENT_INDEX = {key: i for i, key in enumerate(NUTRIENT_KEYS)}
+# nutrition_source field and unit factor of each vector position
+NUTRIENT_FIELDS = tuple(spec["field"] for spec in NUTRIENT_SCHEMA.values())
+NUTRIENT_FIELD_SCALES = tuple(spec.get("scale", 1.0) for spec in NUTRIENT_SCHEMA.values())
+
+def parse_nutrient_subset(value):
+    """
+    Validate a client's choice of nutrients
+
+    Args:
+        value (str | list | None): Comma-separated string or list of nutrient keys
+
+    Returns:
+        tuple: The keys in request order, or None when no subset was requested
+
+    Raises:
+        ValueError: For unknown keys or a value of the wrong type
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, (list, tuple)) or not all(isinstance(key, str) for key in value):
+        raise ValueError("nutrients must be a comma-separated string or a list of nutrient names")
+    keys = tuple(dict.fromkeys(key.strip() for key in value if key.strip()))
+    unknown = [key for key in keys if key not in NUTRIENT_INDEX]
+    if unknown:
+        raise ValueError(f"Unknown nutrients: {', '.join(unknown)}; available: {', '.join(NUTRIENT_KEYS)}")
+    return keys or None
+
+class NutrientVector:
+    """
+    Fixed-width nutrient values backed by a flat array of doubles
+
+    Supports the dict-style access the calculation code uses
+    (vector["fiber"], "fiber" in vector, items()) while storing all values in
+    one compact array instead of a dict of float objects. NaN marks a
+    nutrient without data.
+    """
+    __slots__ = ("values",)
+
+    def __init__(self, values=None):
+        self.values = array('d', values) if values is not None else array('d', bytes(8 * len(NUTRIENT_KEYS)))
+
+    @classmethod
+    def from_mapping(cls, mapping, scale=1.0):
+        """Build a vector from a {nutrient: value} dict; missing or None values are NaN, unknown keys ignored"""
+        vector = cls([math.nan] * len(NUTRIENT_KEYS))
+        for key, value in mapping.items():
+            index = NUTRIENT_INDEX.get(key)
+            if index is not None and value is not None:
+                vector.values[index] = value * scale
+        return vector
+
+    def __getitem__(self, key):
+        return self.values[NUTRIENT_INDEX[key]]
+
+    def __setitem__(self, key, value):
+        self.values[NUTRIENT_INDEX[key]] = value
+
+    def __contains__(self, key):
+        return key in NUTRIENT_INDEX
+
+    def __iter__(self):
+        return iter(NUTRIENT_KEYS)
+
+    def __len__(self):
+        return len(NUTRIENT_KEYS)
+
+    def __repr__(self):
+        return f"NutrientVector({self.to_dict()})"
+
+    def keys(self):
+        return NUTRIENT_KEYS
+
+    def items(self):
+        return zip(NUTRIENT_KEYS, self.values)
+
+    def copy(self):
+        return NutrientVector(self.values)
+
+    def add(self, other, scale=1.0):
+        """
+        Add another vector (optionally scaled) in place
+
+        NaN values of other are skipped, and a NaN value here takes other's
+        value, so a sum covers every vector that has data for a nutrient.
+        """
+        values = self.values
+        for i, value in enumerate(other.values):
+            if value == value:
+                values[i] = value * scale if values[i] != values[i] else values[i] + value * scale
+        return self
+
+    def scale(self, ratio):
+        """Multiply every value in place"""
+        values = self.values
+        for i in range(len(values)):
+            values[i] *= ratio
+        return self
+
+    def scaled(self, ratio):
+        """Return a new vector with every value multiplied by ratio"""
+        return NutrientVector(value * ratio for value in self.values)
+
+    def to_dict(self, digits=None, keys=None):
+        """Convert to a plain dict for JSON responses (NaN as None), optionally rounded and limited to some keys"""
+        items = zip(NUTRIENT_KEYS, self.values) if keys is None else \
+            ((key, self.values[NUTRIENT_INDEX[key]]) for key in keys)
+        if digits is None:
+            return {key: value if value == value else None for key, value in items}
+        return {key: round(value, digits) if value == value else None for key, value in items}
+
+def _vector_to_list(vector):
+    """Vector values for JSON, with NaN (no data) as None"""
+    return [value if value == value else None for value in vector.values]
+
+def _vector_from_list(values):
+    return NutrientVector(math.nan if value is None else value for value in values)
+
+class StandardizedIngredient:
+    """An ingredient with its quantity normalized and converted to grams"""
+    __slots__ = ("name", "quantity", "weight_grams")
+
+    def __init__(self, name, quantity, weight_grams):
+        self.name = name
+        self.quantity = quantity
+        self.weight_grams = weight_grams
+
+    def __repr__(self):
+        return f"StandardizedIngredient({self.name!r}, {self.quantity!r}, {self.weight_grams!r})"
+
+    @property
+    def is_excluded(self):
+        """True for "to taste", "for garnish" and "as needed" ingredients"""
+        quantity = self.quantity.lower()
+        return "to taste" in quantity or "for garnish" in quantity or "as needed" in quantity
+
+    def to_dict(self):
+        return {"name": self.name, "quantity": self.quantity, "weight_grams": self.weight_grams}
+
+class MatchResult:
+    """How one ingredient was resolved and what it contributes to the dish totals"""
+    __slots__ = ("ingredient", "quantity", "matched_to", "nutrition")
+
+    def __init__(self, ingredient, quantity, matched_to, nutrition=None):
+        self.ingredient = ingredient
+        self.quantity = quantity
+        self.matched_to = matched_to
+        # NutrientVector for this ingredient's weight, None when excluded or failed
+        self.nutrition = nutrition
+
+    def __repr__(self):
+        return f"MatchResult({self.ingredient!r}, matched_to={self.matched_to!r})"
+
+    def to_dict(self):
+        """Shape used in the "ingredients_used" list of API responses"""
+        return {"ingredient": self.ingredient, "quantity": self.quantity, "matched_to": self.matched_to}
+
+class DishBreakdown:
+    """
+    Intermediate state of one dish calculation, cached so edits can be applied as deltas
+
+    Holds the standardized ingredients, each ingredient's match and nutrient
+    contribution, and the raw (pre-validation) totals.
+    """
+    __slots__ = ("dish_name", "dish_type", "ingredients", "matches", "raw_total", "raw_weight")
+
+    def __init__(self, dish_name, dish_type, ingredients, matches, raw_total, raw_weight):
+        self.dish_name = dish_name
+        self.dish_type = dish_type
+        self.ingredients = ingredients
+        self.matches = matches
+        self.raw_total = raw_total
+        self.raw_weight = raw_weight
+
+    def to_dict(self):
+        """Compact JSON-compatible form for the result cache"""
+        return {
+            "dish_name": self.dish_name,
+            "dish_type": self.dish_type,
+            "ingredients": [[ing.name, ing.quantity, ing.weight_grams] for ing in self.ingredients],
+            "matches": [[m.ingredient, m.quantity, m.matched_to, _vector_to_list(m.nutrition) if m.nutrition is not None else None]
+                        for m in self.matches],
+            "raw_total": _vector_to_list(self.raw_total),
+            "raw_weight": self.raw_weight
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["dish_name"],
+            data["dish_type"],
+            [StandardizedIngredient(*ing) for ing in data["ingredients"]],
+            [MatchResult(name, quantity, matched_to, _vector_from_list(values) if values is not None else None)
+             for name, quantity, matched_to, values in data["matches"]],
+            _vector_from_list(data["raw_total"]),
+            data["raw_weight"]
+        )
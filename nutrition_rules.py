@@ -0,0 +1,220 @@
+import logging
+from functools import lru_cache
+import numpy as np
+from nutrition_records import NUTRIENT_KEYS, NUTRIENT_INDEX
+
+logger = logging.getLogger(__name__)
+
+# Minimum per-serving values based on dish type
+DISH_TYPE_MINIMUMS = {
+    "Wet Sabzi": {"calories": 180, "protein": 8, "carbs": 8, "fat": 10, "fiber": 2},
+    "Dry Sabzi": {"calories": 120, "protein": 3, "carbs": 15, "fat": 5, "fiber": 3},
+    "Dal": {"calories": 200, "protein": 10, "carbs": 20, "fat": 5, "fiber": 5},
+    "Rice": {"calories": 200, "protein": 4, "carbs": 40, "fat": 1, "fiber": 1},
+    "Non-Veg Curry": {"calories": 250, "protein": 20, "carbs": 8, "fat": 15, "fiber": 1},
+    "Chaat": {"calories": 450, "protein": 12, "carbs": 60, "fat": 20, "fiber": 8},
+    "Paratha": {"calories": 150, "protein": 3, "carbs": 25, "fat": 5, "fiber": 1},
+    "Roti": {"calories": 80, "protein": 2, "carbs": 15, "fat": 1, "fiber": 1},
+    "Dessert": {"calories": 200, "protein": 2, "carbs": 30, "fat": 8, "fiber": 0},
+    "South Indian": {"calories": 120, "protein": 3, "carbs": 20, "fat": 3, "fiber": 1},
+    "Breakfast": {"calories": 150, "protein": 4, "carbs": 25, "fat": 5, "fiber": 2}
+}
+
+# Maximum per-serving fiber based on dish type (prevent unrealistic fiber values)
+DISH_TYPE_MAX_FIBER = {
+    "Wet Sabzi": 5,
+    "Dry Sabzi": 6,
+    "Dal": 8,
+    "Rice": 3,
+    "Non-Veg Curry": 4,
+    "Chaat": 8,
+    "Paratha": 3,
+    "Roti": 2,
+    "Dessert": 2,
+    "South Indian": 3,
+    "Breakfast": 4
+}
+
+# Minimum per-serving values for every dish
+GLOBAL_MINIMUMS = {"calories": 50, "protein": 1, "carbs": 5, "fat": 1, "fiber": 0}
+
+# Standard nutrition ranges for common South Indian dishes, keyed by variant
+SOUTH_INDIAN_RANGES = {
+    # Masala dosa contains potato filling
+    "masala dosa": {"min": {"calories": 180, "protein": 5.0, "carbs": 30.0, "fat": 7.0, "fiber": 2.0},
+                    "max": {"fiber": 3.0}},
+    "plain dosa": {"min": {"calories": 120, "protein": 3.0, "carbs": 20.0, "fat": 3.5, "fiber": 1.0},
+                   "max": {"fiber": 2.0}},
+    # Values per 2 pieces
+    "idli": {"min": {"calories": 150, "protein": 4.0, "carbs": 30.0, "fat": 0.5, "fiber": 1.0},
+             "max": {"fiber": 1.5}},
+    "vada": {"min": {"calories": 150, "protein": 4.5, "carbs": 18.0, "fat": 8.0, "fiber": 1.5},
+             "max": {"fiber": 2.0}}
+}
+
+# Minimum reasonable whole-recipe totals, applied after ingredient mapping
+RECIPE_TOTAL_MINIMUMS = {"calories": 100, "protein": 2, "carbs": 10, "fat": 2, "fiber": 1}
+
+class Rule:
+    """One clamp: raise a nutrient to at least (min) or cap it at most (max) a value"""
+    __slots__ = ("rule_id", "stage", "scope", "nutrient", "op", "value")
+
+    def __init__(self, rule_id, stage, scope, nutrient, op, value):
+        self.rule_id = rule_id
+        self.stage = stage
+        self.scope = scope
+        self.nutrient = nutrient
+        self.op = op
+        self.value = value
+
+    def __repr__(self):
+        return f"Rule({self.rule_id!r}, {self.op} {self.value})"
+
+def _rules_from(stage, scope, op, values, prefix):
+    return [Rule(f"{prefix}.{op}.{nutrient}", stage, scope, nutrient, op, value)
+            for nutrient, value in values.items()]
+
+def build_rule_table():
+    """
+    Expand the tables above into the ordered rule list
+
+    Order matters: rules are applied first to last, exactly like the
+    sequential adjustments they replace (dish-type minimums, dish-type fiber
+    cap, global minimums, then South Indian variant ranges).
+
+    Returns:
+        list: Rule objects
+    """
+    rules = []
+    for dish_type, minimums in DISH_TYPE_MINIMUMS.items():
+        rules += _rules_from("serving", dish_type, "min", minimums, dish_type)
+    for dish_type, max_fiber in DISH_TYPE_MAX_FIBER.items():
+        rules += _rules_from("serving", dish_type, "max", {"fiber": max_fiber}, dish_type)
+    rules += _rules_from("serving", "*", "min", GLOBAL_MINIMUMS, "global")
+    for variant, ranges in SOUTH_INDIAN_RANGES.items():
+        scope = f"South Indian:{variant}"
+        rules += _rules_from("serving", scope, "min", ranges["min"], variant)
+        rules += _rules_from("serving", scope, "max", ranges["max"], variant)
+    rules += _rules_from("totals", "*", "min", RECIPE_TOTAL_MINIMUMS, "totals")
+    return rules
+
+RULES = build_rule_table()
+RULE_IDS = np.array([rule.rule_id for rule in RULES] + [""], dtype=object)
+NO_RULE = len(RULES)
+
+def get_south_indian_variant(dish_name):
+    """Pick the South Indian range that applies to a dish name, if any"""
+    if "dosa" in dish_name:
+        return "masala dosa" if "masala" in dish_name else "plain dosa"
+    if "idli" in dish_name:
+        return "idli"
+    if "vada" in dish_name:
+        return "vada"
+    return None
+
+def get_rule_context(stage, dish_type=None, dish_name=""):
+    """Return the (stage, dish type, variant) key that selects which rules apply"""
+    if stage != "serving":
+        return (stage, None, None)
+    variant = get_south_indian_variant(dish_name.lower()) if dish_type == "South Indian" else None
+    return (stage, dish_type, variant)
+
+@lru_cache(maxsize=None)
+def compile_context(context):
+    """
+    Fold every rule that applies to a context into one clamp per nutrient
+
+    A sequence of max(x, a) and min(x, b) steps always reduces to
+    min(max(x, lo), hi), so applying the whole table is two vector
+    operations. For the audit trail we also keep which rule set each bound.
+
+    Returns:
+        tuple: (lo, hi, lo_rule, hi_rule) NumPy arrays indexed like NUTRIENT_KEYS
+    """
+    stage, dish_type, variant = context
+    scopes = {"*", dish_type}
+    if variant:
+        scopes.add(f"South Indian:{variant}")
+
+    size = len(NUTRIENT_KEYS)
+    lo = np.full(size, -np.inf)
+    hi = np.full(size, np.inf)
+    lo_rule = np.full(size, NO_RULE)
+    hi_rule = np.full(size, NO_RULE)
+
+    for index, rule in enumerate(RULES):
+        if rule.stage != stage or rule.scope not in scopes:
+            continue
+        i = NUTRIENT_INDEX[rule.nutrient]
+        if rule.op == "min":
+            # max(min(max(x, lo), hi), c) == min(max(x, max(lo, c)), max(hi, c))
+            if rule.value > lo[i]:
+                lo[i], lo_rule[i] = rule.value, index
+            if rule.value > hi[i]:
+                hi[i], hi_rule[i] = rule.value, index
+        else:
+            if rule.value < hi[i]:
+                hi[i], hi_rule[i] = rule.value, index
+
+    for array_ in (lo, hi, lo_rule, hi_rule):
+        array_.setflags(write=False)
+    return lo, hi, lo_rule, hi_rule
+
+def apply_rules(vector, stage, dish_type=None, dish_name=""):
+    """
+    Apply the rule table to one NutrientVector in place
+
+    Args:
+        vector (NutrientVector): Values to clamp
+        stage (str): "serving" for per-serving values, "totals" for recipe totals
+        dish_type (str, optional): Dish category
+        dish_name (str, optional): Dish name, selects South Indian variants
+
+    Returns:
+        list: Ids of the rules that changed a value
+    """
+    lo, hi, lo_rule, hi_rule = compile_context(get_rule_context(stage, dish_type, dish_name))
+    values = np.frombuffer(vector.values)  # zero-copy view
+
+    clamped = np.minimum(np.maximum(values, lo), hi)
+    # In nutrient order, like apply_rules_batch. A raised value comes from the
+    # floor, unless a later cap sits below the floor; a lowered one from the cap
+    fired = [RULES[hi_rule[i] if clamped[i] < values[i] or lo[i] > hi[i] else lo_rule[i]].rule_id
+             for i in np.flatnonzero((clamped > values) | (clamped < values))]
+
+    values[:] = clamped
+    if fired:
+        logger.debug("Adjustment rules fired for %s: %s", dish_type, fired)
+    return fired
+
+def apply_rules_batch(matrix, stage, dish_types, dish_names=None):
+    """
+    Apply the rule table to many nutrient vectors in one pass
+
+    Args:
+        matrix (np.ndarray): Shape (n, len(NUTRIENT_KEYS)), clamped in place
+        stage (str): "serving" or "totals"
+        dish_types (list): Dish type per row
+        dish_names (list, optional): Dish name per row
+
+    Returns:
+        tuple: (matrix, fired) where fired is an (n, len(NUTRIENT_KEYS)) object
+            array holding the id of the rule that set each value, or "" if none did
+    """
+    dish_names = dish_names if dish_names is not None else [""] * len(dish_types)
+    contexts = [get_rule_context(stage, t, n) for t, n in zip(dish_types, dish_names)]
+
+    # Compile each distinct context once and gather per-row bounds
+    unique = {context: i for i, context in enumerate(dict.fromkeys(contexts))}
+    compiled = [compile_context(context) for context in unique]
+    rows = np.fromiter((unique[context] for context in contexts), dtype=np.intp, count=len(contexts))
+    lo = np.stack([c[0] for c in compiled])[rows]
+    hi = np.stack([c[1] for c in compiled])[rows]
+    lo_rule = np.stack([c[2] for c in compiled])[rows]
+    hi_rule = np.stack([c[3] for c in compiled])[rows]
+
+    clamped = np.minimum(np.maximum(matrix, lo), hi)
+    fired_rule = np.where(clamped > matrix, np.where(lo <= hi, lo_rule, hi_rule),
+                          np.where(clamped < matrix, hi_rule, NO_RULE))
+    matrix[...] = clamped
+    return matrix, RULE_IDS[fired_rule]
@@ -0,0 +1,205 @@
+import os
+import time
+import heapq
+import logging
+import argparse
+import itertools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from config import app_config
+from result_cache import normalize_dish_name, list_cache_entries, drain_request_counts, get_breakdown, store_result
+from nutrition_calculator import refresh_dish_result, build_dish_results, DISH_NUTRITION_PROFILES
+from nutrition_records import DishBreakdown
+from logging_config import setup_logging, new_request_id
+import analytics_export
+
+logger = logging.getLogger(__name__)
+
+class PrecomputeQueue:
+    """Priority queue of dishes to precompute, highest priority first"""
+
+    def __init__(self):
+        self._heap = []
+        self._priorities = {}
+        self._counter = itertools.count()
+
+    def push(self, dish_name, priority):
+        """Add a dish, or raise its priority if it is already queued"""
+        dish_name = normalize_dish_name(dish_name)
+        if self._priorities.get(dish_name, float("-inf")) >= priority:
+            return
+        self._priorities[dish_name] = priority
+        # Older heap entries for the same dish are skipped in pop()
+        heapq.heappush(self._heap, (-priority, next(self._counter), dish_name))
+
+    def pop(self):
+        """Remove and return the highest-priority dish, or None if empty"""
+        while self._heap:
+            neg_priority, _, dish_name = heapq.heappop(self._heap)
+            if self._priorities.get(dish_name) == -neg_priority:
+                del self._priorities[dish_name]
+                return dish_name
+        return None
+
+    def __len__(self):
+        return len(self._priorities)
+
+def build_queue(request_counts, popular_dishes, cache_entries, now=None):
+    """
+    Decide which dishes need precomputing and in what order
+
+    A dish is queued when it has no cached result or its result expires
+    within PRECOMPUTE_REFRESH_MARGIN. Priority is its recent request count
+    plus a fixed boost for dishes on the popular list.
+
+    Args:
+        request_counts (Counter): Decayed request counts per normalized dish name
+        popular_dishes (list): Dish names that should always stay warm
+        cache_entries (dict): Normalized dish name -> computed_at timestamp
+        now (float, optional): Current time, for testing
+
+    Returns:
+        PrecomputeQueue: Dishes due for (re)computation
+    """
+    now = time.time() if now is None else now
+    refresh_after = app_config.RESULT_CACHE_TTL - app_config.PRECOMPUTE_REFRESH_MARGIN
+    popular = {normalize_dish_name(name) for name in popular_dishes}
+
+    queue = PrecomputeQueue()
+    for dish_name in set(request_counts) | popular:
+        computed_at = cache_entries.get(dish_name)
+        if computed_at is not None and now - computed_at < refresh_after:
+            continue
+
+        priority = request_counts.get(dish_name, 0)
+        if dish_name in popular:
+            priority += app_config.PRECOMPUTE_POPULAR_BOOST
+        queue.push(dish_name, priority)
+
+    return queue
+
+def precompute(dish_name):
+    """Compute and cache the full result for one dish"""
+    new_request_id(f"precompute-{dish_name.replace(' ', '_')}")
+    started = time.time()
+    try:
+        result = refresh_dish_result(dish_name)
+        if "error" in result:
+            logger.warning("Precompute failed for %s: %s", dish_name, result["error"])
+        else:
+            logger.info("Precomputed %s in %.2fs", dish_name, time.time() - started)
+    except Exception as e:
+        logger.error("Error precomputing %s: %s", dish_name, e)
+
+def rebuild_from_breakdowns(dish_names, cache_entries):
+    """
+    Rebuild missing results whose breakdown is still cached, all in one batch
+
+    Only the cheap stages run (see build_dish_results); no recipe fetch,
+    classification or ingredient matching is needed for these dishes.
+
+    Args:
+        dish_names (list): Normalized dish names due for precomputing
+        cache_entries (dict): Normalized dish name -> computed_at, from list_cache_entries
+
+    Returns:
+        list: The dish names that still need a full precompute, in their original order
+    """
+    dishes = []
+    for dish_name in dish_names:
+        # Results about to expire are recomputed in full, refreshing their recipe too
+        if dish_name in cache_entries or dish_name in DISH_NUTRITION_PROFILES:
+            continue
+        cached = get_breakdown(dish_name)
+        if cached is not None:
+            dishes.append((dish_name, DishBreakdown.from_dict(cached)))
+    if not dishes:
+        return dish_names
+
+    try:
+        results = build_dish_results(dishes)
+    except Exception as e:
+        logger.error("Error rebuilding %d results from breakdowns: %s", len(dishes), e)
+        return dish_names
+    for (dish_name, _), result in zip(dishes, results):
+        store_result(dish_name, result)
+    logger.info("Rebuilt %d results from cached breakdowns", len(dishes))
+    rebuilt = {dish_name for dish_name, _ in dishes}
+    return [dish_name for dish_name in dish_names if dish_name not in rebuilt]
+
+def export_for_analytics():
+    """Append newly computed results to the analytics store, if enabled"""
+    if not app_config.ANALYTICS_EXPORT_ENABLED or not analytics_export.is_available():
+        return
+    try:
+        analytics_export.export_results()
+    except Exception as e:
+        logger.warning("Analytics export failed: %s", e)
+
+def run_worker(concurrency, poll_interval, once=False):
+    """
+    Main worker loop
+
+    Every cycle drains the request log into decayed trending counts, builds
+    a priority queue of missing or soon-to-expire results and works through
+    it with a bounded thread pool. Missing results whose breakdown is still
+    cached are rebuilt first, in one batch.
+
+    Args:
+        concurrency (int): Number of dishes computed at once
+        poll_interval (int): Seconds to sleep between cycles
+        once (bool): Run a single cycle and exit
+    """
+    # Run below the web server's priority so precomputation only uses idle CPU
+    if hasattr(os, "nice"):
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+
+    trending = Counter()
+    logger.info("Precompute worker started with concurrency %d", concurrency)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            # Halve old counts each cycle so recently requested dishes win
+            for dish_name in list(trending):
+                trending[dish_name] *= app_config.PRECOMPUTE_TREND_DECAY
+                if trending[dish_name] < 0.1:
+                    del trending[dish_name]
+            trending.update(drain_request_counts())
+
+            cache_entries = list_cache_entries()
+            queue = build_queue(trending, app_config.POPULAR_DISHES, cache_entries)
+            if len(queue):
+                logger.info("Precomputing %d dishes", len(queue))
+
+            dishes = []
+            while len(queue):
+                dishes.append(queue.pop())
+            dishes = rebuild_from_breakdowns(dishes, cache_entries)
+            # map() preserves submission order, so the pool starts with the highest priorities
+            list(executor.map(precompute, dishes))
+            export_for_analytics()
+
+            if once:
+                break
+            time.sleep(poll_interval)
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute and refresh cached dish results")
+    parser.add_argument("--concurrency", type=int, default=app_config.PRECOMPUTE_CONCURRENCY,
+                        help="number of dishes computed in parallel")
+    parser.add_argument("--interval", type=int, default=app_config.PRECOMPUTE_POLL_INTERVAL,
+                        help="seconds between queue rebuilds")
+    parser.add_argument("--once", action="store_true", help="run a single cycle and exit")
+    args = parser.parse_args()
+    setup_logging()
+
+    try:
+        run_worker(max(1, args.concurrency), args.interval, once=args.once)
+    except KeyboardInterrupt:
+        logger.info("Precompute worker stopped")
+
+if __name__ == "__main__":
+    main()
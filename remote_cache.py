@@ -0,0 +1,141 @@
+import time
+import zlib
+import logging
+import threading
+from config import app_config
+
+try:
+    import redis
+    from redis.retry import Retry
+    from redis.backoff import NoBackoff
+except ImportError:  # redis is optional, the remote tier is disabled without it
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Values are stored with a one-byte marker so small values skip compression
+_RAW = b"r"
+_ZLIB = b"z"
+
+_client = None
+_client_lock = threading.Lock()
+_unavailable_until = 0.0
+
+def _connect():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # No client-side retries: a failing remote should fall back fast
+                _client = redis.Redis.from_url(
+                    app_config.REMOTE_CACHE_URL,
+                    socket_timeout=app_config.REMOTE_CACHE_TIMEOUT,
+                    socket_connect_timeout=app_config.REMOTE_CACHE_TIMEOUT,
+                    retry=Retry(NoBackoff(), 0)
+                )
+    return _client
+
+def set_client(client):
+    """Use an existing Redis-compatible client (e.g. fakeredis) instead of REMOTE_CACHE_URL"""
+    global _client, _unavailable_until
+    _client = client
+    _unavailable_until = 0.0
+
+def get_client():
+    """
+    Return the Redis client, or None when the remote tier is off
+
+    The tier is off when REMOTE_CACHE_URL is unset, the redis package is
+    missing, or the server failed recently (for REMOTE_CACHE_RETRY_AFTER
+    seconds), so callers fall back to the local tiers without waiting on
+    timeouts.
+    """
+    if _client is None and (not app_config.REMOTE_CACHE_URL or redis is None):
+        return None
+    if time.time() < _unavailable_until:
+        return None
+    return _connect()
+
+def _mark_unavailable(error):
+    global _unavailable_until
+    if time.time() >= _unavailable_until:
+        logger.warning("Remote cache unavailable, using local tiers for %ss: %s",
+                       app_config.REMOTE_CACHE_RETRY_AFTER, error)
+    _unavailable_until = time.time() + app_config.REMOTE_CACHE_RETRY_AFTER
+
+def _key(namespace, key):
+    return f"{app_config.REMOTE_CACHE_PREFIX}{namespace}:{key}"
+
+def _encode(value):
+    if len(value) >= app_config.REMOTE_CACHE_COMPRESS_MIN_SIZE:
+        return _ZLIB + zlib.compress(value, 6)
+    return _RAW + value
+
+def _decode(stored):
+    if stored is None:
+        return None
+    if stored[:1] == _ZLIB:
+        return zlib.decompress(stored[1:])
+    return stored[1:]
+
+def get_value(namespace, key):
+    """
+    Fetch one value from the remote tier
+
+    Args:
+        namespace (str): "result", "recipe" or "class"
+        key (str): Key within the namespace
+
+    Returns:
+        bytes: The value, or None on a miss or when the remote is unavailable
+    """
+    client = get_client()
+    if client is None:
+        return None
+    try:
+        return _decode(client.get(_key(namespace, key)))
+    except Exception as e:
+        _mark_unavailable(e)
+        return None
+
+def get_values(namespace, keys):
+    """
+    Fetch many values in one pipelined round trip
+
+    Args:
+        namespace (str): Key namespace
+        keys (list): Keys within the namespace
+
+    Returns:
+        dict: Key -> bytes for the keys that were found
+    """
+    client = get_client()
+    if client is None or not keys:
+        return {}
+    try:
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(_key(namespace, key))
+        values = pipe.execute()
+    except Exception as e:
+        _mark_unavailable(e)
+        return {}
+    return {key: _decode(value) for key, value in zip(keys, values) if value is not None}
+
+def set_value(namespace, key, value, ttl=None):
+    """
+    Store a value in the remote tier, ignoring failures
+
+    Args:
+        namespace (str): Key namespace
+        key (str): Key within the namespace
+        value (bytes): Value to store
+        ttl (int, optional): Seconds to keep it, defaults to REMOTE_CACHE_TTL
+    """
+    client = get_client()
+    if client is None:
+        return
+    try:
+        client.set(_key(namespace, key), _encode(value), ex=ttl or app_config.REMOTE_CACHE_TTL)
+    except Exception as e:
+        _mark_unavailable(e)
@@ -0,0 +1,421 @@
+import os
+import re
+import time
+import atexit
+import hashlib
+import logging
+import threading
+from collections import Counter
+from config import app_config
+from serializer import dumps, loads
+from shared_cache import get_shared_cache
+import remote_cache
+
+logger = logging.getLogger(__name__)
+
+# Each result file holds one line of metadata followed by the serialized
+# result, so the result bytes can be served without a decode/encode round trip.
+# The same bytes are kept in the shared memory cache under "result:<key>" so
+# gunicorn workers on one host share warm results without touching the disk,
+# and in the optional remote tier so other nodes can reuse them.
+
+# Characters allowed in cache keys, which name files on disk
+_UNSAFE_KEY_CHARS = re.compile(r"[^a-z0-9_]")
+
+# Append-only log of requested dish names, drained by the precompute worker
+REQUEST_LOG_FILE = "requests.log"
+
+_request_lock = threading.Lock()
+_request_counts = Counter()  # normalized dish name -> requests since the last flush
+_request_flusher_pid = None
+
+def normalize_dish_name(dish_name):
+    """Normalize a dish name the same way the calculator does"""
+    return dish_name.lower().strip()
+
+def get_result_cache_key(dish_name):
+    """
+    Build the result-cache key for a dish
+
+    Args:
+        dish_name (str): Name of the dish
+
+    Returns:
+        str: Cache key, also used for the recipe cache file name. Plain
+            ASCII names map to e.g. "aloo_gobi"; any other character is
+            replaced and a hash of the name appended, so keys never contain
+            path separators and distinct names never share a key.
+    """
+    name = normalize_dish_name(dish_name).replace(" ", "_")
+    key = _UNSAFE_KEY_CHARS.sub("_", name)
+    if key != name:
+        key = f"{key[:64]}_{hashlib.sha1(name.encode('utf-8')).hexdigest()[:12]}"
+    return key
+
+def cache_file_path(directory, key, suffix):
+    """
+    Path of a cache file, refusing any that would land outside directory
+
+    Raises:
+        ValueError: If the key escapes the directory
+    """
+    directory = os.path.abspath(directory)
+    path = os.path.abspath(os.path.join(directory, f"{key}{suffix}"))
+    if os.path.dirname(path) != directory:
+        raise ValueError(f"Cache key {key!r} escapes {directory}")
+    return path
+
+def _result_path(key):
+    return cache_file_path(app_config.RESULT_CACHE_DIR, key, ".json")
+
+def _breakdown_path(key):
+    return cache_file_path(app_config.RESULT_CACHE_DIR, key, ".breakdown")
+
+def _write_atomic(path, data):
+    """Write to a temporary file and rename, so readers never see a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def get_cache_entry(dish_name, raw=False):
+    """
+    Load the cache entry for a dish, regardless of its age
+
+    Args:
+        dish_name (str): Name of the dish
+        raw (bool): Return the result as pre-serialized JSON bytes under
+            "result_bytes" instead of decoding it into "result"
+
+    Returns:
+        dict: Entry with "dish_name", "computed_at", "data_version" and the result, or None
+    """
+    key = get_result_cache_key(dish_name)
+    shared = get_shared_cache()
+    data = shared.get(f"result:{key}") if shared else None
+
+    try:
+        if data is None:
+            path = _result_path(key)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    data = f.read()
+            else:
+                data = remote_cache.get_value("result", key)
+                if data is None:
+                    return None
+                _write_atomic(path, data)
+            if shared:
+                shared.set(f"result:{key}", data)
+
+        metadata, _, result_bytes = data.partition(b"\n")
+        entry = loads(metadata)
+        if raw:
+            entry["result_bytes"] = result_bytes
+        else:
+            entry["result"] = loads(result_bytes)
+        return entry
+    except Exception as e:
+        logger.warning("Failed to load cached result for %s: %s", dish_name, e)
+        return None
+
+def _read_metadata(path):
+    """Read only the metadata line of a result file"""
+    with open(path, 'rb') as f:
+        return loads(f.readline())
+
+def get_cached_result(dish_name, ttl=None):
+    """
+    Return the cached result for a dish if it has not expired
+
+    Args:
+        dish_name (str): Name of the dish
+        ttl (int, optional): Maximum age in seconds, defaults to RESULT_CACHE_TTL
+
+    Returns:
+        dict: Cached nutrition result or None
+    """
+    entry = get_cache_entry(dish_name)
+    if not entry:
+        return None
+
+    if not is_entry_fresh(entry, ttl):
+        return None
+
+    return entry["result"]
+
+def is_entry_fresh(entry, ttl=None):
+    """Check that a cache entry is within its TTL and matches the current data version"""
+    ttl = app_config.RESULT_CACHE_TTL if ttl is None else ttl
+    if entry.get("data_version") != app_config.DATA_VERSION:
+        return False
+    return time.time() - entry.get("computed_at", 0) <= ttl
+
+def get_entry_etag(entry, nutrients=None):
+    """
+    Build a strong HTTP ETag for a cache entry
+
+    Derived from the cache key, the data version and the computation time,
+    so it changes whenever the stored result can change.
+
+    Args:
+        entry (dict): Cache entry as returned by get_cache_entry
+        nutrients (tuple, optional): Nutrient subset of the response, so each
+            representation of the entry gets its own tag
+
+    Returns:
+        str: Unquoted ETag value
+    """
+    source = f"{get_result_cache_key(entry['dish_name'])}|{entry.get('data_version')}|{entry.get('computed_at')}"
+    if nutrients:
+        source += "|" + ",".join(nutrients)
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()[:20]
+
+def store_result(dish_name, result):
+    """
+    Store a computed result for a dish
+
+    The file is written to a temporary path and renamed so that readers in
+    other processes never see a partially written entry.
+
+    Args:
+        dish_name (str): Name of the dish
+        result (dict | bytes): Nutrition result as returned by
+            calculate_nutrition_for_dish, or its serialized JSON bytes
+
+    Returns:
+        dict: The stored entry with "result_bytes", or None if it could not be written
+    """
+    key = get_result_cache_key(dish_name)
+    path = _result_path(key)
+
+    entry = {
+        "dish_name": normalize_dish_name(dish_name),
+        "computed_at": time.time(),
+        "data_version": app_config.DATA_VERSION
+    }
+    result_bytes = result if isinstance(result, bytes) else dumps(result)
+    data = dumps(entry) + b"\n" + result_bytes
+
+    try:
+        _write_atomic(path, data)
+    except Exception as e:
+        logger.warning("Failed to cache result for %s: %s", dish_name, e)
+        return None
+
+    shared = get_shared_cache()
+    if shared:
+        shared.set(f"result:{key}", data)
+    remote_cache.set_value("result", key, data, ttl=app_config.RESULT_CACHE_TTL)
+
+    entry["result_bytes"] = result_bytes
+    return entry
+
+def get_breakdown(dish_name):
+    """
+    Load the cached per-ingredient breakdown of a dish
+
+    Args:
+        dish_name (str): Name of the dish
+
+    Returns:
+        dict: Breakdown as produced by DishBreakdown.to_dict, or None if missing or stale
+    """
+    path = _breakdown_path(get_result_cache_key(dish_name))
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'rb') as f:
+            entry = loads(f.readline())
+            if not is_entry_fresh(entry):
+                return None
+            return loads(f.read())
+    except Exception as e:
+        logger.warning("Failed to load cached breakdown for %s: %s", dish_name, e)
+        return None
+
+def store_breakdown(dish_name, breakdown):
+    """
+    Store the per-ingredient breakdown of a dish next to its result
+
+    Args:
+        dish_name (str): Name of the dish
+        breakdown (dict): Output of DishBreakdown.to_dict
+    """
+    path = _breakdown_path(get_result_cache_key(dish_name))
+    entry = {
+        "dish_name": normalize_dish_name(dish_name),
+        "computed_at": time.time(),
+        "data_version": app_config.DATA_VERSION
+    }
+
+    try:
+        _write_atomic(path, dumps(entry) + b"\n" + dumps(breakdown))
+    except Exception as e:
+        logger.warning("Failed to cache breakdown for %s: %s", dish_name, e)
+
+def prefetch_results(dish_names):
+    """
+    Pull results that are missing locally from the remote tier in one round trip
+
+    Batch endpoints call this before resolving dishes one by one, so a
+    meal of N dishes costs one pipelined remote read instead of N.
+
+    Args:
+        dish_names (list): Dish names about to be looked up
+    """
+    missing = [key for key in dict.fromkeys(get_result_cache_key(name) for name in dish_names)
+               if not os.path.exists(_result_path(key))]
+    shared = get_shared_cache()
+    for key, data in remote_cache.get_values("result", missing).items():
+        try:
+            _write_atomic(_result_path(key), data)
+        except OSError as e:
+            logger.warning("Failed to store prefetched result %s: %s", key, e)
+        if shared:
+            shared.set(f"result:{key}", data)
+
+def list_cache_entries():
+    """
+    List all cached results with their computation time
+
+    Entries from an older data version are reported as computed at time 0
+    so that they are refreshed first.
+
+    Returns:
+        dict: Normalized dish name -> computed_at timestamp
+    """
+    entries = {}
+    if not os.path.isdir(app_config.RESULT_CACHE_DIR):
+        return entries
+
+    for filename in os.listdir(app_config.RESULT_CACHE_DIR):
+        if not filename.endswith(".json"):
+            continue
+        try:
+            entry = _read_metadata(os.path.join(app_config.RESULT_CACHE_DIR, filename))
+            if entry.get("data_version") == app_config.DATA_VERSION:
+                entries[entry["dish_name"]] = entry.get("computed_at", 0)
+            else:
+                entries[entry["dish_name"]] = 0
+        except Exception as e:
+            logger.warning("Skipping unreadable cache entry %s: %s", filename, e)
+
+    return entries
+
+def iter_cached_results(since=0.0, until=None):
+    """
+    Yield current-version results computed within a time window
+
+    Only the metadata line is decoded for entries outside the window.
+
+    Args:
+        since (float): Skip entries computed at or before this timestamp
+        until (float, optional): Skip entries computed after this timestamp
+
+    Yields:
+        tuple: (metadata entry, decoded result)
+    """
+    if not os.path.isdir(app_config.RESULT_CACHE_DIR):
+        return
+
+    for filename in os.listdir(app_config.RESULT_CACHE_DIR):
+        if not filename.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(app_config.RESULT_CACHE_DIR, filename), 'rb') as f:
+                entry = loads(f.readline())
+                computed_at = entry.get("computed_at", 0)
+                if (entry.get("data_version") != app_config.DATA_VERSION or computed_at <= since
+                        or (until is not None and computed_at > until)):
+                    continue
+                result = loads(f.read())
+        except Exception as e:
+            logger.warning("Skipping unreadable cache entry %s: %s", filename, e)
+            continue
+        yield entry, result
+
+def record_dish_request(dish_name):
+    """
+    Record that a dish was requested, to feed the precompute worker
+
+    Requests are counted in memory and appended to the request log by a
+    background thread every REQUEST_LOG_FLUSH_INTERVAL seconds, one line per
+    distinct name. At most REQUEST_LOG_MAX_NAMES names are counted between
+    flushes, so a flood of made-up names can't grow memory or the log.
+    Callers record only dishes that produced a result.
+    """
+    name = normalize_dish_name(dish_name).replace("\n", " ").replace("\t", " ")
+    _ensure_request_flusher()
+    with _request_lock:
+        if name in _request_counts or len(_request_counts) < app_config.REQUEST_LOG_MAX_NAMES:
+            _request_counts[name] += 1
+
+def _request_flusher():
+    """Background thread: flush request counts every REQUEST_LOG_FLUSH_INTERVAL"""
+    while True:
+        time.sleep(app_config.REQUEST_LOG_FLUSH_INTERVAL)
+        flush_request_counts()
+
+def _ensure_request_flusher():
+    """Start the background request-log flusher of this process, again after a fork"""
+    global _request_flusher_pid
+    if _request_flusher_pid != os.getpid():
+        with _request_lock:
+            if _request_flusher_pid != os.getpid():
+                _request_flusher_pid = os.getpid()
+                threading.Thread(target=_request_flusher, name="request-log-flush", daemon=True).start()
+
+def flush_request_counts():
+    """
+    Append the counted requests to the request log
+
+    Each line is "<count>\t<name>", written in one append, which is safe to
+    do from several server processes at once.
+    """
+    global _request_counts
+    with _request_lock:
+        counts, _request_counts = _request_counts, Counter()
+    if not counts:
+        return
+    try:
+        os.makedirs(app_config.RESULT_CACHE_DIR, exist_ok=True)
+        with open(os.path.join(app_config.RESULT_CACHE_DIR, REQUEST_LOG_FILE), 'a') as f:
+            f.write("".join(f"{count}\t{name}\n" for name, count in counts.items()))
+    except Exception as e:
+        logger.warning("Failed to record %d requested dishes: %s", len(counts), e)
+
+atexit.register(flush_request_counts)
+
+def drain_request_counts():
+    """
+    Read and clear the request log
+
+    Returns:
+        collections.Counter: Normalized dish name -> number of requests since last drain
+    """
+    log_path = os.path.join(app_config.RESULT_CACHE_DIR, REQUEST_LOG_FILE)
+    drained_path = f"{log_path}.draining"
+    counts = Counter()
+
+    if not os.path.exists(log_path):
+        return counts
+
+    try:
+        # Rename first so new requests start a fresh log while we read this one
+        os.replace(log_path, drained_path)
+        with open(drained_path, 'r') as f:
+            for line in f:
+                count, tab, name = line.rstrip("\n").partition("\t")
+                if not tab:
+                    # Written before requests were counted: one line per request
+                    count, name = "1", count.strip()
+                if name and count.isdigit():
+                    counts[name] += int(count)
+        os.remove(drained_path)
+    except Exception as e:
+        logger.warning("Failed to drain request log: %s", e)
+
+    return counts
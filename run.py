@@ -2,32 +2,92 @@ import subprocess
 import os
 import sys
 import time
+import signal
+import argparse
 import webbrowser
 import threading
+import urllib.request
+from config import app_config
 
-def run_backend():
-    print("Starting Flask backend server...")
-    subprocess.Popen([sys.executable, "app.py"], cwd=os.path.dirname(os.path.abspath(__file__)))
-    time.sleep(2)  # Give time for the backend to start
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_URL = f"http://{app_config.BACKEND_HOST}:{app_config.BACKEND_PORT}"
+
+def run_backend(production=False):
+    """Start the backend, under gunicorn in production mode or the Flask dev server otherwise"""
+    if production:
+        print(f"Starting gunicorn backend ({app_config.GUNICORN_WORKERS} {app_config.GUNICORN_WORKER_CLASS} "
+              f"workers x {app_config.GUNICORN_THREADS} threads)...")
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    else:
+        print("Starting Flask backend server...")
+        command = [sys.executable, "app.py"]
+
+    process = subprocess.Popen(command, cwd=BACKEND_DIR)
+    if not wait_for_backend(process, app_config.READINESS_TIMEOUT):
+        stop_process(process, app_config.GUNICORN_GRACEFUL_TIMEOUT)
+        sys.exit("Backend did not become ready, exiting.")
+    return process
+
+def wait_for_backend(process, timeout):
+    """Poll the readiness endpoint until it answers, the process dies or the timeout passes"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            print(f"Backend exited with code {process.returncode}")
+            return False
+        try:
+            with urllib.request.urlopen(f"{BACKEND_URL}/api/health", timeout=1) as response:
+                if response.status == 200:
+                    print(f"Backend ready at {BACKEND_URL}")
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+
+    print(f"Backend not ready after {timeout}s")
+    return False
+
+def stop_process(process, timeout):
+    """Ask a child process to exit, then kill it if it doesn't within timeout"""
+    if process is None or process.poll() is not None:
+        return
+    # gunicorn treats SIGTERM as a graceful shutdown: workers finish in-flight requests
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+def run_precompute_worker(concurrency):
+    """Start the background worker that keeps popular and trending dishes cached"""
+    if concurrency <= 0:
+        print("Precompute worker disabled (PRECOMPUTE_CONCURRENCY=0)")
+        return None
+    print(f"Starting precompute worker (concurrency {concurrency})...")
+    return subprocess.Popen(
+        [sys.executable, "precompute_worker.py", "--concurrency", str(concurrency)],
+        cwd=BACKEND_DIR
+    )
 
 def run_frontend():
     print("Starting React frontend development server...")
-    os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend"))
-    
+    os.chdir(os.path.join(BACKEND_DIR, "frontend"))
+
     if os.name == 'nt':  # Windows
         subprocess.Popen(["npm.cmd", "start"], shell=True)
     else:  # Unix/Linux
         subprocess.Popen(["npm", "start"], shell=True)
-    
+
     time.sleep(5)  # Give time for the frontend to compile and start
 
 def setup_frontend():
     """Check if node_modules exists, if not run npm install"""
-    frontend_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+    frontend_dir = os.path.join(BACKEND_DIR, "frontend")
     if not os.path.exists(os.path.join(frontend_dir, "node_modules")):
         print("Installing frontend dependencies (this might take a few minutes)...")
         os.chdir(frontend_dir)
-        
+
         if os.name == 'nt':  # Windows
             subprocess.call(["npm.cmd", "install"], shell=True)
         else:  # Unix/Linux
@@ -40,30 +100,47 @@ def open_browser():
     webbrowser.open('http://localhost:3000')
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the VYB Nutrition Calculator")
+    parser.add_argument("--production", action="store_true",
+                        help="serve the backend with gunicorn and skip the frontend dev server")
+    args = parser.parse_args()
+
     print("VYB Nutrition Calculator")
     print("------------------------")
-    
-    # First check if frontend dependencies are installed
-    setup_frontend()
-    
-    # Start the backend server
-    run_backend()
-    
-    # Start the frontend development server
-    run_frontend()
-    
-    # Open browser tab
-    thread = threading.Thread(target=open_browser)
-    thread.start()
-    
-    print("\nBoth servers are now running.")
-    print("Backend: http://localhost:5000")
-    print("Frontend: http://localhost:3000")
-    print("\nPress Ctrl+C to stop both servers.")
-    
+
+    if not args.production:
+        # First check if frontend dependencies are installed
+        setup_frontend()
+
+    # Start the backend server and wait until it answers
+    backend = run_backend(production=args.production)
+
+    # Start the background precompute worker
+    worker = run_precompute_worker(app_config.PRECOMPUTE_CONCURRENCY)
+
+    if args.production:
+        print(f"\nBackend: {BACKEND_URL}")
+        print("\nPress Ctrl+C to stop the server.")
+    else:
+        # Start the frontend development server
+        run_frontend()
+
+        # Open browser tab
+        thread = threading.Thread(target=open_browser)
+        thread.start()
+
+        print("\nBoth servers are now running.")
+        print(f"Backend: {BACKEND_URL}")
+        print("Frontend: http://localhost:3000")
+        print("\nPress Ctrl+C to stop both servers.")
+
     try:
-        # Keep the script running
-        while True:
+        # Keep the script running while the backend is alive
+        while backend.poll() is None:
             time.sleep(1)
+        print(f"Backend exited with code {backend.returncode}")
     except KeyboardInterrupt:
         print("\nShutting down...")
+    finally:
+        stop_process(worker, 5)
+        stop_process(backend, app_config.GUNICORN_GRACEFUL_TIMEOUT)
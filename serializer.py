@@ -0,0 +1,70 @@
+import json
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, stdlib json is the fallback
+    orjson = None
+
+if orjson:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def get_backend_name():
+    """Name of the JSON library in use"""
+    return "orjson" if orjson else "json"
+
+def dumps(obj):
+    """
+    Serialize an object to compact UTF-8 JSON bytes
+
+    Args:
+        obj: JSON-compatible object
+
+    Returns:
+        bytes: Serialized JSON
+    """
+    if orjson:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def loads(data):
+    """
+    Parse JSON from bytes or str
+
+    Args:
+        data (bytes | str): Serialized JSON
+
+    Returns:
+        object: Parsed value
+    """
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def load_file(path):
+    """Read and parse a JSON file"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+def dump_file(obj, path):
+    """Serialize an object into a JSON file"""
+    with open(path, 'wb') as f:
+        f.write(dumps(obj))
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by this module, so jsonify uses orjson when available"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Skip the str round trip and hand Flask the encoded bytes directly
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
@@ -0,0 +1,278 @@
+import os
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import threading
+from config import app_config
+
+try:
+    import fcntl
+except ImportError:  # Windows: the shared tier is disabled
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# File layout:
+#   [0, 64)            header: magic, slot count, slot size, ways
+#   [64, DATA_OFFSET)  per-process stat records: pid, hits, misses, stores, evictions
+#   [DATA_OFFSET, ...) slots, grouped into sets of `ways` consecutive slots
+#
+# Each slot starts with a sequence number. Writers make it odd while they
+# copy the key and value in and even again when done, so readers never lock:
+# they read the sequence, copy the slot, and retry if the sequence moved.
+MAGIC = b"VYBSHM01"
+HEADER = struct.Struct("<8sIII")
+STAT = struct.Struct("<qQQQQ")
+STAT_OFFSET = 64
+STAT_RECORDS = 64
+DATA_OFFSET = 4096
+SLOT_HEADER = struct.Struct("<QQddIH")  # seq, key hash, stored_at, accessed_at, value length, key length
+SEQ = struct.Struct("<Q")
+ACCESSED = struct.Struct("<d")
+ACCESSED_OFFSET = 24
+KEY_OFFSET = 64
+MAX_KEY_SIZE = 192
+VALUE_OFFSET = KEY_OFFSET + MAX_KEY_SIZE
+READ_RETRIES = 3
+
+def _hash_key(key_bytes):
+    # Python's hash() is randomized per process, so use a stable digest
+    return int.from_bytes(hashlib.blake2b(key_bytes, digest_size=8).digest(), "little") or 1
+
+class SharedMemoryCache:
+    """
+    Fixed-size key/value cache in a memory-mapped file shared by all processes on a host
+
+    Keys are hashed to a set of `ways` slots; a full set evicts its least
+    recently read slot. Reads are lock-free; writes take a byte-range
+    lock on the one slot they modify, so workers only contend when they
+    write the same slot.
+    """
+
+    def __init__(self, path, slots, slot_size, ways=4):
+        self.path = path
+        self.ways = max(1, ways)
+        self.slots = max(self.ways, slots - slots % self.ways)
+        self.slot_size = slot_size
+        self.max_value_size = slot_size - VALUE_OFFSET
+        self._sets = self.slots // self.ways
+        self._write_lock = threading.Lock()  # fcntl locks don't exclude threads of one process
+        self._stats_lock = threading.Lock()
+        self._stat_pid = None
+        self._stat_offset = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        size = DATA_OFFSET + self.slots * slot_size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, DATA_OFFSET, 0)
+        try:
+            header = os.pread(self._fd, HEADER.size, 0)
+            expected = HEADER.pack(MAGIC, self.slots, slot_size, self.ways)
+            if header != expected or os.fstat(self._fd).st_size != size:
+                # New file or different geometry: start empty
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, expected, 0)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, DATA_OFFSET, 0)
+        self._mm = mmap.mmap(self._fd, size)
+
+    def _slot_offset(self, index):
+        return DATA_OFFSET + index * self.slot_size
+
+    def _set_indexes(self, key_hash):
+        first = (key_hash % self._sets) * self.ways
+        return range(first, first + self.ways)
+
+    def _count(self, field, amount=1):
+        """Add to this process's stat record; only this process writes it"""
+        with self._stats_lock:
+            if self._stat_pid != os.getpid():
+                self._claim_stat_record()
+            offset = self._stat_offset + 8 + 8 * field
+            SEQ.pack_into(self._mm, offset, SEQ.unpack_from(self._mm, offset)[0] + amount)
+
+    def _claim_stat_record(self):
+        pid = os.getpid()
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, DATA_OFFSET, 0)
+        try:
+            chosen = 0
+            for record in range(STAT_RECORDS):
+                owner = STAT.unpack_from(self._mm, STAT_OFFSET + record * STAT.size)[0]
+                if owner == pid:
+                    chosen = record
+                    break
+                if owner == 0 or not _process_alive(owner):
+                    # Counters of exited workers are kept so totals stay cumulative
+                    chosen = record
+                    struct.pack_into("<q", self._mm, STAT_OFFSET + record * STAT.size, pid)
+                    break
+            self._stat_offset = STAT_OFFSET + chosen * STAT.size
+            self._stat_pid = pid
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, DATA_OFFSET, 0)
+
+    def _read_slot(self, index, key_hash, key_bytes):
+        """Copy a slot's value if it holds key; None if it doesn't or a writer keeps it busy"""
+        offset = self._slot_offset(index)
+        mm = self._mm
+        for _ in range(READ_RETRIES):
+            seq, slot_hash, _, _, value_len, key_len = SLOT_HEADER.unpack_from(mm, offset)
+            if seq & 1:
+                continue
+            if slot_hash != key_hash or key_len != len(key_bytes) or value_len > self.max_value_size:
+                return None
+            stored_key = mm[offset + KEY_OFFSET:offset + KEY_OFFSET + key_len]
+            value = mm[offset + VALUE_OFFSET:offset + VALUE_OFFSET + value_len]
+            if SEQ.unpack_from(mm, offset)[0] != seq:
+                continue
+            if stored_key != key_bytes:
+                return None
+            # Racy by design: an approximate access time is enough for eviction
+            ACCESSED.pack_into(mm, offset + ACCESSED_OFFSET, time.time())
+            return value
+        return None
+
+    def get(self, key):
+        """
+        Look up a value
+
+        Args:
+            key (str): Cache key, e.g. "result:paneer_butter_masala"
+
+        Returns:
+            bytes: Stored value, or None on a miss
+        """
+        key_bytes = key.encode("utf-8")
+        key_hash = _hash_key(key_bytes)
+        for index in self._set_indexes(key_hash):
+            value = self._read_slot(index, key_hash, key_bytes)
+            if value is not None:
+                self._count(0)
+                return value
+        self._count(1)
+        return None
+
+    def set(self, key, value):
+        """
+        Store a value, replacing an older value for the key or evicting the
+        least recently used slot in its set
+
+        Args:
+            key (str): Cache key
+            value (bytes): Value; larger than the slot allows are skipped
+
+        Returns:
+            bool: True if stored
+        """
+        key_bytes = key.encode("utf-8")
+        if len(key_bytes) > MAX_KEY_SIZE or len(value) > self.max_value_size:
+            return False
+        key_hash = _hash_key(key_bytes)
+
+        with self._write_lock:
+            index, evicting = self._choose_slot(key_hash, key_bytes)
+            offset = self._slot_offset(index)
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.slot_size, offset)
+            try:
+                mm = self._mm
+                seq = SEQ.unpack_from(mm, offset)[0]
+                SEQ.pack_into(mm, offset, seq | 1)
+                now = time.time()
+                struct.pack_into("<QddIH", mm, offset + 8, key_hash, now, now, len(value), len(key_bytes))
+                mm[offset + KEY_OFFSET:offset + KEY_OFFSET + len(key_bytes)] = key_bytes
+                mm[offset + VALUE_OFFSET:offset + VALUE_OFFSET + len(value)] = value
+                SEQ.pack_into(mm, offset, (seq | 1) + 1)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.slot_size, offset)
+
+        self._count(2)
+        if evicting:
+            self._count(3)
+        return True
+
+    def _choose_slot(self, key_hash, key_bytes):
+        """Pick the slot to write: the key's own, an empty one, or the least recently read"""
+        oldest, oldest_access = None, None
+        for index in self._set_indexes(key_hash):
+            offset = self._slot_offset(index)
+            _, slot_hash, stored_at, accessed_at, _, key_len = SLOT_HEADER.unpack_from(self._mm, offset)
+            if slot_hash == key_hash and bytes(self._mm[offset + KEY_OFFSET:offset + KEY_OFFSET + key_len]) == key_bytes:
+                return index, False
+            if stored_at == 0:
+                return index, False
+            if oldest_access is None or accessed_at < oldest_access:
+                oldest, oldest_access = index, accessed_at
+        return oldest, True
+
+    def stats(self):
+        """
+        Hit/miss counters summed over all processes, plus occupancy
+
+        Returns:
+            dict: hits, misses, stores, evictions, hit_rate, entries, slots, processes
+        """
+        totals = [0, 0, 0, 0]
+        processes = 0
+        for record in range(STAT_RECORDS):
+            pid, *counters = STAT.unpack_from(self._mm, STAT_OFFSET + record * STAT.size)
+            if pid:
+                processes += 1
+                totals = [total + counter for total, counter in zip(totals, counters)]
+        entries = sum(1 for index in range(self.slots)
+                      if SLOT_HEADER.unpack_from(self._mm, self._slot_offset(index))[2] > 0)
+        hits, misses, stores, evictions = totals
+        return {
+            "hits": hits,
+            "misses": misses,
+            "stores": stores,
+            "evictions": evictions,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "entries": entries,
+            "slots": self.slots,
+            "processes": processes
+        }
+
+    def close(self):
+        self._mm.close()
+        os.close(self._fd)
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_shared_cache():
+    """
+    Return the process-wide shared cache, opening it on first use
+
+    Returns:
+        SharedMemoryCache: The cache, or None if disabled or unavailable
+    """
+    global _cache
+    if _cache is not None or not app_config.SHARED_CACHE_ENABLED or fcntl is None:
+        return _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = SharedMemoryCache(
+                    app_config.SHARED_CACHE_PATH,
+                    app_config.SHARED_CACHE_SLOTS,
+                    app_config.SHARED_CACHE_SLOT_SIZE,
+                    app_config.SHARED_CACHE_WAYS
+                )
+            except OSError as e:
+                logger.warning("Shared memory cache unavailable: %s", e)
+                app_config.SHARED_CACHE_ENABLED = False
+    return _cache
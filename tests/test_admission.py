@@ -0,0 +1,61 @@
+import threading
+import pytest
+import admission
+from admission import AdmissionController, AdmissionRejected, cold_path, client_var
+
+def test_client_over_its_rate_is_rejected_with_retry_after():
+    controller = AdmissionController(4, 4, 1.0, rate=0.5, burst=2)
+    for _ in range(2):
+        with controller.admit("10.0.0.1"):
+            pass
+    with pytest.raises(AdmissionRejected) as rejected:
+        with controller.admit("10.0.0.1"):
+            pass
+    assert rejected.value.reason == "rate limit"
+    assert rejected.value.retry_after >= 1
+    # Other clients have their own bucket
+    with controller.admit("10.0.0.2"):
+        pass
+    assert controller.stats()["rejected_rate_limit"] == 1
+
+def test_full_queue_is_rejected_and_refunds_the_token():
+    controller = AdmissionController(1, 0, 1.0, rate=1.0, burst=1)
+    started, release = threading.Event(), threading.Event()
+
+    def hold():
+        with controller.admit("10.0.0.1"):
+            started.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    try:
+        started.wait(5)
+        with pytest.raises(AdmissionRejected) as rejected:
+            with controller.admit("10.0.0.2"):
+                pass
+        assert rejected.value.reason == "queue full"
+    finally:
+        release.set()
+        holder.join()
+    # The refused computation didn't spend 10.0.0.2's only token
+    with controller.admit("10.0.0.2"):
+        pass
+    assert controller.stats()["rejected_queue_full"] == 1
+
+def test_background_work_and_nested_cold_paths_are_not_limited(monkeypatch):
+    controller = AdmissionController(1, 0, 0.1, rate=1.0, burst=1)
+    monkeypatch.setattr(admission, "_controller", controller)
+    # No client: precompute and CLI work
+    with cold_path():
+        pass
+
+    token = client_var.set("10.0.0.1")
+    try:
+        with cold_path():
+            # Nested inside an admitted computation: no second token or slot
+            with cold_path():
+                pass
+    finally:
+        client_var.reset(token)
+    assert controller.stats()["admitted"] == 1
@@ -0,0 +1,77 @@
+import os
+
+# The classifier module refuses to import without a key; these tests never call OpenAI
+os.environ.setdefault("OPENAI_API_KEY", "test-unused")
+
+import pytest
+import admission
+import app as app_module
+import nutrition_calculator
+
+ESTIMATE = {"dish_name": "rajma", "dish_type": "Dal", "estimated": True,
+            "estimated_nutrition_per_200ml_katori": {"calories": 240.0, "protein": 11.0, "sodium": None}}
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+def test_uncached_dish_result_honours_the_nutrient_subset(client, monkeypatch):
+    monkeypatch.setattr(app_module, "get_nutrition_entry_for_dish", lambda dish_name, raw=False: (dict(ESTIMATE), None))
+    response = client.get("/api/dishes/rajma/nutrition?nutrients=calories")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "no-store"
+    assert response.get_json()["estimated_nutrition_per_200ml_katori"] == {"calories": 240.0}
+
+@pytest.fixture
+def no_admission(monkeypatch):
+    # No burst: every cold-path computation is refused for rate
+    monkeypatch.setattr(admission, "_controller", admission.AdmissionController(1, 0, 0.1, 1.0, 0))
+
+def test_recipe_with_unknown_names_passes_admission_control(client, no_admission, monkeypatch):
+    def no_database():
+        raise AssertionError("lookups must not start before admission")
+
+    monkeypatch.setattr(nutrition_calculator, "get_nutrition_db_connection", no_database)
+    response = client.post("/api/calculate/recipe",
+                           json={"ingredients": [{"name": "qzx random name", "quantity": "100 grams"}]})
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+def test_recipe_with_standard_values_needs_no_admission(client, no_admission, monkeypatch):
+    monkeypatch.setattr(nutrition_calculator, "get_nutrition_db_connection", lambda: None)
+    response = client.post("/api/calculate/recipe", json={
+        "ingredients": [{"name": "chickpeas", "quantity": "200 grams"}, {"name": "salt", "quantity": "to taste"}]})
+    assert response.status_code == 200
+    assert "error" not in response.get_json()
+
+@pytest.mark.parametrize("ingredient", [
+    {"name": "chickpeas", "quantity": 200},
+    {"name": "chickpeas", "quantity": " "},
+    {"name": "chickpeas"},
+    {"name": 7, "quantity": "200 grams"},
+])
+def test_recipe_rejects_non_string_or_empty_fields(client, ingredient):
+    response = client.post("/api/calculate/recipe", json={"ingredients": [ingredient]})
+    assert response.status_code == 400
+
+def test_edit_rejects_numeric_quantities(client):
+    response = client.post("/api/calculate/edit",
+                           json={"dish_name": "dal makhani", "overrides": [{"name": "cream", "quantity": 50}]})
+    assert response.status_code == 400
+
+def test_recipe_is_calculated_per_given_serving_without_openai(client, monkeypatch):
+    def no_openai(*args, **kwargs):
+        raise AssertionError("custom recipes must not call OpenAI")
+
+    monkeypatch.setattr(nutrition_calculator, "get_recipe_for_dish", no_openai)
+    monkeypatch.setattr(nutrition_calculator, "get_nutrition_db_connection", lambda: None)
+    recipe = {"ingredients": [{"name": "chickpeas", "quantity": "200 grams"}], "dish_type": "Dal"}
+
+    whole = client.post("/api/calculate/recipe", json={**recipe, "servings": 1}).get_json()
+    halves = client.post("/api/calculate/recipe", json={**recipe, "servings": 2}).get_json()
+
+    assert whole["dish_type"] == halves["dish_type"] == "Dal"
+    assert halves["servings"] == 2
+    assert halves["serving_weight_grams"] == whole["serving_weight_grams"] / 2
+    assert halves["estimated_nutrition_per_serving"]["protein"] == pytest.approx(
+        whole["estimated_nutrition_per_serving"]["protein"] / 2, abs=0.1)
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from ingredient_index import IngredientIndex
+
+NAMES = ["Tomato, raw", "Tomato puree", "Paneer", "Onion, raw", "दाल"]
+
+def test_saved_index_loads_without_pickle(tmp_path):
+    path = str(tmp_path / "index.npz")
+    index = IngredientIndex.build(NAMES)
+    index.save(path)
+
+    with np.load(path, allow_pickle=False) as data:
+        assert data["names"].dtype.kind == "U"
+        assert data["features"].dtype.kind == "U"
+
+    loaded = IngredientIndex.load(path)
+    assert loaded.names == index.names
+    assert loaded.vocabulary == index.vocabulary
+    assert loaded.search("tomatoes", k=2) == index.search("tomatoes", k=2)
+
+def test_object_array_files_are_refused(tmp_path):
+    path = str(tmp_path / "index.npz")
+    np.savez(path, names=np.array(NAMES, dtype=object), features=np.array([], dtype=object),
+             idf=np.zeros(0), indptr=np.zeros(1), doc_ids=np.zeros(0), weights=np.zeros(0))
+    with pytest.raises(ValueError):
+        IngredientIndex.load(path)
+
+def test_search_ranks_closest_names_first():
+    index = IngredientIndex.build(NAMES + ["Ice cream, vanilla", "Cream, heavy"])
+    assert index.search("tomatoes", k=1)[0][0] == "Tomato, raw"
+    assert index.search("heavy cream", k=1)[0][0] == "Cream, heavy"
+    assert index.search("qqqq") == []
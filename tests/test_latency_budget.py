@@ -0,0 +1,47 @@
+import time
+import threading
+from concurrent.futures import TimeoutError
+import pytest
+import latency_budget
+from config import app_config
+from latency_budget import LatencyBudget, call_within
+
+@pytest.fixture
+def two_workers(monkeypatch):
+    monkeypatch.setattr(app_config, "LATENCY_CALL_WORKERS", 2)
+    # A fresh pool for this test's limit
+    monkeypatch.setattr(latency_budget, "_pool_pid", None)
+
+def test_result_within_budget(two_workers):
+    assert call_within(LatencyBudget(5), lambda x: x * 2, 21) == 42
+
+def test_saturated_pool_falls_back_without_new_threads(two_workers):
+    release = threading.Event()
+    pending = []
+    try:
+        for _ in range(2):
+            budget = LatencyBudget(0.05)
+            with pytest.raises(TimeoutError):
+                call_within(budget, release.wait)
+            pending.extend(budget.pending)
+        assert len(pending) == 2
+
+        started = []
+        with pytest.raises(TimeoutError):
+            call_within(LatencyBudget(5), started.append, 1)
+        assert started == []
+    finally:
+        release.set()
+
+    for future in pending:
+        future.result(1)
+    # Slots come back once the outlived calls finish
+    deadline = time.monotonic() + 1
+    while time.monotonic() < deadline:
+        try:
+            assert call_within(LatencyBudget(5), lambda: "ok") == "ok"
+            break
+        except TimeoutError:
+            time.sleep(0.01)
+    else:
+        pytest.fail("slots were not released")
@@ -0,0 +1,65 @@
+import threading
+import pytest
+import llm_cache
+import remote_cache
+from config import app_config
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_config, "LLM_CACHE_PATH", str(tmp_path / "llm_cache.sqlite"))
+
+def test_each_thread_reuses_one_connection(store):
+    conn = llm_cache._connect()
+    assert llm_cache._connect() is conn
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(llm_cache._connect()))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+def test_remote_hit_is_written_to_the_local_store(store, monkeypatch):
+    remote_reads = []
+
+    def get_value(namespace, key):
+        remote_reads.append(key)
+        return b'{"dish_type": "Dal"}'
+
+    monkeypatch.setattr(remote_cache, "get_value", get_value)
+    assert llm_cache.get_response("abc", "gpt-test") == '{"dish_type": "Dal"}'
+    assert llm_cache.get_response("abc", "gpt-test") == '{"dish_type": "Dal"}'
+    assert remote_reads == ["abc"]
+    assert llm_cache.stats()["models"]["gpt-test"]["entries"] == 1
+
+def _scan(conn):
+    return conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses").fetchone()
+
+def test_hits_are_written_in_batches(store, monkeypatch):
+    monkeypatch.setattr(app_config, "LLM_CACHE_TOUCH_INTERVAL", 3600)
+    monkeypatch.setattr(remote_cache, "set_value", lambda *args, **kwargs: None)
+    llm_cache.store_response("abc", "gpt-test", "answer")
+    conn = llm_cache._connect()
+    changes = conn.total_changes
+
+    for _ in range(3):
+        assert llm_cache.get_response("abc", "gpt-test") == "answer"
+    assert conn.total_changes == changes
+
+    llm_cache.flush_touches()
+    assert conn.execute("SELECT hits FROM llm_responses WHERE key = 'abc'").fetchone() == (3,)
+
+def test_size_limits_use_running_totals(store, monkeypatch):
+    monkeypatch.setattr(app_config, "LLM_CACHE_MAX_ENTRIES", 5)
+    monkeypatch.setattr(remote_cache, "set_value", lambda *args, **kwargs: None)
+    for i in range(8):
+        llm_cache.store_response(f"key{i}", "gpt-test", "x" * (i + 1))
+    # Replacing an entry changes its size, not the count
+    llm_cache.store_response("key7", "gpt-test", "short")
+
+    conn = llm_cache._connect()
+    meta = conn.execute("SELECT entries, bytes FROM llm_meta").fetchone()
+    assert meta == _scan(conn)
+    assert meta[0] <= 5
+
+    llm_cache.clear()
+    assert conn.execute("SELECT entries, bytes FROM llm_meta").fetchone() == (0, 0)
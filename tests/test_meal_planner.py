@@ -0,0 +1,30 @@
+import os
+
+# The classifier module refuses to import without a key; these tests never call OpenAI
+os.environ.setdefault("OPENAI_API_KEY", "test-unused")
+
+import meal_planner
+
+RESULTS = {
+    "rice": {"dish_type": "Rice",
+             "estimated_nutrition_per_150g_bowl": {"calories": 200.0, "protein": 4.0, "sodium": 5.0}},
+    # Profile dishes list no extended nutrients
+    "dal makhani": {"dish_type": "Dal",
+                    "estimated_nutrition_per_200ml_katori": {"calories": 250, "protein": 12}},
+}
+
+def _resolve(dish_names):
+    return {dish_name: RESULTS[dish_name] for dish_name in dish_names}
+
+def test_missing_nutrient_only_nulls_plans_containing_the_dish(monkeypatch):
+    monkeypatch.setattr(meal_planner, "resolve_dishes", _resolve)
+    response = meal_planner.evaluate_plans_bulk(
+        [["rice"], ["dal makhani", "rice"], [{"dish_name": "dal makhani", "portions": 0}, "rice"]],
+        ("calories", "sodium"))
+    assert response["totals"] == [[200.0, 5.0], [450.0, None], [200.0, 5.0]]
+
+def test_meal_total_is_null_when_a_component_lacks_data(monkeypatch):
+    monkeypatch.setattr(meal_planner, "resolve_dishes", _resolve)
+    meal = meal_planner.calculate_meal(["dal makhani", {"dish_name": "rice", "portions": 2}])
+    assert meal["total_nutrition"]["calories"] == 650.0
+    assert meal["total_nutrition"]["sodium"] is None
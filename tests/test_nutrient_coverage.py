@@ -0,0 +1,40 @@
+import os
+import math
+
+# The classifier module refuses to import without a key; these tests never call OpenAI
+os.environ.setdefault("OPENAI_API_KEY", "test-unused")
+
+from serializer import dumps, loads
+from nutrition_calculator import build_dish_result
+from nutrition_records import DishBreakdown, MatchResult, NutrientVector, StandardizedIngredient
+from ingredient_processor import sum_contributions
+
+def _breakdown():
+    ingredients = [StandardizedIngredient("toor dal", "1 cup", 300.0), StandardizedIngredient("ghee", "1 tbsp", 100.0)]
+    matches = [
+        MatchResult("toor dal", "1 cup", "Toor dal", NutrientVector.from_mapping(
+            {"calories": 1000.0, "protein": 60.0, "carbs": 170.0, "fat": 5.0, "fiber": 40.0, "sodium": 50.0})),
+        MatchResult("ghee", "1 tbsp", "Ghee", NutrientVector.from_mapping(
+            {"calories": 900.0, "protein": 0.0, "carbs": 0.0, "fat": 100.0, "fiber": 0.0})),
+    ]
+    return DishBreakdown("test dal", "Dal", ingredients, matches, sum_contributions(matches), 400.0)
+
+def test_missing_values_are_skipped_not_counted_as_zero():
+    total = _breakdown().raw_total
+    assert total["sodium"] == 50.0
+    assert math.isnan(total["potassium"])
+
+def test_result_reports_null_and_coverage():
+    result = build_dish_result("test dal", _breakdown())
+    nutrition = next(value for key, value in result.items() if key.startswith("estimated_nutrition_per_"))
+    assert nutrition["sodium"] > 0
+    assert nutrition["potassium"] is None
+    assert result["nutrient_coverage"]["sodium"] == 0.75
+    assert result["nutrient_coverage"]["potassium"] == 0
+    assert "calories" not in result["nutrient_coverage"]
+
+def test_breakdown_round_trip_keeps_missing_values():
+    restored = DishBreakdown.from_dict(loads(dumps(_breakdown().to_dict())))
+    assert math.isnan(restored.matches[1].nutrition["sodium"])
+    assert math.isnan(restored.raw_total["potassium"])
+    assert restored.raw_total["sodium"] == 50.0
@@ -0,0 +1,29 @@
+import numpy as np
+from nutrition_records import NUTRIENT_KEYS, NutrientVector
+from nutrition_rules import apply_rules, apply_rules_batch
+
+ROWS = [
+    ("Dal", "dal tadka", {"calories": 90.0, "protein": 30.0, "carbs": 5.0, "fat": 2.0, "fiber": 20.0}),
+    ("South Indian", "masala dosa", {"calories": 400.0, "protein": 1.0, "carbs": 45.0, "fat": 12.0, "fiber": 9.0}),
+    ("South Indian", "idli", {"calories": 140.0, "protein": 4.0, "carbs": 31.0, "fat": 0.2, "fiber": 1.2}),
+    ("Rice", "jeera rice", {"calories": 210.0, "protein": 4.5, "carbs": 44.0, "fat": 3.0}),
+    (None, "unknown", {"calories": 10.0}),
+]
+
+def test_batch_matches_single_vector_rules_row_by_row():
+    vectors = [NutrientVector.from_mapping(values) for _, _, values in ROWS]
+    matrix = np.stack([np.frombuffer(vector.values).copy() for vector in vectors])
+
+    clamped, fired = apply_rules_batch(matrix, "serving", [row[0] for row in ROWS], [row[1] for row in ROWS])
+
+    assert fired.shape == (len(ROWS), len(NUTRIENT_KEYS))
+    for (dish_type, dish_name, _), vector, batch_values, batch_fired in zip(ROWS, vectors, clamped, fired):
+        single_fired = apply_rules(vector, "serving", dish_type, dish_name)
+        np.testing.assert_array_equal(np.frombuffer(vector.values), batch_values)
+        assert [rule_id for rule_id in batch_fired if rule_id] == single_fired
+
+def test_batch_leaves_missing_values_unknown():
+    matrix = np.full((1, len(NUTRIENT_KEYS)), np.nan)
+    clamped, fired = apply_rules_batch(matrix, "serving", ["Dal"])
+    assert np.isnan(clamped).all()
+    assert not any(fired[0])
@@ -0,0 +1,103 @@
+import os
+
+# The classifier module refuses to import without a key; these tests never call OpenAI
+os.environ.setdefault("OPENAI_API_KEY", "test-unused")
+
+import pytest
+from pymongo import MongoClient
+from pymongo.database import Database
+import admission
+import nutrition_calculator
+from admission import AdmissionRejected
+from nutrition_records import DishBreakdown, MatchResult, NutrientVector, StandardizedIngredient
+
+def _breakdown():
+    dal = NutrientVector.from_mapping({"calories": 680.0, "protein": 50.0, "carbs": 118.0, "fat": 3.2, "fiber": 36.6})
+    return DishBreakdown("test dal", "Dal", [StandardizedIngredient("urad dal", "1 cup", 200.0)],
+                         [MatchResult("urad dal", "1 cup", "Urad dal", dal)], dal.copy(), 200.0)
+
+def test_overrides_with_two_lookups_reuse_a_pymongo_database(monkeypatch):
+    # bool() of a pymongo Database raises NotImplementedError, so it must never be truth-tested
+    db = MongoClient(connect=False)["Food_Collection"]
+    connections = []
+    looked_up = []
+
+    def connect():
+        connections.append(db)
+        return db
+
+    def match(ingredient, database):
+        assert isinstance(database, Database)
+        looked_up.append(ingredient.name)
+        return MatchResult(ingredient.name, ingredient.quantity, f"{ingredient.name} (test)",
+                           NutrientVector.from_mapping({"calories": 300.0, "protein": 10.0, "fat": 25.0},
+                                                       ingredient.weight_grams / 100.0))
+
+    monkeypatch.setattr(nutrition_calculator, "get_dish_breakdown", lambda dish_name: _breakdown())
+    monkeypatch.setattr(nutrition_calculator, "get_nutrition_db_connection", connect)
+    monkeypatch.setattr(nutrition_calculator, "match_ingredient", match)
+
+    result = nutrition_calculator.calculate_nutrition_with_overrides(
+        "test dal", [{"name": "paneer", "quantity": "100 grams"}, {"name": "cream", "quantity": "50 grams"}])
+
+    assert "error" not in result
+    assert looked_up == ["paneer", "cream"]
+    assert len(connections) == 1
+    assert [used["ingredient"] for used in result["ingredients_used"]] == ["urad dal", "paneer", "cream"]
+
+def test_rejected_breakdown_is_not_turned_into_an_error_result(monkeypatch):
+    def rejected(dish_name):
+        raise AdmissionRejected("queue full", 2)
+
+    monkeypatch.setattr(nutrition_calculator, "get_dish_breakdown", rejected)
+    with pytest.raises(AdmissionRejected):
+        nutrition_calculator.calculate_nutrition_with_overrides("test dal", [{"name": "paneer", "quantity": "100 grams"}])
+
+def test_profile_dish_edits_are_applied_to_the_profile_values(monkeypatch):
+    breakdown = _breakdown()
+    breakdown.dish_name = "dal makhani"
+
+    def match(ingredient, database):
+        return MatchResult(ingredient.name, ingredient.quantity, f"{ingredient.name} (test)",
+                           NutrientVector.from_mapping({"calories": 300.0, "protein": 18.0, "carbs": 4.0,
+                                                        "fat": 25.0, "fiber": 0.0},
+                                                       ingredient.weight_grams / 100.0))
+
+    monkeypatch.setattr(nutrition_calculator, "get_dish_breakdown", lambda dish_name: breakdown)
+    monkeypatch.setattr(nutrition_calculator, "get_nutrition_db_connection", lambda: None)
+    monkeypatch.setattr(nutrition_calculator, "match_ingredient", match)
+
+    result = nutrition_calculator.calculate_nutrition_with_overrides(
+        "Dal Makhani", [{"name": "paneer", "quantity": "100 grams"}, {"name": "cream", "quantity": "50 grams"}])
+
+    profile = nutrition_calculator.DISH_NUTRITION_PROFILES["dal makhani"]
+    nutrition = result["estimated_nutrition_per_200ml_katori"]
+    assert result["dish_type"] == profile["dish_type"]
+    assert nutrition["calories"] > profile["calories"]
+    assert nutrition["fat"] > profile["fat"]
+    assert "nutrient_coverage" not in result
+
+def test_removal_needs_no_database(monkeypatch):
+    def no_database():
+        raise AssertionError("a removal must not connect to the database")
+
+    monkeypatch.setattr(nutrition_calculator, "get_dish_breakdown", lambda dish_name: _breakdown())
+    monkeypatch.setattr(nutrition_calculator, "get_nutrition_db_connection", no_database)
+    monkeypatch.setattr(nutrition_calculator, "match_ingredient", lambda ingredient, db: no_database())
+
+    result = nutrition_calculator.calculate_nutrition_with_overrides(
+        "test dal", [{"name": "urad dal", "quantity": "0"}, {"name": "salt", "quantity": "to taste"}])
+
+    assert "error" not in result
+    assert [used["matched_to"] for used in result["ingredients_used"]] == ["Excluded from calculation"] * 2
+
+def test_added_unknown_ingredient_passes_admission_control(monkeypatch):
+    monkeypatch.setattr(admission, "_controller", admission.AdmissionController(1, 0, 0.1, 1.0, 0))
+    token = admission.client_var.set("203.0.113.7")
+    try:
+        monkeypatch.setattr(nutrition_calculator, "get_dish_breakdown", lambda dish_name: _breakdown())
+        with pytest.raises(AdmissionRejected):
+            nutrition_calculator.calculate_nutrition_with_overrides(
+                "test dal", [{"name": "qzx random name", "quantity": "100 grams"}])
+    finally:
+        admission.client_var.reset(token)
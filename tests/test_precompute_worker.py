@@ -0,0 +1,37 @@
+import os
+
+# The classifier module refuses to import without a key; these tests never call OpenAI
+os.environ.setdefault("OPENAI_API_KEY", "test-unused")
+
+import precompute_worker
+from config import app_config
+from nutrition_calculator import build_dish_result
+from nutrition_records import DishBreakdown, MatchResult, NutrientVector, StandardizedIngredient
+from result_cache import get_cached_result, store_breakdown
+
+def _breakdown(dish_name, dish_type, calories, fiber):
+    values = NutrientVector.from_mapping({"calories": calories, "protein": 20.0, "carbs": 60.0,
+                                          "fat": 8.0, "fiber": fiber})
+    return DishBreakdown(dish_name, dish_type, [StandardizedIngredient("base", "2 cup", 400.0)],
+                         [MatchResult("base", "2 cup", "Base", values)], values.copy(), 400.0)
+
+def test_missing_results_are_rebuilt_from_cached_breakdowns_in_one_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_config, "RESULT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(app_config, "SHARED_CACHE_ENABLED", False)
+    breakdowns = {"toor dal": _breakdown("toor dal", "Dal", 900.0, 60.0),
+                  "rava dosa": _breakdown("rava dosa", "South Indian", 500.0, 2.0)}
+    for dish_name, breakdown in breakdowns.items():
+        store_breakdown(dish_name, breakdown.to_dict())
+
+    remaining = precompute_worker.rebuild_from_breakdowns(
+        ["toor dal", "no breakdown", "rava dosa", "dal makhani"], {})
+
+    # Profile dishes and dishes without a breakdown still need a full precompute
+    assert remaining == ["no breakdown", "dal makhani"]
+    for dish_name, breakdown in breakdowns.items():
+        assert get_cached_result(dish_name) == build_dish_result(dish_name, breakdown)
+
+def test_cached_results_are_left_to_the_full_refresh(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_config, "RESULT_CACHE_DIR", str(tmp_path))
+    store_breakdown("toor dal", _breakdown("toor dal", "Dal", 900.0, 60.0).to_dict())
+    assert precompute_worker.rebuild_from_breakdowns(["toor dal"], {"toor dal": 0}) == ["toor dal"]
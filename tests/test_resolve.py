@@ -0,0 +1,26 @@
+import os
+
+# The classifier module refuses to import without a key; these tests never call OpenAI
+os.environ.setdefault("OPENAI_API_KEY", "test-unused")
+
+import ingredient_processor
+from config import app_config
+from nutrition_records import MatchResult, StandardizedIngredient
+
+INGREDIENTS = [StandardizedIngredient("toor dal", "1 cup", 200.0), StandardizedIngredient("ghee", "1 tbsp", 14.0)]
+
+def _sequential(monkeypatch):
+    monkeypatch.setattr(app_config, "INGREDIENT_RESOLVE_WORKERS", 1)
+    monkeypatch.setattr(ingredient_processor, "_resolve_one",
+                        lambda ingredient, db: MatchResult(ingredient.name, ingredient.quantity, "looked up"))
+
+def test_sequential_lookups_run_within_the_deadline(monkeypatch):
+    _sequential(monkeypatch)
+    matches = ingredient_processor.resolve_ingredients(INGREDIENTS, object(), deadline=60)
+    assert [match.matched_to for match in matches] == ["looked up", "looked up"]
+
+def test_sequential_lookups_fall_back_after_the_deadline(monkeypatch):
+    _sequential(monkeypatch)
+    matches = ingredient_processor.resolve_ingredients(INGREDIENTS, object(), deadline=0)
+    assert all(match.matched_to != "looked up" for match in matches)
+    assert [match.ingredient for match in matches] == ["toor dal", "ghee"]
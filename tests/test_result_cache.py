@@ -0,0 +1,31 @@
+import os
+import pytest
+import result_cache
+from config import app_config
+from result_cache import get_result_cache_key, cache_file_path
+
+def test_plain_names_keep_readable_keys():
+    assert get_result_cache_key(" Aloo Gobi ") == "aloo_gobi"
+
+@pytest.mark.parametrize("dish_name", ["../../tmp/evil", "..\\evil", "/etc/passwd", "दाल मखनी"])
+def test_keys_never_leave_the_cache_directory(tmp_path, dish_name):
+    key = get_result_cache_key(dish_name)
+    assert os.path.dirname(cache_file_path(str(tmp_path), key, ".json")) == str(tmp_path)
+
+def test_distinct_non_ascii_names_get_distinct_keys():
+    assert get_result_cache_key("दाल मखनी") != get_result_cache_key("चना मसाला")
+
+def test_escaping_keys_are_refused(tmp_path):
+    with pytest.raises(ValueError):
+        cache_file_path(str(tmp_path), "../evil", ".json")
+
+def test_requests_are_counted_in_memory_and_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_config, "RESULT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(app_config, "REQUEST_LOG_MAX_NAMES", 2)
+    result_cache.flush_request_counts()
+    for dish_name in ["Dal Makhani", "dal makhani ", "Idli", "made up 1", "made up 2"]:
+        result_cache.record_dish_request(dish_name)
+    assert not os.path.exists(tmp_path / result_cache.REQUEST_LOG_FILE)
+
+    result_cache.flush_request_counts()
+    assert result_cache.drain_request_counts() == {"dal makhani": 2, "idli": 1}